@@ -1,23 +1,96 @@
 import os
 import pygame
+from collections import OrderedDict
 from typing import Tuple, List, Dict, Union, Optional
 from setting import GameConfig
+from atlas import sprite_atlas
+from assets import assets
+
+Color = Tuple[int, int, int]
+
+# 文字快取類
+class TextCache:
+    """以 (文字, 顏色) 為鍵的小型 LRU，保存已渲染的文字 Surface"""
+    def __init__(self, font: pygame.font.Font, maxsize: int = 64):
+        self.font = font
+        self.maxsize = maxsize
+        self.surfaces: 'OrderedDict[Tuple[str, Color], pygame.Surface]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, text: str, color: Color) -> pygame.Surface:
+        """取得文字 Surface，快取中沒有時才呼叫 font.render"""
+        key = (text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = self.font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.maxsize:
+            self.surfaces.popitem(last=False)  # 移除最久未使用的項目
+        return surface
+
+# HUD 文字元件類
+class HudText:
+    """單一 HUD 文字元件，只有數值改變時才重新渲染"""
+    def __init__(self, cache: TextCache, template: str, color: Color, topleft: Tuple[int, int]):
+        self.cache = cache
+        self.template = template
+        self.color = color
+        self.topleft = topleft
+        self.value = None
+        self.surface: Optional[pygame.Surface] = None
+        self.rect = pygame.Rect(topleft, (0, 0))
+
+    def set(self, value) -> bool:
+        """更新數值，回傳是否需要重繪"""
+        if self.surface is not None and value == self.value:
+            return False
+        self.value = value
+        self.surface = self.cache.render(self.template.format(value), self.color)
+        self.rect = self.surface.get_rect(topleft=self.topleft)
+        return True
+
+    def draw(self, screen: pygame.Surface) -> None:
+        """繪製目前的文字"""
+        screen.blit(self.surface, self.rect)
 
 # 界面管理類
 class UIManager:
+    # 寶石計數區的版面
+    GEM_COUNT_X = 20
+    GEM_COUNT_Y = 100
+    GEM_COUNT_SPACING = 50
+    GEM_ICON_SIZE = 30
+
     def __init__(self, screen: pygame.Surface, font: pygame.font.Font):
         self.screen = screen
         self.font = font
         self.load_images()
+        self.text_cache = TextCache(font)
+        self.hud = {
+            'score': HudText(self.text_cache, 'Score:{}', (45, 255, 245), (20, GameConfig.HEIGHT - 40)),
+            'level': HudText(self.text_cache, 'Level: {}', (255, 255, 255), (20, 15)),
+            'target': HudText(self.text_cache, 'Target: {}', (255, 255, 255), (GameConfig.WIDTH - 190, 15)),
+            'timer': HudText(self.text_cache, 'Time: {}', (55, 205, 255), (GameConfig.WIDTH - 180, GameConfig.HEIGHT - 40)),
+        }
+        self.gem_icons: Dict[int, pygame.Surface] = {}
+        self.gem_count_texts: Dict[int, HudText] = {}
+        self.static_layer: Optional[pygame.Surface] = None
+        self.static_layer_key: Optional[Tuple[int, ...]] = None
+        self.grid_sheet: Optional[pygame.Surface] = None  # 大棋盤模式：一整片格線，依捲動位置對齊後貼上
+        self.grid_sheet_key: Optional[Tuple[int, ...]] = None
+        self.viewport = None  # 設定後網格依照視野繪製（大棋盤模式）
 
     def load_images(self) -> None:
-        """載入遊戲需要的圖片"""
-        self.final_building_img = pygame.image.load(os.path.join(GameConfig.ROOTDIR, "resources/images/final_building.png"))
-        self.final_building_img = pygame.transform.smoothscale(self.final_building_img, (400, 600))
-        self.background = pygame.image.load(os.path.join(GameConfig.ROOTDIR, 'resources/images/game_background.JPG'))
-        self.background = pygame.transform.scale(self.background, (GameConfig.WIDTH, GameConfig.HEIGHT))
-        self.tutorial_background = pygame.image.load(os.path.join(GameConfig.ROOTDIR, 'resources/images/tutorial_background.JPG'))
-        self.tutorial_background = pygame.transform.scale(self.tutorial_background, (GameConfig.WIDTH, GameConfig.HEIGHT))
+        """取得遊戲需要的圖片（由資源管理器解碼並快取成顯示格式）"""
+        self.final_building_img = assets.get('final_building')
+        self.background = assets.get('game_background')
+        self.tutorial_background = assets.get('tutorial_background')
 
     def draw_tutorial_background(self) -> None:
         """繪製教學背景"""
@@ -27,52 +100,113 @@ class UIManager:
         """繪製背景"""
         self.screen.blit(self.background, (0, 0))
 
+    def build_static_layer(self) -> pygame.Surface:
+        """將背景與網格線預先合成為一張顯示格式的 Surface"""
+        layer = pygame.Surface((GameConfig.WIDTH, GameConfig.HEIGHT)).convert(self.screen)
+        background = self.background
+        if background.get_size() != (GameConfig.WIDTH, GameConfig.HEIGHT):
+            background = pygame.transform.scale(background, (GameConfig.WIDTH, GameConfig.HEIGHT))
+        layer.blit(background, (0, 0))
+        if self.viewport is not None and self.viewport.scrollable:
+            # 格線隨捲動移動，每幀另外貼上；圖層只包含視野外框
+            pygame.draw.rect(layer, (255, 165, 0), self.viewport.area.inflate(4, 4), 2)
+        else:
+            self.draw_grids(layer)
+        self.static_layer = layer
+        self.static_layer_key = self.layout_key()
+        return layer
+
+    def layout_key(self) -> Tuple[int, ...]:
+        """靜態圖層的快取鍵：視窗佈局加上視野的範圍與格子大小（不含捲動位置）"""
+        return GameConfig.layout_key() + (self.viewport.key() if self.viewport is not None else ())
+
+    def draw_static_layer(self) -> None:
+        """一次 blit 繪製背景與網格，佈局改變時才重建（大棋盤模式的格線依捲動位置另外貼上）"""
+        if self.static_layer is None or self.static_layer_key != self.layout_key():
+            self.build_static_layer()
+        self.screen.blit(self.static_layer, (0, 0))
+        if self.viewport is not None and self.viewport.scrollable:
+            self.draw_viewport_grids(self.screen)
+
     def draw_score(self, score: int) -> None:
         """繪製分數"""
-        score_render = self.font.render(f'Score:{score}', 1, (45, 255, 245))
-        self.screen.blit(score_render, (20, GameConfig.HEIGHT-40))
+        self.hud['score'].set(score)
+        self.hud['score'].draw(self.screen)
 
     def draw_level(self, level: int) -> None:
         """繪製關卡信息"""
-        level_text = self.font.render(f'Level: {level}', True, (255, 255, 255))
-        self.screen.blit(level_text, (20, 15))
+        self.hud['level'].set(level)
+        self.hud['level'].draw(self.screen)
 
     def draw_target(self, target: int) -> None:
         """繪製目標分數"""
-        target_text = self.font.render(f'Target: {target}', True, (255, 255, 255))
-        self.screen.blit(target_text, (GameConfig.WIDTH - 190, 15))
+        self.hud['target'].set(target)
+        self.hud['target'].draw(self.screen)
 
     def draw_timer(self, remaining_time: int) -> None:
         """繪製剩餘時間"""
-        timer_text = self.font.render(f'Time: {remaining_time}', 1, (55, 205, 255))
-        rect = timer_text.get_rect()
-        rect.left, rect.top = (GameConfig.WIDTH-180, GameConfig.HEIGHT-40)
-        self.screen.blit(timer_text, rect)
+        self.hud['timer'].set(remaining_time)
+        self.hud['timer'].draw(self.screen)
+
+    def _gem_count_text(self, gem_type: int, index: int) -> HudText:
+        """取得（必要時建立）寶石計數的文字元件"""
+        count_text = self.gem_count_texts.get(gem_type)
+        if count_text is None:
+            topleft = (self.GEM_COUNT_X + self.GEM_ICON_SIZE + 10, self.GEM_COUNT_Y + index * self.GEM_COUNT_SPACING)
+            count_text = HudText(self.text_cache, '{}', (255, 255, 255), topleft)
+            self.gem_count_texts[gem_type] = count_text
+        return count_text
+
+    def update_hud(self, values: Dict[str, int], gem_count: Dict[int, int]) -> List[pygame.Rect]:
+        """更新 HUD 數值，回傳內容有變化的區域（新舊範圍的聯集）"""
+        dirty = []
+        for name, value in values.items():
+            widget = self.hud[name]
+            old_rect = widget.rect
+            if widget.set(value):
+                dirty.append(old_rect.union(widget.rect))
+        for index, (gem_type, count) in enumerate(gem_count.items()):
+            widget = self._gem_count_text(gem_type, index)
+            old_rect = widget.rect
+            if widget.set(count):
+                dirty.append(old_rect.union(widget.rect))
+        return dirty
+
+    def hud_rect(self) -> pygame.Rect:
+        """HUD 文字與寶石計數區目前佔用的範圍（髒矩形與它不相交時不必重畫 HUD）"""
+        icons = pygame.Rect(self.GEM_COUNT_X, self.GEM_COUNT_Y, self.GEM_ICON_SIZE,
+                            self.GEM_COUNT_SPACING * max(len(self.gem_count_texts), 1))
+        return icons.unionall([widget.rect for widget in self.hud.values()] +
+                              [widget.rect for widget in self.gem_count_texts.values()])
 
     def draw_gem_count(self, gem_count: Dict[int, int], gem_imgs: List[str]) -> None:
         """繪製寶石消除計數及其圖片"""
-        y_offset = 100  # 起始的 y 座標
-        x_offset = 20   # 起始的 x 座標
-        spacing = 50    # 每種寶石的間距
-        gem_size = 30   # 寶石圖片大小
-
-        for gem_type, count in gem_count.items():
-            # 載入並縮放寶石圖片
-            gem_image = pygame.image.load(gem_imgs[gem_type - 1])
-            gem_image = pygame.transform.scale(gem_image, (gem_size, gem_size))
-            
-            # 繪製寶石圖片
+        y_offset = self.GEM_COUNT_Y  # 起始的 y 座標
+        x_offset = self.GEM_COUNT_X  # 起始的 x 座標
+        gem_size = self.GEM_ICON_SIZE
+
+        for index, (gem_type, count) in enumerate(gem_count.items()):
+            # 圖示只在第一次使用時從圖集取得
+            gem_image = self.gem_icons.get(gem_type)
+            if gem_image is None:
+                gem_image = sprite_atlas.get(gem_imgs[gem_type - 1], (gem_size, gem_size))
+                self.gem_icons[gem_type] = gem_image
             self.screen.blit(gem_image, (x_offset, y_offset))
 
-            # 繪製消除計數
-            count_text = self.font.render(str(count), True, (255, 255, 255))
-            self.screen.blit(count_text, (x_offset + gem_size + 10, y_offset))
+            # 繪製消除計數，數字不變時沿用上次的 Surface
+            count_text = self._gem_count_text(gem_type, index)
+            count_text.set(count)
+            count_text.draw(self.screen)
 
             # 更新下一個寶石的位置
-            y_offset += spacing
+            y_offset += self.GEM_COUNT_SPACING
 
-    def draw_grids(self) -> None:
+    def draw_grids(self, surface: Optional[pygame.Surface] = None) -> None:
         """繪製網格"""
+        surface = surface or self.screen
+        if self.viewport is not None and self.viewport.scrollable:
+            self.draw_viewport_grids(surface)
+            return
         for x in range(GameConfig.NUMGRID):
             for y in range(GameConfig.NUMGRID):
                 rect = pygame.Rect((
@@ -81,12 +215,47 @@ class UIManager:
                     GameConfig.GRIDSIZE,
                     GameConfig.GRIDSIZE
                 ))
-                self.draw_block(rect, color=(255, 165, 0), size=1)
+                pygame.draw.rect(surface, (255, 165, 0), rect, 1)
+
+    def build_grid_sheet(self) -> pygame.Surface:
+        """預先畫好比視野多一格的格線（間距為 cell_size，其餘透明），捲動時只需要平移貼上"""
+        viewport = self.viewport
+        cell_size = viewport.cell_size
+        width, height = viewport.area.width + cell_size + 1, viewport.area.height + cell_size + 1
+        sheet = pygame.Surface((width, height))
+        sheet.set_colorkey((0, 0, 0))
+        for line_x in range(0, width, cell_size):
+            pygame.draw.line(sheet, (255, 165, 0), (line_x, 0), (line_x, height - 1))
+        for line_y in range(0, height, cell_size):
+            pygame.draw.line(sheet, (255, 165, 0), (0, line_y), (width - 1, line_y))
+        if pygame.display.get_surface() is not None:
+            sheet = sheet.convert()
+        self.grid_sheet = sheet
+        self.grid_sheet_key = (cell_size,) + tuple(viewport.area.size)
+        return sheet
+
+    def draw_viewport_grids(self, surface: pygame.Surface) -> None:
+        """大棋盤模式：把格線片對齊到 (offset % cell_size) 貼上，只露出視野與棋盤重疊的部分"""
+        viewport = self.viewport
+        cell_size = viewport.cell_size
+        if self.grid_sheet is None or self.grid_sheet_key != (cell_size,) + tuple(viewport.area.size):
+            self.build_grid_sheet()
+        origin_x = viewport.area.left - viewport.offset_x % cell_size
+        origin_y = viewport.area.top - viewport.offset_y % cell_size
+        # 棋盤比視野小時（置中顯示）格線只畫在棋盤範圍內，包含最右與最下的邊線
+        board_pixels = viewport.board_size * cell_size + 1
+        visible = viewport.area.clip(pygame.Rect(viewport.cell_pos(0, 0), (board_pixels, board_pixels)))
+        surface.blit(self.grid_sheet, visible.topleft, visible.move(-origin_x, -origin_y))
 
     def draw_block(self, block: pygame.Rect, color: Tuple[int, int, int] = (255, 0, 0), size: int = 2) -> None:
         """繪製方塊邊框"""
         pygame.draw.rect(self.screen, color, block, size)
 
+    def building_rect(self) -> pygame.Rect:
+        """建築進度圖可能佔用的最大範圍"""
+        image_width, image_height = self.final_building_img.get_size()
+        return pygame.Rect(GameConfig.WIDTH - 280, GameConfig.HEIGHT // 2 + 300 - image_height, image_width, image_height)
+
     def draw_building_progress(self, score: int, target_score: int) -> None:
         """繪製建築進度"""
         ratio = min(max(score / target_score, 0), 1)
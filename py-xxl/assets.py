@@ -0,0 +1,141 @@
+import os
+import time
+import queue
+import threading
+import pygame
+from typing import Tuple, List, Dict, Union, Optional, NamedTuple, Set
+from setting import GameConfig
+
+# 定義常用的類型
+Size = Tuple[int, int]
+Decoded = Tuple[str, pygame.Surface, float, float]  # 名稱、縮放後的圖片、解碼秒數、縮放秒數
+
+
+def load_font(size: int) -> pygame.font.Font:
+    """載入遊戲字型：有 FONT_PATH 時直接讀檔，否則使用 FONT_NAME 的系統粗體字（第一次呼叫會掃描系統字型，之後沿用結果）"""
+    if GameConfig.FONT_PATH:
+        return pygame.font.Font(GameConfig.FONT_PATH, size)
+    return pygame.font.SysFont(GameConfig.FONT_NAME, size, bold=True)
+
+
+# 資源描述
+class AssetSpec(NamedTuple):
+    """一張需要預先載入的大圖"""
+    path: str                    # 相對於 ROOTDIR 的路徑
+    size: Optional[Size] = None  # None 表示縮放到整個視窗
+    alpha: bool = False          # 保留透明度（convert_alpha），否則 convert
+    smooth: bool = False         # 使用 smoothscale（較慢、品質較好）
+
+
+# 場景背景與介面大圖，依照第一次用到的順序排列
+SCENE_ASSETS: Dict[str, AssetSpec] = {
+    'start_background': AssetSpec('resources/images/background.JPG'),
+    'game_background': AssetSpec('resources/images/game_background.jpg'),
+    'tutorial_background': AssetSpec('resources/images/tutorial_background.jpg'),
+    'final_building': AssetSpec('resources/images/final_building.png', (400, 600), alpha=True, smooth=True),
+    'level_background': AssetSpec('resources/images/level_background.jpg'),
+    'end_background': AssetSpec('resources/images/endgame.JPG'),
+    'victory_background': AssetSpec('resources/images/victory.JPG'),
+}
+
+
+# 資源管理類
+class AssetManager:
+    """在背景執行緒解碼並縮放大圖，主執行緒再轉成顯示格式並快取
+
+    解碼與縮放不需要視窗，可以在背景執行緒進行；convert() 會用到顯示格式，
+    因此留給主執行緒的 poll() / get() 處理。沒有呼叫 start() 時 get() 直接同步載入。
+    """
+    def __init__(self, specs: Optional[Dict[str, AssetSpec]] = None):
+        self.specs = dict(specs if specs is not None else SCENE_ASSETS)
+        self.surfaces: Dict[str, pygame.Surface] = {}
+        self.timings: Dict[str, Tuple[float, float]] = {}  # 每張圖的（解碼, 縮放）秒數
+        self._results: 'queue.Queue[Decoded]' = queue.Queue()
+        self._pending: Set[str] = set()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """在背景執行緒開始解碼所有尚未載入的資源"""
+        if self._thread is not None:
+            return
+        names = [name for name in self.specs if name not in self.surfaces]
+        self._pending.update(names)
+        self._thread = threading.Thread(target=self._worker, args=(names,), name='asset-loader', daemon=True)
+        self._thread.start()
+
+    def _worker(self, names: List[str]) -> None:
+        """背景執行緒：依序解碼並縮放"""
+        for name in names:
+            self._results.put(self._decode(name))
+
+    def _decode(self, name: str) -> Decoded:
+        """從磁碟解碼並縮放一張圖（不碰顯示格式，任何執行緒都可以呼叫）"""
+        spec = self.specs[name]
+        size = spec.size or (GameConfig.WIDTH, GameConfig.HEIGHT)
+        start = time.perf_counter()
+        try:
+            image = pygame.image.load(os.path.join(GameConfig.ROOTDIR, spec.path))
+        except (pygame.error, OSError) as error:
+            # 缺少的圖片以純色代替，不讓場景切換時才崩潰
+            print(f"Asset {name}: cannot load {spec.path} ({error})")
+            image = None
+        decoded = time.perf_counter()
+        if image is None:
+            image = pygame.Surface(size)
+            image.fill((0, 0, 0))
+        else:
+            image = (pygame.transform.smoothscale if spec.smooth else pygame.transform.scale)(image, size)
+        return name, image, decoded - start, time.perf_counter() - decoded
+
+    def _finish(self, name: str, image: pygame.Surface, decode_time: float, scale_time: float) -> None:
+        """（主執行緒）轉換成顯示格式、快取並記錄時間"""
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha() if self.specs[name].alpha else image.convert()
+        self.surfaces[name] = image
+        self.timings[name] = (decode_time, scale_time)
+        self._pending.discard(name)
+        if GameConfig.STARTUP_PROFILE:
+            # 只在量測啟動時間時輸出每個資源的解碼與縮放時間
+            print(f"Asset {name}: decode {decode_time * 1000:.1f} ms, scale {scale_time * 1000:.1f} ms")  # 調試輸出
+
+    def poll(self) -> int:
+        """處理背景執行緒已完成的資源，回傳本次完成的數量（不會等待）"""
+        count = 0
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                return count
+            self._finish(*result)
+            count += 1
+
+    def get(self, name: str) -> pygame.Surface:
+        """取得資源；仍在背景解碼時等待它完成，沒有背景載入時直接在主執行緒載入"""
+        image = self.surfaces.get(name)
+        if image is not None:
+            return image
+        if name in self._pending:
+            while name in self._pending:
+                self._finish(*self._results.get())
+        else:
+            self._finish(*self._decode(name))
+        return self.surfaces[name]
+
+    def progress(self, names: Optional[List[str]] = None) -> float:
+        """names（預設為全部資源）中已載入的比例（0 到 1）"""
+        names = list(self.specs) if names is None else names
+        if not names:
+            return 1.0
+        return sum(name in self.surfaces for name in names) / len(names)
+
+    def stats(self) -> Dict[str, float]:
+        """回傳已載入的數量與總解碼、縮放時間（毫秒）"""
+        return {
+            'entries': len(self.surfaces),
+            'decode_ms': round(sum(decode for decode, _ in self.timings.values()) * 1000, 1),
+            'scale_ms': round(sum(scale for _, scale in self.timings.values()) * 1000, 1),
+        }
+
+
+# 全域共用的資源管理器
+assets = AssetManager()
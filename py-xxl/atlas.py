@@ -0,0 +1,53 @@
+import pygame
+from typing import Tuple, List, Dict, Union, Optional
+from setting import GameConfig
+
+# 定義常用的類型
+Size = Tuple[int, int]
+
+# 精靈圖集類
+class SpriteAtlas:
+    """共享的圖片快取：每張圖片只解碼、縮放、轉換一次，所有精靈共用同一個 Surface"""
+    def __init__(self):
+        self.surfaces: Dict[Tuple[str, Size], pygame.Surface] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, img_path: str, size: Optional[Size] = None) -> pygame.Surface:
+        """取得指定尺寸的圖片，未快取時才從磁碟載入"""
+        if size is None:
+            size = (GameConfig.GRIDSIZE, GameConfig.GRIDSIZE)
+        key = (img_path, tuple(size))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = pygame.image.load(img_path)
+        surface = pygame.transform.smoothscale(surface, key[1])
+        # 轉換成顯示格式以加快 blit，尚未建立視窗時保留原格式
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        self.surfaces[key] = surface
+        return surface
+
+    def preload(self, img_paths: List[str], size: Optional[Size] = None) -> None:
+        """預先載入一組圖片，避免在連鎖消除途中解碼"""
+        if size is None:
+            size = (GameConfig.GRIDSIZE, GameConfig.GRIDSIZE)
+        for img_path in img_paths:
+            if (img_path, tuple(size)) not in self.surfaces:
+                self.get(img_path, size)
+
+    def clear(self) -> None:
+        """清空快取（例如網格大小改變時）"""
+        self.surfaces.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """回傳命中、未命中與快取數量"""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.surfaces)}
+
+
+# 全域共用的圖集
+sprite_atlas = SpriteAtlas()
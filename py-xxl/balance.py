@@ -0,0 +1,146 @@
+"""
+關卡平衡測試：以機器人大量模擬整個遊戲流程（第 1 關依序玩到最後一關），統計每一關的分數分佈並建議目標分數
+
+與實際遊戲相同，分數與棋盤會帶到下一關，因此目標分數是累計分數。
+
+用法：python balance.py --policy greedy --levels 1 2 3 --games 2000 --output balance.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple, List, Dict, Union, Optional
+
+from bots import BOTS, play_session, SECONDS_PER_MOVE
+from score import ScoreManager
+
+# 定義常用的類型
+GameResult = Dict[str, Union[int, bool, str, None]]
+
+
+def session_seed(seed: int, index: int) -> int:
+    """每一輪的種子只由批次種子與編號決定，結果與平行方式無關"""
+    return (seed * 1000003 + index) & 0x7FFFFFFF
+
+
+def _play_chunk(policy: str, levels: int, seeds: List[int], seconds_per_move: float,
+                bot_options: Dict) -> List[GameResult]:
+    """在子行程中連續玩一批遊戲，回傳每一輪每一關的結果"""
+    results = []
+    for seed in seeds:
+        results.extend(play_session(policy, levels, seed, seconds_per_move, **bot_options))
+    return results
+
+
+def run_batch(policy: str, levels: List[int], games: int, seed: int = 0, workers: Optional[int] = None,
+              seconds_per_move: float = SECONDS_PER_MOVE, chunk_size: int = 50,
+              bot_options: Optional[Dict] = None) -> List[GameResult]:
+    """把 games 輪完整遊戲（第 1 關玩到 levels 中最後一關）分批交給行程池，使用所有 CPU 核心
+
+    回傳 levels 中各關的結果；沒有通過前一關的輪次不會有之後關卡的結果。
+    """
+    bot_options = bot_options or {}
+    last_level = max(levels)
+    seeds = [session_seed(seed, i) for i in range(games)]
+    results: List[GameResult] = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(_play_chunk, policy, last_level, seeds[start:start + chunk_size],
+                               seconds_per_move, bot_options)
+                   for start in range(0, games, chunk_size)]
+        for future in futures:
+            results.extend(row for row in future.result() if row['level'] in levels)
+    return results
+
+
+def percentile(values: List[int], fraction: float) -> float:
+    """線性內插的百分位數"""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(results: List[GameResult], games: int, pass_rate: float = 0.5) -> Dict[int, Dict[str, float]]:
+    """每個關卡的（累計）分數分佈、抵達率、目前目標的通過率，以及達到 pass_rate 通過率的建議目標分數
+
+    通過率與建議目標只計算抵達該關的輪次；建議目標以走完整個步數預算的 budget_score 計算，
+    與實際遊戲一樣是累計分數，並且取決於前面關卡的目標。
+    """
+    summary = {}
+    for level in sorted({r['level'] for r in results}):
+        rows = [r for r in results if r['level'] == level]
+        scores = [r['budget_score'] for r in rows]
+        reached = [r['moves_to_target'] for r in rows if r['moves_to_target'] is not None]
+        summary[level] = {
+            'games': len(rows),
+            'reach_rate': len(rows) / games,
+            'moves': rows[0]['budget'],
+            'target': rows[0]['target'],
+            'start_mean': statistics.fmean(r['start_score'] for r in rows),
+            'pass_rate': sum(r['passed'] for r in rows) / len(rows),
+            'mean': statistics.fmean(scores),
+            'stdev': statistics.pstdev(scores),
+            'min': min(scores),
+            'p10': percentile(scores, 0.1),
+            'p50': percentile(scores, 0.5),
+            'p90': percentile(scores, 0.9),
+            'max': max(scores),
+            'median_moves_to_target': statistics.median(reached) if reached else None,
+            # 分數高於這個值的局數比例為 pass_rate（以 10 分為單位）
+            'suggested_target': int(percentile(scores, 1.0 - pass_rate) // 10 * 10),
+        }
+    return summary
+
+
+def print_summary(summary: Dict[int, Dict[str, float]]) -> None:
+    """以表格輸出統計結果（分數為累計分數，start 為進入該關時的平均分數）"""
+    print(f"{'level':>5} {'games':>6} {'reach':>6} {'moves':>5} {'start':>6} {'target':>6} {'pass':>6} "
+          f"{'mean':>8} {'p10':>7} {'p50':>7} {'p90':>7} {'suggest':>7}")
+    for level, row in summary.items():
+        print(f"{level:>5} {row['games']:>6} {row['reach_rate']:>6.1%} {row['moves']:>5} {row['start_mean']:>6.1f} "
+              f"{row['target']:>6} {row['pass_rate']:>6.1%} {row['mean']:>8.1f} {row['p10']:>7.0f} "
+              f"{row['p50']:>7.0f} {row['p90']:>7.0f} {row['suggested_target']:>7}")
+
+
+def main() -> None:
+    """命令列入口"""
+    parser = argparse.ArgumentParser(description='Level balancing with headless bots')
+    parser.add_argument('--policy', choices=sorted(BOTS), default='greedy')
+    parser.add_argument('--levels', type=int, nargs='+', default=sorted(ScoreManager().target_scores))
+    parser.add_argument('--games', type=int, default=1000, help='full sessions (level 1 to the last level)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='defaults to all CPU cores')
+    parser.add_argument('--seconds-per-move', type=float, default=SECONDS_PER_MOVE)
+    parser.add_argument('--pass-rate', type=float, default=0.5, help='pass rate used for suggested targets')
+    parser.add_argument('--chunk-size', type=int, default=50)
+    parser.add_argument('--rollouts', type=int, default=None, help='montecarlo: rollouts per candidate')
+    parser.add_argument('--depth', type=int, default=None, help='montecarlo: random moves per rollout')
+    parser.add_argument('--output', help='write raw results and summary as JSON')
+    args = parser.parse_args()
+
+    bot_options = {name: getattr(args, name) for name in ('rollouts', 'depth') if getattr(args, name) is not None}
+    if bot_options and args.policy != 'montecarlo':
+        parser.error('--rollouts/--depth only apply to the montecarlo policy')
+
+    start = time.perf_counter()
+    results = run_batch(args.policy, args.levels, args.games, args.seed, args.workers,
+                        args.seconds_per_move, args.chunk_size, bot_options)
+    elapsed = time.perf_counter() - start
+    summary = summarize(results, args.games, args.pass_rate)
+    print_summary(summary)
+    print(f"{args.games} sessions in {elapsed:.1f}s ({args.games / elapsed:.1f} sessions/s, "
+          f"{args.workers or os.cpu_count()} workers)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'policy': args.policy, 'seed': args.seed, 'seconds_per_move': args.seconds_per_move,
+                       'summary': summary, 'games': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
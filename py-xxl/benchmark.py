@@ -0,0 +1,580 @@
+import os
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import contextlib
+import timeit
+from typing import Tuple, List, Dict, Union, Optional, Callable
+
+# 基準測試一律在無畫面、無音效的環境下執行
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+from setting import GameConfig
+from board import Board, EMPTY
+from matcher import find_matches, select_match, IncrementalMatcher
+from blast import ChainReaction, BLAST_SHAPES
+from assets import load_font
+
+# 定義常用的類型
+Result = Dict[str, Union[str, int, float]]
+
+
+# 舊版寶石（只保留比對用的 type 字串）
+class _LegacyGem:
+    __slots__ = ('type',)
+
+    def __init__(self, gem_type: str):
+        self.type = gem_type
+
+
+# 舊版消除檢查類
+class LegacyMatcher:
+    """原本 Game.check_matches 的逐格掃描實作，只作為基準測試的比較對象"""
+    def __init__(self, types: np.ndarray):
+        self.size = types.shape[0]
+        self.all_gems = [
+            [_LegacyGem('bomb' if t == EMPTY else f'gem{t}') for t in column]
+            for column in types.tolist()
+        ]
+
+    def get_gem_by_pos(self, x: int, y: int) -> _LegacyGem:
+        """根據坐標獲取寶石對象"""
+        return self.all_gems[x][y]
+
+    def is_valid_pos(self, x: int, y: int) -> bool:
+        """檢查位置是否在網格範圍內"""
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    def check_matches(self) -> List[Union[int, List[int]]]:
+        """檢查是否有可消除的寶石"""
+        # 先檢查特殊形狀
+        for x in range(self.size):
+            for y in range(self.size):
+                # 跳過無效的檢查位置
+                if not self.is_valid_pos(x, y):
+                    continue
+                    
+                current_type = self.get_gem_by_pos(x, y).type
+
+                # 檢查T_UP (sss
+                #           s
+                #           s)
+                if (self.is_valid_pos(x + 2, y) and self.is_valid_pos(x + 1, y + 2)):
+                    try:
+                        if (all(self.get_gem_by_pos(x + i, y).type == current_type for i in range(3)) and
+                            self.get_gem_by_pos(x + 1, y + 1).type == current_type and
+                            self.get_gem_by_pos(x + 1, y + 2).type == current_type):
+                            return [3, x, y, 'T_UP']
+                    except IndexError:
+                        continue
+
+                # 檢查T_DOWN ( s
+                #             s
+                #           sss)
+                if (self.is_valid_pos(x + 2, y + 2) and self.is_valid_pos(x + 1, y)):
+                    try:
+                        if (self.get_gem_by_pos(x + 1, y).type == current_type and
+                            self.get_gem_by_pos(x + 1, y + 1).type == current_type and
+                            all(self.get_gem_by_pos(x + i, y + 2).type == current_type for i in range(3))):
+                            return [3, x, y, 'T_DOWN']
+                    except IndexError:
+                        continue
+
+                # 檢查T_LEFT (s
+                #           sss
+                #           s)
+                if (self.is_valid_pos(x, y + 2) and self.is_valid_pos(x + 2, y + 1)):
+                    try:
+                        if (self.get_gem_by_pos(x, y).type == current_type and
+                            all(self.get_gem_by_pos(x + i, y + 1).type == current_type for i in range(3)) and
+                            self.get_gem_by_pos(x, y + 2).type == current_type):
+                            return [3, x, y, 'T_LEFT']
+                    except IndexError:
+                        continue
+
+                # 檢查T_RIGHT (  s
+                #             sss
+                #               s)
+                if (self.is_valid_pos(x + 2, y + 2) and self.is_valid_pos(x + 2, y)):
+                    try:
+                        if (self.get_gem_by_pos(x + 2, y).type == current_type and
+                            all(self.get_gem_by_pos(x + i, y + 1).type == current_type for i in range(3)) and
+                            self.get_gem_by_pos(x + 2, y + 2).type == current_type):
+                            return [3, x, y, 'T_RIGHT']
+                    except IndexError:
+                        continue
+
+                # 檢查L_UP (s
+                #          s
+                #         sss)
+                if (self.is_valid_pos(x, y + 2) and self.is_valid_pos(x + 2, y + 2)):
+                    try:
+                        if (self.get_gem_by_pos(x, y).type == current_type and
+                            self.get_gem_by_pos(x, y + 1).type == current_type and
+                            all(self.get_gem_by_pos(x + i, y + 2).type == current_type for i in range(3))):
+                            return [4, x, y, 'L_UP']
+                    except IndexError:
+                        continue
+
+                # 檢查L_DOWN (sss
+                #             s
+                #             s)
+                if (self.is_valid_pos(x + 2, y) and self.is_valid_pos(x, y + 2)):
+                    try:
+                        if (all(self.get_gem_by_pos(x + i, y).type == current_type for i in range(3)) and
+                            self.get_gem_by_pos(x, y + 1).type == current_type and
+                            self.get_gem_by_pos(x, y + 2).type == current_type):
+                            return [4, x, y, 'L_DOWN']
+                        
+                    except IndexError:
+                        continue
+
+                # 檢查L_LEFT (  s
+                #              s
+                #            sss)
+                if (self.is_valid_pos(x + 2, y) and self.is_valid_pos(x, y+2)):
+                    try:
+                        tmp_current_type=self.get_gem_by_pos(x+2 , y).type
+                        if (self.get_gem_by_pos(x+2 , y).type == tmp_current_type and
+                            self.get_gem_by_pos(x+2 , y +1).type == tmp_current_type and
+                            all(self.get_gem_by_pos(x + i, y+2).type == tmp_current_type for i in range(3))):
+                            return [4, x, y, 'L_LEFT']
+                        
+                    except IndexError:
+                        continue
+
+                # 檢查L_RIGHT (sss
+                #               s
+                #               s)
+                if (self.is_valid_pos(x + 2, y + 2) and self.is_valid_pos(x + 2, y)):
+                    try:
+                        if (all(self.get_gem_by_pos(x + i, y).type == current_type for i in range(3)) and
+                            self.get_gem_by_pos(x + 2, y + 1).type == current_type and
+                            self.get_gem_by_pos(x + 2, y + 2).type == current_type):
+                            return [4, x, y, 'L_RIGHT']
+                    except IndexError:
+                        continue
+
+        # 檢查一般的直線消除
+        max_match = [0, 0, 0, 0]  # [方向, 起點x, 起點y, 最大匹配長度]
+        for x in range(self.size):
+            for y in range(self.size):
+                if not self.is_valid_pos(x, y):
+                    continue
+
+                # 檢查橫向
+                match_length = 1
+                for i in range(1, 5):
+                    if not self.is_valid_pos(x + i, y):
+                        break
+                    try:
+                        if self.get_gem_by_pos(x, y).type == self.get_gem_by_pos(x + i, y).type:
+                            match_length += 1
+                        else:
+                            break
+                    except IndexError:
+                        break
+                if match_length >= 3 and match_length > max_match[3]:
+                    max_match = [1, x, y, match_length]
+
+                # 檢查縱向
+                match_length = 1
+                for i in range(1, 5):
+                    if not self.is_valid_pos(x, y + i):
+                        break
+                    try:
+                        if self.get_gem_by_pos(x, y).type == self.get_gem_by_pos(x, y + i).type:
+                            match_length += 1
+                        else:
+                            break
+                    except IndexError:
+                        break
+                if match_length >= 3 and match_length > max_match[3]:
+                    max_match = [2, x, y, match_length]
+
+        return max_match
+
+
+def time_call(func: Callable[[], object], repeat: int = 5) -> float:
+    """回傳單次呼叫的最佳平均時間（秒）"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def time_with_setup(setup: Callable[[], object], func: Callable[[object], object], runs: int) -> Dict[str, float]:
+    """每次計時前先執行不計時的 setup，回傳各次呼叫時間的統計（毫秒）"""
+    samples = []
+    for _ in range(runs):
+        state = setup()
+        start = time.perf_counter()
+        func(state)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        'runs': runs,
+        'mean_ms': statistics.fmean(samples),
+        'median_ms': statistics.median(samples),
+        'min_ms': min(samples),
+        'max_ms': max(samples),
+    }
+
+
+def make_board(size: int, kind: str, seed: int, num_types: int = 7) -> Board:
+    """產生固定亂數種子的棋盤：random 可能含有消除，settled 保證沒有"""
+    rng = random.Random(seed)
+    return Board.random(size, num_types, rng, allow_matches=(kind == 'random'))
+
+
+def bench_check_matches(sizes: List[int], seed: int = 0, repeat: int = 5) -> List[Result]:
+    """比較舊版逐格掃描與向量化消除引擎"""
+    results = []
+    for size in sizes:
+        for kind in ('random', 'settled'):
+            board = make_board(size, kind, seed)
+            legacy = LegacyMatcher(board.types)
+            legacy_time = time_call(legacy.check_matches, repeat)
+            vector_time = time_call(lambda: find_matches(board.types), repeat)
+            results.append({
+                'benchmark': 'match_engine',
+                'size': size,
+                'board': kind,
+                'matches': len(find_matches(board.types)),
+                'legacy_ms': legacy_time * 1000,
+                'vectorized_ms': vector_time * 1000,
+                'speedup': legacy_time / vector_time,
+            })
+    return results
+
+
+def bench_incremental(sizes: List[int], seed: int = 0, repeat: int = 5) -> List[Result]:
+    """比較一次交換後的增量檢查與完整掃描"""
+    results = []
+    for size in sizes:
+        board = make_board(size, 'settled', seed)
+        matcher = IncrementalMatcher()
+        matcher.find_matches(board)
+        pos1, pos2 = (size // 2, size // 2), (size // 2 + 1, size // 2)
+
+        def swap_and_scan():
+            board.swap(pos1, pos2)
+            return matcher.find_matches(board)
+
+        full_time = time_call(lambda: find_matches(board.types), repeat)
+        incremental_time = time_call(swap_and_scan, repeat)
+        results.append({
+            'benchmark': 'incremental_matches',
+            'size': size,
+            'full_ms': full_time * 1000,
+            'incremental_ms': incremental_time * 1000,
+            'speedup': full_time / incremental_time,
+        })
+    return results
+
+
+def bench_chain_reaction(sizes: List[int], seed: int = 0, repeat: int = 5,
+                         shapes: Tuple[str, ...] = ('square', 'diamond', 'cross')) -> List[Result]:
+    """棋盤一半是炸彈（棋盤格狀排列）時，從中間引爆的連鎖爆炸"""
+    results = []
+    for size in sizes:
+        board = make_board(size, 'settled', seed)
+        for x in range(size):
+            for y in range(size):
+                if (x + y) % 2 == 0:
+                    board.place_bomb(x, y)
+        center = size // 2 - (size // 2) % 2
+        for shape in shapes:
+            chain = ChainReaction(shape)
+            blast = chain.resolve(board, center, center)
+            results.append({
+                'benchmark': 'chain_reaction',
+                'size': size,
+                'board': shape,
+                'bombs': len(blast.bombs),
+                'resolve_ms': time_call(lambda: chain.resolve(board, center, center), repeat) * 1000,
+            })
+    return results
+
+
+# 遊戲熱點基準測試
+class GameBench:
+    """在 dummy 顯示驅動下建立真正的 Game，測量規則與繪圖的熱點"""
+    def __init__(self, screen: pygame.Surface, font: pygame.font.Font, size: int, seed: int, runs: int,
+                 mega: bool = False):
+        self.size = size
+        self.seed = seed
+        self.runs = runs
+        self.mega = mega
+        if mega:
+            GameConfig.set_mega_board(size)
+        else:
+            GameConfig.set_grid(size)
+        from game import Game
+        from puzzle import Puzzle
+        self.Puzzle = Puzzle
+        gem_imgs = [os.path.join(GameConfig.ROOTDIR, f'resources/images/gem{i}.png') for i in range(1, 8)]
+        self.game = Game(screen, font, gem_imgs)
+        self.game.show_tutorial = False
+        self.game.level = 1
+        self.game.target_score = self.game.score_manager.get_level_target(1)
+        self.rng = random.Random(seed)
+
+    def new_board(self) -> 'Game':
+        """以固定種子重建棋盤並結算到穩定狀態"""
+        game = self.game
+        game.rng = random.Random(self.seed)
+        game.reset()
+        self.settle()
+        return game
+
+    def settle(self) -> None:
+        """同步跑完所有下落與連鎖（不繪圖）"""
+        game = self.game
+        with contextlib.redirect_stdout(io.StringIO()):
+            while True:
+                while not game.drop_gems():
+                    pass
+                game.run_settle_actions()
+                if not game.remove_matches(game.find_all_matches()):
+                    break
+
+    def legal_swap(self) -> Tuple[List[int], List[int]]:
+        """以合法交換產生器找出一個會形成消除的交換"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.game.update_moves()
+        pos1, pos2 = self.game.move_generator.hint()
+        return list(pos1), list(pos2)
+
+    def sprite_mismatches(self) -> List[str]:
+        """比對可見格子的精靈與棋盤：位置必須在格子上、種類與炸彈必須一致，回傳不一致的描述"""
+        game = self.game
+        errors = []
+        x0, x1, y0, y1 = game.sprite_range
+        for x in range(x0, x1):
+            for y in range(y0, y1):
+                gem = game.all_gems[x][y]
+                if gem is None:
+                    errors.append(f"({x}, {y}): no sprite")
+                elif list(gem.rect.topleft) != game.viewport.cell_pos(x, y):
+                    errors.append(f"({x}, {y}): sprite at {gem.rect.topleft}, cell at {tuple(game.viewport.cell_pos(x, y))}")
+                elif gem.is_special != game.board.is_bomb(x, y) or (not gem.is_special and gem.type != game.board.types[x, y]):
+                    errors.append(f"({x}, {y}): sprite type {gem.type} does not match the board")
+        return errors
+
+    def check_bomb_swaps(self) -> List[str]:
+        """對每種爆炸形狀，把炸彈與上下左右的寶石交換並結算，確認精靈都在正確的格子上"""
+        game = self.game
+        center = self.size // 2
+        errors = []
+        for shape in BLAST_SHAPES:
+            game.chain_reaction = ChainReaction(shape)
+            for dx, dy in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+                self.new_board()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    game.create_bomb(center, center)
+                    game.update_moves()
+                    game.swap_gems([center, center], [center + dx, center + dy])
+                self.settle()
+                errors += [f"{shape} swap ({dx}, {dy}) {error}" for error in self.sprite_mismatches()]
+        game.chain_reaction = ChainReaction(GameConfig.BLAST_SHAPE)
+        return errors
+
+    def run(self) -> List[Result]:
+        """執行所有遊戲熱點測試"""
+        game = self.game
+        center = self.size // 2
+        runs = self.runs
+        results = []
+
+        def record(name: str, stats: Dict[str, float]) -> None:
+            row = {'benchmark': name, 'size': self.size, 'seed': self.seed}
+            if self.mega:
+                row['board'] = 'mega'
+            results.append(dict(row, **stats))
+
+        self.new_board()
+        record('check_matches', time_with_setup(
+            lambda: game.matcher.reset(), lambda _: game.check_matches(), runs))
+        record('legal_moves', time_with_setup(
+            lambda: None, lambda _: game.move_generator.update(game.board), runs))
+        # 點擊右下角的格子（逐一檢查 rect 時最慢的情況）
+        corner = (game.viewport.area.right - 1, game.viewport.area.bottom - 1)
+        record('check_selected', time_with_setup(
+            lambda: None, lambda _: game.check_selected(corner), runs * 10))
+
+        def refill_setup():
+            self.new_board()
+            positions = [(x, center) for x in range(center - 1, center + 2)]
+            game._remove_positions(positions)
+            return positions
+        record('generate_new_gems', time_with_setup(refill_setup, game._generate_new_gems, runs))
+
+        def bomb_setup():
+            self.new_board()
+            game.create_bomb(center, center)
+            game.create_bomb(center + 1, center + 1)  # 連鎖爆炸
+            return center, center
+        with contextlib.redirect_stdout(io.StringIO()):
+            record('process_bomb_explosion', time_with_setup(
+                bomb_setup, lambda pos: game.process_bomb_explosion(*pos), runs))
+
+        def swap_setup():
+            self.new_board()
+            return self.legal_swap()
+
+        def swap_and_settle(swap):
+            game.swap_gems(*swap)
+            self.settle()
+        record('swap_gems_settle', time_with_setup(swap_setup, swap_and_settle, runs))
+
+        img_path = game.gem_imgs[0]
+        size = (GameConfig.GRIDSIZE, GameConfig.GRIDSIZE)
+        record('puzzle_construction', time_with_setup(
+            lambda: None, lambda _: self.Puzzle(img_path, size, (0, 0), 0), runs * 10))
+        record('pool_gem_cycle', time_with_setup(
+            lambda: None, lambda _: game.pool.release(game.pool.gem(img_path, size, (0, 0), 0)), runs * 10))
+
+        self.new_board()
+
+        def full_frame(_):
+            game.renderer.invalidate()
+            game.track_dirty_regions(None)
+            game.renderer.render(lambda areas: game.draw_scene(None, areas))
+        record('frame_render_full', time_with_setup(lambda: None, full_frame, runs))
+
+        def idle_frame(_):
+            game.track_dirty_regions(None)
+            game.renderer.render(lambda areas: game.draw_scene(None, areas))
+        record('frame_render_idle', time_with_setup(lambda: None, idle_frame, runs))
+
+        if self.mega:
+            # 捲動一格：平移精靈、補上新露出的格子並重畫整個畫面
+            step = [GameConfig.GRIDSIZE]
+
+            def scroll_frame(_):
+                dx, dy = game.viewport.scroll(step[0], 0)
+                if not dx:
+                    step[0] = -step[0]
+                game._after_scroll(dx, dy)
+                game.track_dirty_regions(None)
+                game.renderer.render(lambda areas: game.draw_scene(None, areas))
+            record('frame_render_scroll', time_with_setup(lambda: None, scroll_frame, runs))
+        return results
+
+
+def bench_game(sizes: List[int], seed: int, runs: int, mega: bool = False) -> List[Result]:
+    """對每個網格大小執行遊戲熱點測試（mega 時以大棋盤模式執行）"""
+    pygame.init()
+    screen = pygame.display.set_mode((GameConfig.WIDTH, GameConfig.HEIGHT))
+    font = load_font(35)
+    results = []
+    for size in sizes:
+        results.extend(GameBench(screen, font, size, seed, runs, mega).run())
+    GameConfig.set_grid(10)
+    return results
+
+
+def check_game(sizes: List[int], seed: int) -> List[str]:
+    """對每個網格大小執行遊戲正確性檢查，回傳發現的錯誤"""
+    pygame.init()
+    screen = pygame.display.set_mode((GameConfig.WIDTH, GameConfig.HEIGHT))
+    font = load_font(35)
+    errors = []
+    for size in sizes:
+        errors += [f"size {size}: {error}" for error in GameBench(screen, font, size, seed, 0).check_bomb_swaps()]
+    GameConfig.set_grid(10)
+    return errors
+
+
+def result_key(row: Result) -> str:
+    """用於比較兩次執行結果的識別字串"""
+    return f"{row['benchmark']}/{row['size']}/{row.get('board', '')}"
+
+
+def primary_ms(row: Result) -> float:
+    """每筆結果中代表性的時間（毫秒）"""
+    for key in ('median_ms', 'vectorized_ms', 'incremental_ms', 'resolve_ms'):
+        if key in row:
+            return row[key]
+    return 0.0
+
+
+def compare(previous: Dict, current: Dict, threshold: float) -> List[str]:
+    """比較兩份 JSON 結果，回傳變慢超過門檻的項目"""
+    old = {result_key(row): row for row in previous['results']}
+    regressions = []
+    for row in current['results']:
+        key = result_key(row)
+        if key not in old or primary_ms(old[key]) == 0:
+            continue
+        ratio = primary_ms(row) / primary_ms(old[key])
+        flag = ' REGRESSION' if ratio > 1 + threshold else ''
+        print(f"{key:<40} {primary_ms(old[key]):>10.3f} -> {primary_ms(row):>10.3f} ms  x{ratio:.2f}{flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main() -> None:
+    """命令列入口：python benchmark.py --sizes 10 20 --output results.json"""
+    parser = argparse.ArgumentParser(description='Rules and rendering benchmark suite')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 20, 40])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--runs', type=int, default=30, help='samples per game hot-path benchmark')
+    parser.add_argument('--mega-sizes', type=int, nargs='*', default=[],
+                        help='also run the game benchmarks in large-board mode at these sizes (e.g. 50 100 200)')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='previous JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='slowdown ratio reported as regression')
+    parser.add_argument('--check', action='store_true',
+                        help='only run the correctness checks (bomb swaps with every blast shape) and exit')
+    args = parser.parse_args()
+
+    if args.check:
+        errors = check_game(args.sizes, args.seed)
+        for error in errors:
+            print(error)
+        print(f"check: {len(errors)} error(s)")
+        sys.exit(1 if errors else 0)
+
+    results = bench_check_matches(args.sizes, args.seed, args.repeat)
+    results += bench_incremental(args.sizes, args.seed, args.repeat)
+    results += bench_chain_reaction(args.sizes, args.seed, args.repeat)
+    results += bench_game(args.sizes, args.seed, args.runs)
+    if args.mega_sizes:
+        results += bench_game(args.mega_sizes, args.seed, args.runs, mega=True)
+
+    for row in results:
+        print(f"{result_key(row):<40} {primary_ms(row):>10.3f} ms")
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'sizes': args.sizes,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        print()
+        if compare(previous, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
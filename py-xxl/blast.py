@@ -0,0 +1,224 @@
+import numpy as np
+from collections import deque
+from typing import Tuple, List, Dict, Union, Optional, NamedTuple, Callable, Deque
+from board import Board, SPECIAL_BOMB
+
+# 定義常用的類型
+Position = Tuple[int, int]
+Columns = Dict[int, List[int]]
+Rect = Tuple[int, int, int, int]
+Stamp = Tuple[int, int, int, int, Optional[np.ndarray]]
+
+
+# 爆炸範圍類
+class BlastShape:
+    """以炸彈為中心的爆炸範圍，kernel() 回傳 (2r+1)x(2r+1) 的布林遮罩，rects() 回傳拆成的矩形
+
+    radius 為 None 時延伸到整個棋盤（整行、整列的爆炸）。
+    """
+    MAX_RECTS = 3  # 逐一引爆時最多拆成幾個矩形，超過就改用整個遮罩
+
+    def __init__(self, name: str, radius: Optional[int], inside: Callable[[np.ndarray, np.ndarray, int], np.ndarray]):
+        self.name = name
+        self.radius = radius
+        self.inside = inside  # inside(dx, dy, r)：相對位置是否在範圍內
+        self._kernels: Dict[int, np.ndarray] = {}
+        self._rects: Dict[int, List[Rect]] = {}
+
+    def kernel(self, board_size: int) -> np.ndarray:
+        """依棋盤大小建立（並快取）遮罩"""
+        r = self.radius if self.radius is not None else board_size - 1
+        if r not in self._kernels:
+            dx, dy = np.ogrid[-r:r + 1, -r:r + 1]
+            self._kernels[r] = np.ascontiguousarray(np.broadcast_to(self.inside(dx, dy, r), (2 * r + 1, 2 * r + 1)))
+        return self._kernels[r]
+
+    def rects(self, board_size: int) -> List[Rect]:
+        """把遮罩拆成（可重疊的）矩形 (dx0, dx1, dy0, dy1)（相對炸彈、不含結尾）
+
+        每一行的每個連續區段向上下延伸到不再包含它為止，再去掉被其他矩形包含的矩形：
+        正方形 1 個、十字 2 個、菱形 radius + 1 個。逐一引爆或整批膨脹時只需要對這幾個矩形運算。
+        """
+        r = self.radius if self.radius is not None else board_size - 1
+        if r not in self._rects:
+            kernel = self.kernel(board_size)
+            # 每一行中連續為 True 的區段
+            runs: List[List[Tuple[int, int]]] = []
+            for line in kernel:
+                edges = np.flatnonzero(np.diff(np.concatenate(([0], line.astype(np.int8), [0]))))
+                runs.append(list(zip(edges[::2].tolist(), edges[1::2].tolist())))
+
+            def covers(dx: int, run: Tuple[int, int]) -> bool:
+                return any(lo <= run[0] and run[1] <= hi for lo, hi in runs[dx])
+
+            candidates = set()
+            for dx, line_runs in enumerate(runs):
+                for run in line_runs:
+                    top, bottom = dx, dx + 1
+                    while top > 0 and covers(top - 1, run):
+                        top -= 1
+                    while bottom < len(runs) and covers(bottom, run):
+                        bottom += 1
+                    candidates.add((top - r, bottom - r, run[0] - r, run[1] - r))
+            self._rects[r] = sorted(
+                rect for rect in candidates
+                if not any(other != rect and other[0] <= rect[0] and rect[1] <= other[1] and
+                           other[2] <= rect[2] and rect[3] <= other[3] for other in candidates))
+        return self._rects[r]
+
+    def stamps(self, board_size: int) -> List[Stamp]:
+        """逐一引爆時蓋到棋盤上的區塊：(dx0, dx1, dy0, dy1, 遮罩或 None)
+
+        矩形不多時直接用矩形（None 表示整塊都炸到）；菱形這類需要很多矩形的形狀
+        改成一次蓋上整個遮罩，每個炸彈的切片運算次數固定。
+        """
+        rects = self.rects(board_size)
+        if len(rects) <= self.MAX_RECTS:
+            return [rect + (None,) for rect in rects]
+        kernel = self.kernel(board_size)
+        r = kernel.shape[0] // 2
+        return [(-r, r + 1, -r, r + 1, kernel)]
+
+
+def square(radius: int = 1) -> BlastShape:
+    """正方形（預設 3x3）"""
+    return BlastShape(f'square{radius}', radius, lambda dx, dy, r: (abs(dx) <= r) & (abs(dy) <= r))
+
+
+def diamond(radius: int = 2) -> BlastShape:
+    """菱形（曼哈頓距離）"""
+    return BlastShape(f'diamond{radius}', radius, lambda dx, dy, r: abs(dx) + abs(dy) <= r)
+
+
+def cross(radius: Optional[int] = None) -> BlastShape:
+    """十字：同一行與同一列"""
+    return BlastShape('cross', radius, lambda dx, dy, r: (dx == 0) | (dy == 0))
+
+
+def row() -> BlastShape:
+    """整列（水平方向）"""
+    return BlastShape('row', None, lambda dx, dy, r: dy == 0)
+
+
+def column() -> BlastShape:
+    """整行（垂直方向）"""
+    return BlastShape('column', None, lambda dx, dy, r: dx == 0)
+
+
+# 可用的爆炸範圍（名稱寫進設定與重播檔）
+BLAST_SHAPES: Dict[str, BlastShape] = {
+    'square': square(1),
+    'big_square': square(2),
+    'diamond': diamond(2),
+    'cross': cross(),
+    'row': row(),
+    'column': column(),
+}
+
+
+# 爆炸結果
+class Blast(NamedTuple):
+    """一次引爆（包含連鎖）的結果"""
+    mask: np.ndarray        # 被炸到的格子
+    bombs: List[Position]   # 依引爆順序排列的炸彈
+    columns: Columns        # 每一行被炸到的 y（行與 y 皆由小到大），可直接交給 Board.collapse_columns
+
+    @property
+    def positions(self) -> List[Position]:
+        """被炸到的格子，依行、再依由上到下排列"""
+        return [(x, y) for x, ys in self.columns.items() for y in ys]
+
+
+def _dilate_axis(counts: np.ndarray, origin: int, start: int, stop: int, lo: int, hi: int, axis: int) -> np.ndarray:
+    """一維膨脹：輸出 [start, stop) 的每一格 X 是否有位於 [X - hi + 1, X - lo] 的非零值（counts 從 origin 開始）"""
+    prefix = np.concatenate((np.zeros_like(np.take(counts, [0], axis)), np.cumsum(counts, axis=axis)), axis=axis)
+    n = counts.shape[axis]
+    cells = np.arange(start, stop) - origin
+    upper = np.take(prefix, np.clip(cells - lo + 1, 0, n), axis)
+    lower = np.take(prefix, np.clip(cells - hi + 1, 0, n), axis)
+    return upper > lower
+
+
+def dilate(xs: np.ndarray, ys: np.ndarray, rect: Rect, size: int) -> Optional[Tuple[int, int, np.ndarray]]:
+    """整批炸彈的矩形爆炸範圍，回傳 (x0, y0, 區塊)；矩形可分離，因此先沿 x 再沿 y 做一維膨脹
+
+    只處理炸彈外框加上爆炸範圍的區域，以前綴和計算，成本與炸彈數量無關。
+    """
+    dx0, dx1, dy0, dy1 = rect
+    bx0, bx1, by0, by1 = int(xs.min()), int(xs.max()) + 1, int(ys.min()), int(ys.max()) + 1
+    x0, x1 = max(bx0 + dx0, 0), min(bx1 + dx1 - 1, size)
+    y0, y1 = max(by0 + dy0, 0), min(by1 + dy1 - 1, size)
+    if x0 >= x1 or y0 >= y1:
+        return None
+    frontier = np.zeros((bx1 - bx0, by1 - by0), dtype=np.int32)
+    frontier[xs - bx0, ys - by0] = 1
+    along_x = _dilate_axis(frontier, bx0, x0, x1, dx0, dx1, 0)
+    return x0, y0, _dilate_axis(along_x.astype(np.int32), by0, y0, y1, dy0, dy1, 1)
+
+
+# 連鎖爆炸類
+class ChainReaction:
+    """以廣度優先搜尋逐層處理連鎖：同一層的炸彈一起引爆，範圍內尚未引爆的炸彈成為下一層
+
+    炸彈少時逐一把爆炸範圍（幾個矩形或整個遮罩）蓋到布林遮罩上；一層的炸彈多到
+    VECTORIZE_AT 以上時改用向量化的膨脹（dilate）一次處理整層，成本與炸彈數量無關。
+    """
+    VECTORIZE_AT = 32
+
+    def __init__(self, shape: Union[str, BlastShape] = 'square'):
+        self.shape = BLAST_SHAPES[shape] if isinstance(shape, str) else shape
+
+    def resolve(self, board: Board, bomb_x: int, bomb_y: int) -> Blast:
+        """計算從 (bomb_x, bomb_y) 開始的爆炸範圍，不修改棋盤"""
+        size = board.size
+        rects = self.shape.rects(size)
+        stamps = self.shape.stamps(size)
+        affected = np.zeros((size, size), dtype=bool)
+        pending = board.special == SPECIAL_BOMB  # 尚未引爆的炸彈
+        pending[bomb_x, bomb_y] = False
+        queue: Deque[Position] = deque([(bomb_x, bomb_y)])
+        bombs: List[Position] = []
+
+        while queue:
+            if len(queue) >= self.VECTORIZE_AT:
+                # 整層一起引爆
+                wave = list(queue)
+                queue.clear()
+                bombs.extend(wave)
+                xs, ys = (np.array(axis) for axis in zip(*wave))
+                for rect in rects:
+                    block = dilate(xs, ys, rect, size)
+                    if block is not None:
+                        x0, y0, area = block
+                        affected[x0:x0 + area.shape[0], y0:y0 + area.shape[1]] |= area
+                chained = pending & affected
+                pending &= ~chained
+                cx, cy = np.nonzero(chained)
+                queue.extend(zip(cx.tolist(), cy.tolist()))
+                continue
+
+            x, y = queue.popleft()
+            bombs.append((x, y))
+            for dx0, dx1, dy0, dy1, mask in stamps:
+                # 把區塊裁切到棋盤內
+                x0, x1 = max(x + dx0, 0), min(x + dx1, size)
+                y0, y1 = max(y + dy0, 0), min(y + dy1, size)
+                if x0 >= x1 or y0 >= y1:
+                    continue
+                chained = pending[x0:x1, y0:y1]
+                if mask is None:
+                    affected[x0:x1, y0:y1] = True
+                else:
+                    area = mask[x0 - x - dx0:x1 - x - dx0, y0 - y - dy0:y1 - y - dy0]
+                    affected[x0:x1, y0:y1] |= area
+                    chained = chained & area
+                # 範圍內尚未引爆的炸彈加入佇列
+                cx, cy = np.nonzero(chained)
+                if len(cx):
+                    cx += x0
+                    cy += y0
+                    pending[cx, cy] = False
+                    queue.extend(zip(cx.tolist(), cy.tolist()))
+
+        columns = {int(x): np.flatnonzero(affected[x]).tolist() for x in np.flatnonzero(affected.any(axis=1))}
+        return Blast(affected, bombs, columns)
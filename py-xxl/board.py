@@ -0,0 +1,201 @@
+import random
+import numpy as np
+from typing import Tuple, List, Dict, Union, Optional, Iterable
+
+# 定義常用的類型
+Position = Tuple[int, int]
+ColumnChanges = Dict[int, Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]]
+
+EMPTY = 0  # 空格或特殊方塊所在格的寶石種類（不參與消除）
+SPECIAL_NONE = 0
+SPECIAL_BOMB = 1
+
+# 遊戲開局使用的測試佈局（layout[y][x]），機器人模擬關卡時也從這個佈局開始
+TEST_LAYOUT = [
+    [1, 1, 2, 1, 3, 4, 5, 6, 1, 1],
+    [4, 4, 1, 4, 4, 3, 5, 6, 5, 1],
+    [5, 5, 3, 5, 1, 3, 4, 2, 1, 4],
+    [1, 2, 5, 4, 6, 4, 1, 3, 4, 1],
+    [2, 3, 5, 5, 1, 4, 5, 4, 3, 1],
+    [3, 3, 2, 4, 5, 5, 6, 6, 1, 2],
+    [6, 6, 3, 6, 1, 2, 1, 4, 5, 1],
+    [1, 1, 2, 1, 4, 5, 1, 3, 4, 1],
+    [5, 4, 3, 3, 5, 5, 4, 1, 2, 2],
+    [3, 3, 5, 3, 3, 1, 1, 3, 1, 1]
+]
+
+# 棋盤資料類
+class Board:
+    """遊戲狀態的唯一來源：types[x, y] 為寶石種類 (1..num_types)，special[x, y] 為特殊方塊層
+
+    所有修改都會記錄在 dirty 遮罩中，讓增量消除檢查只重新掃描變動的行列。
+    """
+    def __init__(self, size: int, num_types: int):
+        self.size = size
+        self.num_types = num_types
+        self.types = np.zeros((size, size), dtype=np.int8)
+        self.special = np.zeros((size, size), dtype=np.int8)
+        self.dirty = np.ones((size, size), dtype=bool)
+
+    @classmethod
+    def from_layout(cls, layout: List[List[int]], size: int, num_types: int, rng=random) -> 'Board':
+        """由 layout[y][x] 建立棋盤，超出佈局範圍的格子隨機填入"""
+        board = cls(size, num_types)
+        for x in range(size):
+            for y in range(size):
+                if y < len(layout) and x < len(layout[0]):
+                    board.types[x, y] = layout[y][x]
+                else:
+                    board.types[x, y] = rng.randint(1, 6)
+        return board
+
+    @classmethod
+    def random(cls, size: int, num_types: int, rng=random, allow_matches: bool = True) -> 'Board':
+        """隨機產生棋盤；allow_matches 為 False 時保證沒有現成的三連"""
+        board = cls(size, num_types)
+        grid = [[EMPTY] * size for _ in range(size)]
+        all_types = list(range(1, num_types + 1))
+        for x in range(size):
+            for y in range(size):
+                choices = all_types
+                if not allow_matches:
+                    # 排除會與左邊兩格或上面兩格連成一線的種類
+                    banned = set()
+                    if x >= 2 and grid[x - 1][y] == grid[x - 2][y]:
+                        banned.add(grid[x - 1][y])
+                    if y >= 2 and grid[x][y - 1] == grid[x][y - 2]:
+                        banned.add(grid[x][y - 1])
+                    if banned:
+                        choices = [t for t in all_types if t not in banned]
+                grid[x][y] = rng.choice(choices)
+        board.types[:] = grid
+        return board
+
+    def copy(self) -> 'Board':
+        """複製棋盤"""
+        board = Board(self.size, self.num_types)
+        board.types[:] = self.types
+        board.special[:] = self.special
+        board.dirty[:] = self.dirty
+        return board
+
+    def clear_dirty(self) -> None:
+        """清除變動記錄（由消除檢查在掃描後呼叫）"""
+        self.dirty[:] = False
+
+    def is_valid_pos(self, x: int, y: int) -> bool:
+        """檢查位置是否在網格範圍內"""
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    def is_bomb(self, x: int, y: int) -> bool:
+        """該格是否為炸彈"""
+        return self.special[x, y] == SPECIAL_BOMB
+
+    def swap(self, pos1: Position, pos2: Position) -> None:
+        """交換兩格的內容"""
+        (x1, y1), (x2, y2) = pos1, pos2
+        self.types[x1, y1], self.types[x2, y2] = self.types[x2, y2], self.types[x1, y1]
+        self.special[x1, y1], self.special[x2, y2] = self.special[x2, y2], self.special[x1, y1]
+        self.dirty[x1, y1] = self.dirty[x2, y2] = True
+
+    def remove(self, positions: Iterable[Position]) -> Dict[int, int]:
+        """清空指定格子，回傳各種寶石被移除的數量（炸彈不計）"""
+        removed: Dict[int, int] = {}
+        for x, y in positions:
+            gem_type = int(self.types[x, y])
+            if gem_type != EMPTY and self.special[x, y] == SPECIAL_NONE:
+                removed[gem_type] = removed.get(gem_type, 0) + 1
+            self.types[x, y] = EMPTY
+            self.special[x, y] = SPECIAL_NONE
+            self.dirty[x, y] = True
+        return removed
+
+    def remove_mask(self, mask: np.ndarray) -> Dict[int, int]:
+        """清空遮罩中的格子（向量化的 remove），回傳各種寶石被移除的數量（炸彈不計）"""
+        gems = mask & (self.special == SPECIAL_NONE) & (self.types != EMPTY)
+        counts = np.bincount(self.types[gems], minlength=self.num_types + 1)
+        removed = {int(t): int(counts[t]) for t in np.flatnonzero(counts) if t != EMPTY}
+        self.types[mask] = EMPTY
+        self.special[mask] = SPECIAL_NONE
+        self.dirty[mask] = True
+        return removed
+
+    def place_bomb(self, x: int, y: int) -> None:
+        """在指定格子放置炸彈（覆蓋原本的寶石）"""
+        self.types[x, y] = EMPTY
+        self.special[x, y] = SPECIAL_BOMB
+        self.dirty[x, y] = True
+
+    def collapse(self, removed_positions: Iterable[Position], rng=random) -> ColumnChanges:
+        """套用重力並在頂部補充新寶石
+
+        回傳每一列的 (moves, spawns)：moves 為 (from_y, to_y)，
+        spawns 為 (to_y, gem_type)，依照由下到上的順序排列。
+        """
+        columns: Dict[int, List[int]] = {}
+        for x, y in removed_positions:
+            columns.setdefault(x, []).append(y)
+        return self.collapse_columns(columns, rng)
+
+    def collapse_columns(self, columns: Dict[int, List[int]], rng=random) -> ColumnChanges:
+        """同 collapse()，但被移除的格子已經依行分組（columns[x] 為該行的 y），依 columns 的順序補充"""
+        changes: ColumnChanges = {}
+        for x, removed_ys in columns.items():
+            # 一行只有 size 格，以串列處理比逐行呼叫 NumPy 快
+            removed = set(removed_ys)
+            kept_ys = [y for y in range(self.size) if y not in removed]
+            num_new = self.size - len(kept_ys)
+            types, special = self.types[x].tolist(), self.special[x].tolist()
+
+            # 保留下來的寶石依原順序往下壓實
+            new_types = [EMPTY] * num_new + [types[y] for y in kept_ys]
+            new_special = [SPECIAL_NONE] * num_new + [special[y] for y in kept_ys]
+            moves = [(f, t) for t, f in enumerate(kept_ys, num_new) if f != t]
+            # 最低的被移除格子以上的部分都可能改變
+            self.dirty[x, :max(removed) + 1] = True
+
+            # 由下往上補充新寶石
+            spawns = []
+            for y in range(num_new - 1, -1, -1):
+                gem_type = rng.randint(1, self.num_types)
+                new_types[y] = gem_type
+                spawns.append((y, gem_type))
+            self.types[x] = new_types
+            self.special[x] = new_special
+            changes[x] = (moves, spawns)
+        return changes
+
+    def reshuffle(self, rng=random) -> None:
+        """打亂所有一般寶石的位置（炸彈不動、各種類數量不變），保證沒有現成的三連"""
+        gems = (self.special == SPECIAL_NONE) & (self.types != EMPTY)
+        cells = [tuple(c) for c in np.argwhere(gems).tolist()]  # 依 (x, y) 掃描順序
+        values = self.types[gems].tolist()
+        rng.shuffle(values)
+        grid = self.types.tolist()
+        for (x, y), value in zip(cells, values):
+            grid[x][y] = value
+
+        def banned(x: int, y: int) -> set:
+            """會與左邊兩格或上面兩格連成一線的種類"""
+            result = set()
+            if x >= 2 and grid[x - 1][y] == grid[x - 2][y] != EMPTY:
+                result.add(grid[x - 1][y])
+            if y >= 2 and grid[x][y - 1] == grid[x][y - 2] != EMPTY:
+                result.add(grid[x][y - 1])
+            return result
+
+        # 依掃描順序修正：與後面某格交換，左邊與上面的格子都已定案，因此不會產生三連
+        for index, (x, y) in enumerate(cells):
+            ban = banned(x, y)
+            if grid[x][y] not in ban:
+                continue
+            for later in range(index + 1, len(cells)):
+                later_x, later_y = cells[later]
+                if grid[later_x][later_y] not in ban:
+                    grid[x][y], grid[later_x][later_y] = grid[later_x][later_y], grid[x][y]
+                    break
+            else:
+                # 剩下的寶石都不能放在這裡：改成隨機的合法種類
+                grid[x][y] = rng.choice([t for t in range(1, self.num_types + 1) if t not in ban])
+        self.types[:] = grid
+        self.dirty[:] = True
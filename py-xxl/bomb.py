@@ -1,6 +1,7 @@
 import os
 from typing import Tuple, List, Dict, Union, Optional
 from puzzle import Puzzle
+from board import EMPTY, SPECIAL_BOMB
 from setting import GameConfig
 
 # 定義常用的類型
@@ -9,12 +10,20 @@ Size = Tuple[int, int]
 
 class Bomb(Puzzle):
     """炸彈類別"""
-    def __init__(self, position: Position):
-        super().__init__(
-            img_path=os.path.join(GameConfig.ROOTDIR, 'resources/images/bomb.png'),
-            size=(GameConfig.GRIDSIZE, GameConfig.GRIDSIZE),
+    __slots__ = ()
+    IMG_PATH = os.path.join(GameConfig.ROOTDIR, 'resources/images/bomb.png')
+
+    def __init__(self, position: Position, size: Optional[Size] = None):
+        super().__init__(self.IMG_PATH, size or (GameConfig.GRIDSIZE, GameConfig.GRIDSIZE), position, 0, EMPTY)
+        self.special = SPECIAL_BOMB  # 特殊方塊：炸彈
+
+    def reset_bomb(self, position: Position, size: Optional[Size] = None) -> None:
+        """（重新）設定炸彈的位置（與大小），物件池重複使用時呼叫"""
+        self.reset(
+            img_path=self.IMG_PATH,
+            size=size or (GameConfig.GRIDSIZE, GameConfig.GRIDSIZE),
             position=position,
-            downlen=0
+            downlen=0,
+            gem_type=EMPTY
         )
-        self.type = 'bomb'  # 明確設置類型為 'bomb'
-        self.is_bomb = True
\ No newline at end of file
+        self.special = SPECIAL_BOMB  # 特殊方塊：炸彈
@@ -0,0 +1,163 @@
+import abc
+import random
+from typing import Tuple, List, Dict, Union, Optional
+from setting import GameConfig
+from board import Board, TEST_LAYOUT
+from engine import Engine
+from score import ScoreManager
+
+# 定義常用的類型
+Position = Tuple[int, int]
+Action = Tuple[Position, Position]
+
+SECONDS_PER_MOVE = 3.0  # 玩家每一步（選取、交換動畫與連鎖下落）平均花費的秒數
+
+
+def move_budget(level: int, seconds_per_move: float = SECONDS_PER_MOVE) -> int:
+    """由關卡時間換算機器人可以走的步數"""
+    return max(1, int(ScoreManager().get_level_time(level) / seconds_per_move))
+
+
+# 機器人基底類
+class Bot(abc.ABC):
+    """機器人策略：choose() 從引擎的合法交換中選出一步，沒有可走的交換時回傳 None"""
+    name = 'bot'
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng or random.Random()
+
+    @abc.abstractmethod
+    def choose(self, engine: Engine) -> Optional[Action]:
+        """選出下一步"""
+
+    def evaluate(self, engine: Engine, action: Action) -> int:
+        """交換的立即得分（第一波消除或爆炸），直接在棋盤上查詢，不複製引擎"""
+        return engine.swap_gain(action)
+
+
+# 隨機機器人類
+class RandomBot(Bot):
+    """從合法交換中隨機挑選（作為基準線）"""
+    name = 'random'
+
+    def choose(self, engine: Engine) -> Optional[Action]:
+        moves = engine.legal_moves()
+        return self.rng.choice(moves) if moves else None
+
+
+# 貪婪機器人類
+class GreedyBot(Bot):
+    """挑選立即得分最高的交換（同分隨機）"""
+    name = 'greedy'
+
+    def choose(self, engine: Engine) -> Optional[Action]:
+        moves = engine.legal_moves()
+        if not moves:
+            return None
+        gains = [self.evaluate(engine, action) for action in moves]
+        best = max(gains)
+        return self.rng.choice([action for action, gain in zip(moves, gains) if gain == best])
+
+
+# 蒙地卡羅機器人類
+class MonteCarloBot(Bot):
+    """對立即得分最高的幾個候選交換做隨機模擬，挑選平均總分最高的一步
+
+    candidates：進行模擬的候選數量；rollouts：每個候選的模擬次數；depth：每次模擬往後隨機走的步數。
+    """
+    name = 'montecarlo'
+
+    def __init__(self, rng: Optional[random.Random] = None, candidates: int = 4, rollouts: int = 4, depth: int = 3):
+        super().__init__(rng)
+        self.candidates = candidates
+        self.rollouts = rollouts
+        self.depth = depth
+
+    def choose(self, engine: Engine) -> Optional[Action]:
+        moves = engine.legal_moves()
+        if not moves:
+            return None
+        # 先以立即得分排序，只模擬前幾名
+        gains = [self.evaluate(engine, action) for action in moves]
+        ranked = sorted(range(len(moves)), key=lambda i: (-gains[i], self.rng.random()))[:self.candidates]
+
+        best_action, best_value = None, -1.0
+        for index in ranked:
+            total = 0
+            for _ in range(self.rollouts):
+                total += self.rollout(engine, moves[index])
+            value = total / self.rollouts
+            if value > best_value:
+                best_action, best_value = moves[index], value
+        return best_action
+
+    def rollout(self, engine: Engine, action: Action) -> int:
+        """執行 action 後隨機走 depth 步，回傳累計得分"""
+        sim = engine.clone(random.Random(self.rng.random()))
+        score_before = sim.score
+        sim.step(action)
+        for _ in range(self.depth):
+            moves = sim.legal_moves()
+            if not moves:
+                break
+            sim.step(self.rng.choice(moves))
+        return sim.score - score_before
+
+
+BOTS: Dict[str, type] = {bot.name: bot for bot in (RandomBot, GreedyBot, MonteCarloBot)}
+
+
+def play_session(policy: str, levels: int, seed: int, seconds_per_move: float = SECONDS_PER_MOVE,
+                 size: int = GameConfig.NUMGRID, num_types: int = 7,
+                 **bot_options) -> List[Dict[str, Union[int, bool, str, None]]]:
+    """以指定策略無畫面地依序玩第 1 到 levels 關，回傳每一關的結果（失敗的關卡之後不再繼續）
+
+    與實際遊戲（GameScene.run）相同：從測試佈局開局，分數與棋盤帶到下一關，
+    過關後套用 adjust_score() 的隨機加減分，因此關卡目標是累計分數。
+    達到目標時該關立即結束；為了建議目標分數，另外在複製的引擎上把剩下的步數走完，記錄 budget_score。
+    """
+    rng = random.Random(seed)
+    board = Board.from_layout(TEST_LAYOUT, size, num_types, random.Random(rng.random()))
+    engine = Engine(rng=random.Random(rng.random()), board=board)
+    engine.score_manager.rng = random.Random(rng.random())
+    engine.record_events = False  # 機器人不讀取事件，複製的引擎也沿用這個設定
+    bot = BOTS[policy](random.Random(rng.random()), **bot_options)
+    # 開局結算：測試佈局中現成的消除與實際遊戲一樣計分
+    engine.settle()
+    engine.ensure_moves()
+
+    results = []
+    for level in range(1, levels + 1):
+        target = engine.score_manager.get_level_target(level)
+        budget = move_budget(level, seconds_per_move)
+        start_score, start_moves = engine.score, engine.moves
+        sim = engine
+        for _ in range(budget):
+            if sim is engine and engine.score >= target:
+                # 實際遊戲在這裡結束關卡，之後的步數走在複製的引擎上，只用於 budget_score
+                sim = engine.clone(random.Random(rng.random()))
+                sim.auto_reshuffle = True
+            action = bot.choose(sim)
+            if action is None:
+                break
+            sim.step(action)
+        passed = engine.score >= target
+        moves = engine.moves - start_moves
+        results.append({
+            'policy': policy,
+            'level': level,
+            'seed': seed,
+            'start_score': start_score,
+            'score': engine.score,
+            'budget_score': sim.score,
+            'target': target,
+            'passed': passed,
+            'budget': budget,
+            'moves': moves,
+            'moves_to_target': moves if passed else None,
+        })
+        if not passed:
+            break
+        if level < levels:
+            engine.score_manager.adjust_score()
+    return results
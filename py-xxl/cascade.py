@@ -0,0 +1,91 @@
+import numpy as np
+from typing import Tuple, List, Dict, Union, Optional, NamedTuple
+from board import EMPTY
+from matcher import Match, match_positions, MATCH_T, MATCH_L
+
+# 定義常用的類型
+Position = Tuple[int, int]
+
+# 消除群組
+class MatchGroup(NamedTuple):
+    """同一步中互相重疊的消除合併成的群組"""
+    positions: List[Position]      # 群組內所有格子（由上到下、由左到右）
+    matches: List[Match]           # 組成此群組的消除
+    score_length: int              # 計分與音效使用的長度
+    bomb: Optional[Position]       # 特殊形狀消除後放置炸彈的位置
+
+
+def bomb_position(positions: List[Position]) -> Position:
+    """特殊形狀的中間位置（放置炸彈用）"""
+    return (sum(x for x, y in positions) // len(positions),
+            sum(y for x, y in positions) // len(positions))
+
+
+def group_matches(matches: List[Match]) -> List[MatchGroup]:
+    """把所有同時成立的消除分組：不重疊的各自一組，重疊的（例如十字）合併成一組"""
+    parent = list(range(len(matches)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # 共用格子的消除合併到同一組
+    owner: Dict[Position, int] = {}
+    match_cells = [match_positions(match) for match in matches]
+    for i, cells in enumerate(match_cells):
+        for cell in cells:
+            if cell in owner:
+                parent[find(i)] = find(owner[cell])
+            else:
+                owner[cell] = i
+
+    grouped: Dict[int, List[int]] = {}
+    for i in range(len(matches)):
+        grouped.setdefault(find(i), []).append(i)
+
+    groups = []
+    for members in grouped.values():
+        cells = set()
+        for i in members:
+            cells.update(match_cells[i])
+        positions = sorted(cells, key=lambda p: (p[1], p[0]))
+        shapes = [i for i in members if matches[i][0] in (MATCH_T, MATCH_L)]
+        if shapes:
+            # 含有 T/L 型：以特殊形狀計分，並在第一個形狀的中間放置炸彈
+            groups.append(MatchGroup(positions, [matches[i] for i in members], 5,
+                                     bomb_position(match_cells[shapes[0]])))
+        else:
+            groups.append(MatchGroup(positions, [matches[i] for i in members], len(positions), None))
+    return groups
+
+
+def _run_length(line: List[int], index: int) -> int:
+    """line 中包含 index 的同種類連續長度"""
+    gem_type = line[index]
+    start, end = index, index + 1
+    while start > 0 and line[start - 1] == gem_type:
+        start -= 1
+    while end < len(line) and line[end] == gem_type:
+        end += 1
+    return end - start
+
+
+def swap_score_lengths(types: np.ndarray, pos1: Position, pos2: Position) -> List[int]:
+    """交換後（types 已經交換過）形成的各組消除的計分長度，與 group_matches() 的 score_length 相同
+
+    原本穩定的棋盤上，新的消除一定經過交換的格子，且兩格各自的消除不會重疊：
+    經過同一格的橫向與縱向都至少三連時必定是 T/L 型或十字，計為 5，否則就是那一條直線的長度。
+    """
+    lengths = []
+    for x, y in (pos1, pos2):
+        if types[x, y] == EMPTY:
+            continue
+        horizontal = _run_length(types[:, y].tolist(), x)
+        vertical = _run_length(types[x, :].tolist(), y)
+        if horizontal >= 3 and vertical >= 3:
+            lengths.append(5)
+        elif horizontal >= 3 or vertical >= 3:
+            lengths.append(max(horizontal, vertical))
+    return lengths
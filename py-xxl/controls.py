@@ -0,0 +1,76 @@
+import pygame
+from typing import Tuple, List, Dict, Union, Optional
+from viewport import Viewport
+
+# 定義常用的類型
+Position = Tuple[int, int]
+Cell = List[int]
+
+# 視窗重新露出或還原的事件：髒矩形以外的區域可能已經被覆蓋，需要整面重繪
+# （pygame 1 / 舊版 SDL 只有 VIDEOEXPOSE 與 WINDOWEVENT，pygame 2 另外拆成各別的視窗事件）
+REDRAW_EVENTS = tuple(getattr(pygame, name) for name in
+                      ('VIDEOEXPOSE', 'WINDOWEVENT', 'WINDOWEXPOSED', 'WINDOWSHOWN', 'WINDOWRESTORED', 'WINDOWMAXIMIZED')
+                      if hasattr(pygame, name))
+
+# 遊戲中會處理的事件，其餘事件在進入佇列前就被 SDL 丟棄
+ALLOWED_EVENTS = (pygame.QUIT, pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEWHEEL) + \
+    REDRAW_EVENTS
+
+
+def allow_events() -> None:
+    """只允許遊戲會處理的事件進入佇列；滑鼠移動事件只在拖曳時開啟（見 GridInput）"""
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(list(ALLOWED_EVENTS))
+
+
+# 棋盤輸入類
+class GridInput:
+    """把螢幕坐標換算成棋盤格子，並把拖曳手勢轉成交換
+
+    格子由視野（Viewport）的位置與格子大小直接計算（O(1)），不需要逐一檢查每個寶石的 rect。
+    """
+    def __init__(self, drag_threshold: Optional[int] = None):
+        self.drag_threshold = drag_threshold  # 拖曳多少像素才算交換，None 表示半個格子
+        self.press_cell: Optional[Cell] = None
+        self.press_position: Optional[Position] = None
+        self.viewport: Optional[Viewport] = None  # 由 Game.reset 設定
+
+    def cell_at(self, position: Position) -> Optional[Cell]:
+        """回傳坐標所在的格子 [x, y]，不在棋盤（或視野）內時回傳 None"""
+        return self.viewport.cell_at(position)
+
+    def press(self, position: Position) -> Optional[Cell]:
+        """滑鼠按下：回傳點到的格子，並開始追蹤拖曳"""
+        cell = self.cell_at(position)
+        if cell is not None:
+            self.press_cell = cell
+            self.press_position = position
+            pygame.event.set_allowed(pygame.MOUSEMOTION)
+        return cell
+
+    def drag(self, position: Position) -> Optional[Tuple[Cell, Cell]]:
+        """滑鼠移動：拖曳超過門檻時回傳 (起點格子, 相鄰格子)，每次按下最多產生一次交換"""
+        if self.press_cell is None:
+            return None
+        dx = position[0] - self.press_position[0]
+        dy = position[1] - self.press_position[1]
+        threshold = self.drag_threshold or self.viewport.cell_size // 2
+        if max(abs(dx), abs(dy)) < threshold:
+            return None
+        # 以移動較多的軸決定方向
+        x, y = self.press_cell
+        if abs(dx) >= abs(dy):
+            target = [x + (1 if dx > 0 else -1), y]
+        else:
+            target = [x, y + (1 if dy > 0 else -1)]
+        start = self.press_cell
+        self.release()
+        if self.viewport.is_visible(*target):
+            return start, target
+        return None
+
+    def release(self) -> None:
+        """滑鼠放開（或拖曳已產生交換）：停止追蹤並再次封鎖滑鼠移動事件"""
+        self.press_cell = None
+        self.press_position = None
+        pygame.event.set_blocked(pygame.MOUSEMOTION)
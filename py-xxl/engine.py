@@ -0,0 +1,193 @@
+import random
+from typing import Tuple, List, Dict, Union, Optional, NamedTuple
+from setting import GameConfig
+from board import Board, EMPTY, SPECIAL_NONE
+from blast import ChainReaction, BlastShape
+from matcher import IncrementalMatcher
+from cascade import group_matches, swap_score_lengths
+from moves import MoveGenerator, reshuffle_until_playable
+from score import ScoreManager
+from snapshot import Snapshot
+
+# 定義常用的類型
+Position = Tuple[int, int]
+Action = Tuple[Position, Position]
+
+# 事件
+class Event(NamedTuple):
+    """引擎在一步之中發生的事件"""
+    kind: str                  # 'swap'、'explode'、'match'、'bomb'
+    positions: List[Position]  # 相關的格子
+    value: int                 # 得分（bomb 事件為 0）
+
+# 單步結果
+class StepResult(NamedTuple):
+    """step() 的回傳值"""
+    valid: bool          # 交換是否成立（沒有形成消除的交換會被還原）
+    gained: int          # 這一步獲得的分數
+    score: int           # 目前總分
+    cascades: int        # 連鎖消除的層數
+    board: Board         # 結算後的棋盤（引擎內部物件，請勿修改）
+    events: List[Event]
+
+
+# 無畫面遊戲引擎類
+class Engine:
+    """不需要顯示、音效與幀率控制的遊戲規則引擎：step() 會同步結算整個連鎖"""
+    def __init__(self, size: int = GameConfig.NUMGRID, num_types: int = 7,
+                 rng: Optional[random.Random] = None, board: Optional[Board] = None,
+                 blast_shape: Union[str, BlastShape, None] = None):
+        self.rng = rng or random.Random()
+        self.board = board if board is not None else Board.random(size, num_types, self.rng, allow_matches=False)
+        self.matcher = IncrementalMatcher()
+        self.move_generator = MoveGenerator()
+        self.chain_reaction = ChainReaction(blast_shape or GameConfig.BLAST_SHAPE)
+        self.score_manager = ScoreManager()
+        self.gem_count = {i: 0 for i in range(1, self.board.num_types + 1)}
+        self.moves = 0
+        self.auto_reshuffle = True  # 每一步結算後遇到死局自動洗牌
+        self.record_events = True  # False 時 step() 不建立事件（模擬時沒有人讀取，省下建立物件的成本）
+        self._moves_current = False  # move_generator 是否對應目前的棋盤（step 之後 ensure_moves 已經算過就不必再算）
+
+    @property
+    def score(self) -> int:
+        """目前總分"""
+        return self.score_manager.score
+
+    def clone(self, rng: Optional[random.Random] = None) -> 'Engine':
+        """複製目前的棋盤與分數，用於模擬（新的引擎使用 rng 補充寶石）"""
+        engine = Engine(rng=rng or random.Random(), board=self.board.copy(),
+                        blast_shape=self.chain_reaction.shape)
+        engine.matcher = self.matcher.clone(engine.board)
+        engine.auto_reshuffle = False
+        engine.record_events = self.record_events
+        engine.score_manager.score = self.score
+        engine.moves = self.moves
+        return engine
+
+    def snapshot(self, base: Optional[Snapshot] = None) -> Snapshot:
+        """擷取棋盤、寶石計數、分數、步數與亂數狀態；base 為之前的快照時共用沒有改變的行"""
+        return Snapshot.capture(self.board, self.gem_count, self.score, self.moves,
+                                rng_state=self.rng.getstate(), base=base)
+
+    def restore(self, snapshot: Snapshot) -> None:
+        """還原快照（與 clone() 不同，沿用同一個引擎，適合搜尋時反覆回到同一個狀態）"""
+        self.board = snapshot.board()
+        self.matcher.reset()
+        self.gem_count = snapshot.gem_counts()
+        self.score_manager.score = snapshot.score
+        self.moves = snapshot.moves
+        self._moves_current = False
+        if snapshot.rng_state is not None:
+            self.rng.setstate(snapshot.rng_state)
+
+    def step(self, action: Action) -> StepResult:
+        """交換兩個相鄰的格子，同步結算所有消除、爆炸與補充"""
+        pos1, pos2 = tuple(action[0]), tuple(action[1])
+        score_before = self.score
+        if abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1]) != 1 or \
+                not (self.board.is_valid_pos(*pos1) and self.board.is_valid_pos(*pos2)):
+            return StepResult(False, 0, self.score, 0, self.board, [])
+
+        events = [Event('swap', [pos1, pos2], 0)] if self.record_events else None
+        bomb1 = self.board.is_bomb(*pos1)
+        if bomb1 or self.board.is_bomb(*pos2):
+            # 炸彈參與交換：交換後直接引爆
+            self.board.swap(pos1, pos2)
+            event = self._explode(pos2 if bomb1 else pos1)
+            if events is not None:
+                events.append(event)
+        else:
+            self.board.swap(pos1, pos2)
+            if not self.matcher.find_matches(self.board):
+                self.board.swap(pos1, pos2)  # 沒有消除就換回來
+                return StepResult(False, 0, self.score, 0, self.board, [])
+
+        self.moves += 1
+        self._moves_current = False
+        cascades = self.settle(events)
+        if self.auto_reshuffle:
+            self.ensure_moves()
+        return StepResult(True, self.score - score_before, self.score, cascades, self.board, events or [])
+
+    def swap_gain(self, action: Action) -> int:
+        """交換的立即得分（第一波消除或爆炸，不含補充寶石後的連鎖），不修改引擎；不會消除的交換為 0
+
+        只檢查交換的兩格附近，搜尋時不必為每個候選交換複製引擎。
+        """
+        (x1, y1), (x2, y2) = pos1, pos2 = tuple(action[0]), tuple(action[1])
+        board = self.board
+        if abs(x1 - x2) + abs(y1 - y2) != 1 or not (board.is_valid_pos(x1, y1) and board.is_valid_pos(x2, y2)):
+            return 0
+        bomb1 = board.is_bomb(x1, y1)
+        if bomb1 or board.is_bomb(x2, y2):
+            # 與 _explode() 相同：爆炸範圍內的寶石（炸彈不計）一起計分
+            swapped = board.copy()
+            swapped.swap(pos1, pos2)
+            blast = self.chain_reaction.resolve(swapped, *(pos2 if bomb1 else pos1))
+            gems = blast.mask & (swapped.special == SPECIAL_NONE) & (swapped.types != EMPTY)
+            return self.score_manager.match_score(int(gems.sum()))
+        types = board.types.copy()
+        types[x1, y1], types[x2, y2] = types[x2, y2], types[x1, y1]
+        return sum(self.score_manager.match_score(length) for length in swap_score_lengths(types, pos1, pos2))
+
+    def settle(self, events: Optional[List[Event]] = None) -> int:
+        """重複清除所有同時成立的消除直到棋盤穩定，回傳連鎖層數（events 為 None 時不記錄事件）"""
+        cascades = 0
+        matches = self.matcher.find_matches(self.board)
+        while matches:
+            cascades += 1
+            groups = group_matches(matches)
+            positions = []
+            for group in groups:
+                gained = self.score_manager.add_score(group.score_length)
+                if events is not None:
+                    events.append(Event('match', group.positions, gained))
+                positions.extend(group.positions)
+            self._remove(positions)
+            self.board.collapse(positions, self.rng)
+
+            # 寶石落定後放置炸彈
+            for group in groups:
+                if group.bomb is not None:
+                    self.board.place_bomb(*group.bomb)
+                    if events is not None:
+                        events.append(Event('bomb', [group.bomb], 0))
+            matches = self.matcher.find_matches(self.board)
+        if cascades:
+            self._moves_current = False
+        return cascades
+
+    def legal_moves(self) -> List[Action]:
+        """目前棋盤上所有會形成消除（或引爆炸彈）的交換"""
+        if not self._moves_current:
+            self.move_generator.update(self.board)
+            self._moves_current = True
+        return self.move_generator.moves()
+
+    def ensure_moves(self) -> bool:
+        """死局時重新洗牌，回傳是否進行了洗牌"""
+        if not self._moves_current:
+            self.move_generator.update(self.board)
+            self._moves_current = True
+        if self.move_generator.has_moves():
+            return False
+        reshuffle_until_playable(self.board, self.move_generator, self.rng)
+        return True
+
+    def _explode(self, bomb_pos: Position) -> Event:
+        """引爆炸彈（包含連鎖爆炸）並補充寶石"""
+        blast = self.chain_reaction.resolve(self.board, *bomb_pos)
+        removed = self.board.remove_mask(blast.mask)
+        for gem_type, count in removed.items():
+            self.gem_count[gem_type] += count
+        gained = self.score_manager.add_score(sum(removed.values()))
+        self.board.collapse_columns(blast.columns, self.rng)
+        return Event('explode', blast.positions, gained)
+
+    def _remove(self, positions: List[Position]) -> int:
+        """從棋盤移除格子並更新寶石計數"""
+        removed = self.board.remove(positions)
+        for gem_type, count in removed.items():
+            self.gem_count[gem_type] += count
+        return sum(removed.values())
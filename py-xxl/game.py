@@ -1,15 +1,30 @@
 import os
 import sys
+import math
 import time
 import pygame
 import random
-from typing import Tuple, List, Dict, Union, Optional
-from puzzle import Puzzle
+import numpy as np
+from typing import Tuple, List, Dict, Union, Optional, Callable
+from puzzle import Puzzle, Direction
 from setting import GameConfig
 from UI import UIManager
 from score import ScoreManager
 from sound import SoundManager
 from bomb import Bomb
+from atlas import sprite_atlas
+from renderer import DirtyRenderer
+from board import Board, ColumnChanges, TEST_LAYOUT
+from matcher import IncrementalMatcher, select_match, match_positions
+from cascade import group_matches
+from moves import MoveGenerator, reshuffle_until_playable
+from replay import ReplayRecorder, move_seed
+from profiler import FrameProfiler
+from pool import SpritePool
+from controls import GridInput, allow_events, REDRAW_EVENTS
+from blast import ChainReaction
+from viewport import Viewport
+from snapshot import Snapshot, SnapshotHistory
 
 # 定義常用的類型
 Position = Tuple[int, int]
@@ -17,48 +32,53 @@ Size = Tuple[int, int]
 
 # 遊戲類
 class Game:
-    def __init__(self, screen: pygame.Surface, font: pygame.font.Font, gem_imgs: List[str]):
+    def __init__(self, screen: pygame.Surface, font: pygame.font.Font, gem_imgs: List[str], seed: Optional[int] = None):
+        # 整個遊戲的亂數都由種子決定：session_rng 用於分數調整與卡片，rng 用於補充寶石（每一步重新設定種子）
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.session_rng = random.Random(self.seed)
+        self.rng = random.Random(move_seed(self.seed, 0, 0))
         self.ui_manager = UIManager(screen, font)
-        self.score_manager = ScoreManager()
+        self.renderer = DirtyRenderer(screen)
+        self.profiler = FrameProfiler(GameConfig.PROFILE)
+        self.renderer.profiler = self.profiler
+        self.score_manager = ScoreManager(self.session_rng)
         self.sound_manager = SoundManager(GameConfig.ROOTDIR)
         self.gem_imgs = gem_imgs
         self.level = 1
         self.show_tutorial = True
         self.gem_count = {i: 0 for i in range(1, len(gem_imgs) + 1)}
+        self.moves = 0
+        self.recorder = None
+        self.matcher = IncrementalMatcher(validate=GameConfig.VALIDATE_MATCHES)
+        self.pool = SpritePool()
+        self.move_generator = MoveGenerator()
+        self.chain_reaction = ChainReaction(GameConfig.BLAST_SHAPE)
+        self.hint = None
+        self.controls = GridInput()
+        self.history = SnapshotHistory(GameConfig.UNDO_DEPTH)
+        # 預先載入所有寶石與炸彈圖片，補充寶石時不再解碼
+        sprite_atlas.preload(self.gem_imgs + [Bomb.IMG_PATH])
         self.reset()
 
     def reset(self) -> None:
         """重置遊戲狀態"""
-        # 測試佈局
-        test_layout = [
-            [1, 1, 2, 1, 3, 4, 5, 6, 1, 1],
-            [4, 4, 1, 4, 4, 3, 5, 6, 5, 1],
-            [5, 5, 3, 5, 1, 3, 4, 2, 1, 4],
-            [1, 2, 5, 4, 6, 4, 1, 3, 4, 1],
-            [2, 3, 5, 5, 1, 4, 5, 4, 3, 1],
-            [3, 3, 2, 4, 5, 5, 6, 6, 1, 2],
-            [6, 6, 3, 6, 1, 2, 1, 4, 5, 1],
-            [1, 1, 2, 1, 4, 5, 1, 3, 4, 1],
-            [5, 4, 3, 3, 5, 5, 4, 1, 2, 2],
-            [3, 3, 5, 3, 3, 1, 1, 3, 1, 1]
-        ]
-
-        self.all_gems = []
+        # 棋盤陣列是遊戲狀態的唯一來源，精靈只負責顯示
+        self.board = Board.from_layout(TEST_LAYOUT, GameConfig.NUMGRID, len(self.gem_imgs), self.rng)
+        # 重新開始時把場上的精靈歸還物件池
+        for gem in list(getattr(self, 'gems_group', [])):
+            self.pool.release(gem)
+        self.all_gems = [[None] * GameConfig.NUMGRID for _ in range(GameConfig.NUMGRID)]
         self.gems_group = pygame.sprite.Group()
-        
-        for x in range(GameConfig.NUMGRID):
-            self.all_gems.append([])
-            for y in range(GameConfig.NUMGRID):
-                gem_type = test_layout[y][x] if y < len(test_layout) and x < len(test_layout[0]) else random.randint(1, 6)
-                gem = Puzzle(
-                    img_path=self.gem_imgs[gem_type - 1],
-                    size=(GameConfig.GRIDSIZE, GameConfig.GRIDSIZE),
-                    position=[GameConfig.XMARGIN + x * GameConfig.GRIDSIZE, GameConfig.YMARGIN + y * GameConfig.GRIDSIZE],
-                    downlen=0
-                )
-                self.all_gems[x].append(gem)
-                self.gems_group.add(gem)
 
+        # 視野：一般模式涵蓋整個棋盤，大棋盤模式只有視野內的格子有精靈
+        self.viewport = Viewport.from_config(GameConfig.NUMGRID)
+        self.ui_manager.viewport = self.viewport
+        self.controls.viewport = self.viewport
+        self.sprite_range = (0, 0, 0, 0)
+        self.sync_sprites()
+
+        self.hint = None
+        self.settle_actions: List[Callable[[], None]] = []
         self.score_manager.score = 0
         self.remaining_time = 40
 
@@ -66,6 +86,8 @@ class Game:
         """開始遊戲"""
         if self.show_tutorial:
             self.show_tutorial_screen()
+        # 在關卡開始前載入音效，第一次消除時不會卡頓
+        self.sound_manager.load()
 
         clock = pygame.time.Clock()
         overall_moving = True
@@ -73,88 +95,263 @@ class Game:
         self.level = level
         self.target_score = self.score_manager.get_level_target(level)
         # 根據關卡調整時間
-        self.remaining_time = max(200 - (level - 1) * 60, 60)  # 每關減少60秒，但最少保持120秒
+        self.remaining_time = self.score_manager.get_level_time(level)
         gem_selected_xy = None
         gem_selected_xy2 = None
         swap_again = False
+        swap_request = None
         add_score = 0
-        time_pre = int(time.time())
+        self.renderer.invalidate()
+        allow_events()
+
+        # 重播記錄：開局結算使用第 0 步的種子
+        self.moves = 0
+        self.rng.seed(move_seed(self.seed, level, 0))
+        self.recorder = ReplayRecorder(self.seed, level, self.board.size, self.board.num_types,
+                                       GameConfig.KEYFRAME_INTERVAL, GameConfig.BLAST_SHAPE)
+        self.history.clear()
+        if GameConfig.PROFILE_DIR:
+            self.profiler.start_cprofile()
+
+        # 固定時間步長：遊戲邏輯每次前進 dt 秒，畫面在兩個模擬刻之間插值
+        dt = 1.0 / GameConfig.TICK_RATE
+        ticks = 0
+        accumulator = 0.0
+        previous = time.perf_counter()
 
         while True:
-            self.ui_manager.draw_background()
-            
-            # 檢查是否達到目標分數
-            if self.score_manager.score >= self.target_score:
-                return self.score_manager.score
+            self.profiler.begin_frame()
+            now = time.perf_counter()
+            # 限制單幀最多補跑的時間，避免卡頓後模擬追不上
+            frame_time = min(now - previous, GameConfig.MAX_FRAME_TIME)
+            accumulator += frame_time
+            previous = now
 
             # 處理事件
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if not (overall_moving or individual_moving or add_score):
-                        position = pygame.mouse.get_pos()
-                        if gem_selected_xy is None:
-                            gem_selected_xy = self.check_selected(position)
+            with self.profiler.phase('events'):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        pygame.quit()
+                        sys.exit()
+                    elif event.type in REDRAW_EVENTS:
+                        # 視窗重新露出或還原：下一幀整面重繪
+                        self.renderer.invalidate()
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                        # 按 F3 切換效能分析疊加資訊
+                        self.profiler.toggle()
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_h:
+                        # 按 H 顯示一個可行的交換（大棋盤模式下把視野移過去）
+                        if not (overall_moving or individual_moving or add_score):
+                            self.hint = self.move_generator.hint()
+                            if self.hint and self.viewport.scrollable:
+                                self.scroll_view_to(*self.hint[0])
+                    elif event.type == pygame.KEYDOWN and event.key in (pygame.K_u, pygame.K_BACKSPACE):
+                        # 按 U 或 Backspace 復原上一步（剩餘時間不會退回）
+                        if not (overall_moving or individual_moving or add_score) and self.undo():
+                            gem_selected_xy = None
+                            self.controls.release()
+                    elif event.type == pygame.KEYDOWN and event.key in (pygame.K_EQUALS, pygame.K_MINUS):
+                        # 大棋盤模式：+/- 縮放視野
+                        self.zoom_view(1 if event.key == pygame.K_EQUALS else -1)
+                    elif event.type == pygame.MOUSEWHEEL:
+                        # 大棋盤模式：滾輪以游標為中心縮放
+                        self.zoom_view(event.y, pygame.mouse.get_pos())
+                    elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                        # 點擊：第一下選取寶石，第二下嘗試與選取的寶石交換；同時開始追蹤拖曳
+                        if not (overall_moving or individual_moving or add_score):
+                            cell = self.controls.press(event.pos)
+                            if gem_selected_xy is None:
+                                gem_selected_xy = cell
+                            elif cell:
+                                swap_request = (gem_selected_xy, cell)
+                    elif event.type == pygame.MOUSEMOTION:
+                        # 拖曳：朝拖曳方向與相鄰的寶石交換
+                        if not (overall_moving or individual_moving or add_score):
+                            swap_request = self.controls.drag(event.pos)
+                    elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                        self.controls.release()
+
+                    if swap_request:
+                        gem_selected_xy, gem_selected_xy2 = swap_request
+                        swap_request = None
+                        bomb_swap = self.board.is_bomb(*gem_selected_xy) or self.board.is_bomb(*gem_selected_xy2)
+                        self.rng.seed(move_seed(self.seed, level, self.moves + 1))
+                        if self.swap_gems(gem_selected_xy, gem_selected_xy2):
+                            self.moves += 1
+                            self.recorder.swap(ticks, gem_selected_xy, gem_selected_xy2)
+                            self.hint = None
+                            self.controls.release()
+                            if bomb_swap:
+                                # 炸彈已經引爆，直接等待寶石落下並檢查連鎖
+                                overall_moving = True
+                                gem_selected_xy = None
+                                gem_selected_xy2 = None
+                            else:
+                                individual_moving = True
+                                swap_again = False
                         else:
-                            gem_selected_xy2 = self.check_selected(position)
-                            if gem_selected_xy2:
-                                if self.swap_gems(gem_selected_xy, gem_selected_xy2):
-                                    individual_moving = True
-                                    swap_again = False
-                                else:
-                                    gem_selected_xy = None
-
-            # 更新遊戲狀態
-            if overall_moving:
-                overall_moving = not self.drop_gems()
-                if not overall_moving:
-                    res_match = self.check_matches()
-                    add_score = self.remove_matched(res_match)
-                    if add_score > 0:
-                        overall_moving = True
-
-            if individual_moving:
-                gem1 = self.get_gem_by_pos(*gem_selected_xy)
-                gem2 = self.get_gem_by_pos(*gem_selected_xy2)
-                gem1.move()
-                gem2.move()
-                if gem1.fixed and gem2.fixed:
-                    res_match = self.check_matches()
-                    if res_match[0] == 0 and not swap_again:
-                        swap_again = True
-                        self.swap_gems(gem_selected_xy, gem_selected_xy2)
-                    else:
-                        add_score = self.remove_matched(res_match)
-                        overall_moving = True
-                        individual_moving = False
-                        gem_selected_xy = None
-                        gem_selected_xy2 = None
-
-            # 更新時間
-            self.remaining_time -= (int(time.time()) - time_pre)
-            time_pre = int(time.time())
-
-            # 繪製遊戲界面
-            self.ui_manager.draw_grids()
-            self.gems_group.draw(self.ui_manager.screen)
-            if gem_selected_xy:
-                self.ui_manager.draw_block(self.get_gem_by_pos(*gem_selected_xy).rect)
-
-            # 更新界面顯示
-            self.ui_manager.draw_building_progress(self.score_manager.score, self.target_score)
-            self.ui_manager.draw_timer(self.remaining_time)
-            self.ui_manager.draw_score(self.score_manager.score)
-            self.ui_manager.draw_level(self.level)
-            self.ui_manager.draw_target(self.target_score)
-            self.ui_manager.draw_gem_count(self.gem_count, self.gem_imgs)
+                            gem_selected_xy = None
+
+            # 大棋盤模式：按住方向鍵捲動視野
+            if self.viewport.scrollable:
+                self.scroll_view(frame_time)
+
+            # 更新遊戲狀態：每個模擬刻前進 dt 秒，與畫面幀率無關
+            while accumulator >= dt:
+                accumulator -= dt
+                ticks += 1
+                # 檢查是否達到目標分數
+                if self.score_manager.score >= self.target_score:
+                    self.finish_level(ticks)
+                    return self.score_manager.score
+
+                if overall_moving:
+                    with self.profiler.phase('drop_gems'):
+                        overall_moving = not self.drop_gems(dt)
+                    if not overall_moving:
+                        with self.profiler.phase('cascade'):
+                            # 下落動畫結束：先執行延後的動作，再一次清除所有同時成立的消除
+                            self.run_settle_actions()
+                            add_score = self.remove_matches(self.find_all_matches())
+                            if add_score > 0:
+                                overall_moving = True
+                            else:
+                                # 棋盤穩定：更新合法交換列表，沒有的話重新洗牌
+                                self.update_moves()
+                                self.recorder.settled(self.moves, self.board, self.score_manager.score, self.gem_count)
+                                self.history.push(self.snapshot(), self.recorder.mark())
+
+                if individual_moving:
+                    with self.profiler.phase('cascade'):
+                        # 大棋盤模式下捲出視野的格子沒有精靈，視為已就定位
+                        gems = [gem for gem in (self.get_gem_by_pos(*gem_selected_xy),
+                                                self.get_gem_by_pos(*gem_selected_xy2)) if gem is not None]
+                        for gem in gems:
+                            gem.move(dt)
+                        if all(gem.fixed for gem in gems):
+                            matches = self.find_all_matches()
+                            if not matches and not swap_again:
+                                swap_again = True
+                                self.swap_gems(gem_selected_xy, gem_selected_xy2, check_legal=False)
+                            else:
+                                add_score = self.remove_matches(matches)
+                                overall_moving = True
+                                individual_moving = False
+                                gem_selected_xy = None
+                                gem_selected_xy2 = None
+
+                # 更新時間
+                self.remaining_time -= dt
+                if self.remaining_time <= 0:
+                    self.finish_level(ticks)
+                    return self.score_manager.score
+
+            # 本幀所有消除要求的音效一起播放（同一群組只播一個）
+            self.sound_manager.flush()
+
+            # 只重繪並更新有變化的區域
+            with self.profiler.phase('tracking'):
+                self.interpolate_gems(accumulator / dt)
+                self.track_dirty_regions(gem_selected_xy)
+            self.renderer.render(lambda areas: self.draw_scene(gem_selected_xy, areas))
+            self.profiler.end_frame()
+            clock.tick(GameConfig.FPS)
 
-            if self.remaining_time <= 0:
-                return self.score_manager.score
+    def interpolate_gems(self, alpha: float) -> None:
+        """把寶石的顯示位置設為上一個與目前模擬刻之間的插值（alpha 介於 0 與 1）
 
-            pygame.display.update()
-            clock.tick(GameConfig.FPS)
+        已固定的寶石在 move() 時已經放在最終位置，下次移動前也會重設上一刻的位置，因此略過。
+        """
+        for gem in self.gems_group:
+            if not gem.fixed:
+                gem.interpolate(alpha)
+
+    def finish_level(self, frame: int) -> None:
+        """結束本關的重播記錄與效能分析，有設定 REPLAY_DIR / PROFILE_DIR 時存檔"""
+        self.recorder.end(frame, self.score_manager.score)
+        if GameConfig.REPLAY_DIR:
+            os.makedirs(GameConfig.REPLAY_DIR, exist_ok=True)
+            path = os.path.join(GameConfig.REPLAY_DIR, f'{self.seed}_level{self.level}.pxr')
+            self.recorder.save(path)
+            print(f"Replay saved to {path}")
+        if GameConfig.PROFILE_DIR:
+            os.makedirs(GameConfig.PROFILE_DIR, exist_ok=True)
+            base = os.path.join(GameConfig.PROFILE_DIR, f'{self.seed}_level{self.level}')
+            self.profiler.stop_cprofile(base + '.prof')
+            if self.profiler.trace_events:
+                self.profiler.export_trace(base + '.trace.json')
+            print(f"Profile saved to {base}.*")
+
+    def track_dirty_regions(self, gem_selected_xy: Optional[List[int]]) -> None:
+        """收集本幀移動的寶石、選取框與 HUD 的變化區域"""
+        self.renderer.track_sprites(self.gems_group)
+        if gem_selected_xy:
+            selected_rect = self.cell_rect(*gem_selected_xy)
+            self.renderer.track_region('selected', tuple(selected_rect), selected_rect)
+        else:
+            self.renderer.track_region('selected', None, pygame.Rect(0, 0, 0, 0))
+        if self.hint:
+            hint_rect = self.cell_rect(*self.hint[0]).union(self.cell_rect(*self.hint[1]))
+            self.renderer.track_region('hint', self.hint, hint_rect)
+        else:
+            self.renderer.track_region('hint', None, pygame.Rect(0, 0, 0, 0))
+        self.renderer.track_region('profiler', self.profiler.overlay_state(), self.profiler.overlay_rect())
+        self.renderer.track_region('building', self.score_manager.score, self.ui_manager.building_rect())
+        hud_values = {
+            'timer': math.ceil(self.remaining_time),
+            'score': self.score_manager.score,
+            'level': self.level,
+            'target': self.target_score,
+        }
+        for rect in self.ui_manager.update_hud(hud_values, self.gem_count):
+            self.renderer.mark(rect)
+
+    def draw_scene(self, gem_selected_xy: Optional[List[int]], areas: Optional[List[pygame.Rect]] = None) -> None:
+        """繪製遊戲畫面；areas 為需要重繪的髒矩形（None 表示整個畫面）
+
+        每個矩形只重畫與它相交的精靈與介面元件，逐一精靈的 Python 成本不會隨矩形數量倍增。
+        """
+        screen = self.ui_manager.screen
+        if areas is None:
+            areas = [screen.get_rect()]
+        with self.profiler.phase('sprites'):
+            sprites = self.gems_group.sprites()
+            sprite_rects = [sprite.rect for sprite in sprites]
+            blocks = []
+            if gem_selected_xy:
+                blocks.append((self.cell_rect(*gem_selected_xy), (255, 0, 0)))
+            if self.hint:
+                blocks.extend((self.cell_rect(x, y), (0, 255, 0)) for x, y in self.hint)
+            for area in areas:
+                screen.set_clip(area)
+                self.ui_manager.draw_static_layer()
+                # 大棋盤模式：寶石只畫在視野內
+                board_area = area.clip(self.viewport.area) if self.viewport.scrollable else area
+                screen.set_clip(board_area)
+                for index in board_area.collidelistall(sprite_rects):
+                    screen.blit(sprites[index].image, sprite_rects[index])
+                for rect, color in blocks:
+                    if board_area.colliderect(rect):
+                        self.ui_manager.draw_block(rect, color=color)
+
+        # 更新界面顯示
+        with self.profiler.phase('hud'):
+            building_rect = self.ui_manager.building_rect()
+            hud_rect = self.ui_manager.hud_rect()
+            overlay_rect = self.profiler.overlay_rect()
+            for area in areas:
+                screen.set_clip(area)
+                if area.colliderect(building_rect):
+                    self.ui_manager.draw_building_progress(self.score_manager.score, self.target_score)
+                if area.colliderect(hud_rect):
+                    self.ui_manager.draw_timer(math.ceil(self.remaining_time))
+                    self.ui_manager.draw_score(self.score_manager.score)
+                    self.ui_manager.draw_level(self.level)
+                    self.ui_manager.draw_target(self.target_score)
+                    self.ui_manager.draw_gem_count(self.gem_count, self.gem_imgs)
+                if area.colliderect(overlay_rect):
+                    self.profiler.draw_overlay(screen)
+        screen.set_clip(None)
 
     def show_tutorial_screen(self) -> None:
         """顯示教學畫面"""
@@ -190,53 +387,136 @@ class Game:
                     self.show_tutorial = False
 
     def check_selected(self, position: Position) -> Optional[List[int]]:
-        """檢查是否點擊到寶石"""
-        for x in range(GameConfig.NUMGRID):
-            for y in range(GameConfig.NUMGRID):
-                if self.get_gem_by_pos(x, y).rect.collidepoint(*position):
-                    return [x, y]
-        return None
-
-    def get_gem_by_pos(self, x: int, y: int) -> Puzzle:
-        """根據坐標獲取寶石對象"""
+        """檢查是否點擊到寶石（由坐標直接換算格子）"""
+        return self.controls.cell_at(position)
+
+    def get_gem_by_pos(self, x: int, y: int) -> Optional[Puzzle]:
+        """根據坐標獲取寶石對象（大棋盤模式下視野外的格子沒有精靈，回傳 None）"""
         return self.all_gems[x][y]
 
-    def swap_gems(self, pos1: List[int], pos2: List[int]) -> bool:
-        """交換兩個寶石的位置"""
-        margin = pos1[0] - pos2[0] + pos1[1] - pos2[1]
-        if abs(margin) != 1:
+    def cell_rect(self, x: int, y: int) -> pygame.Rect:
+        """格子目前的顯示範圍：有精靈時跟著精靈移動，否則為格子本身"""
+        gem = self.all_gems[x][y]
+        return gem.rect if gem is not None else self.viewport.cell_rect(x, y)
+
+    def new_sprite(self, x: int, y: int, position: Optional[List[int]] = None) -> Puzzle:
+        """依照棋盤內容為格子 (x, y) 建立寶石或炸彈精靈；position 為起始位置（預設在格子上），會往下落到格子"""
+        target = self.viewport.cell_pos(x, y)
+        position = position or target
+        size = (self.viewport.cell_size, self.viewport.cell_size)
+        if self.board.is_bomb(x, y):
+            sprite = self.pool.bomb(position, size)
+        else:
+            gem_type = int(self.board.types[x, y])
+            sprite = self.pool.gem(
+                img_path=self.gem_imgs[gem_type - 1],
+                size=size,
+                position=position,
+                downlen=0,
+                gem_type=gem_type
+            )
+        sprite.target_y = target[1]
+        sprite.direction = Direction.DOWN
+        self.gems_group.add(sprite)
+        self.all_gems[x][y] = sprite
+        return sprite
+
+    def sync_sprites(self, rebuild: bool = False) -> None:
+        """讓精靈與視野一致：釋放離開視野的精靈，為進入視野的格子建立精靈（rebuild 時全部重建）
+
+        只處理新舊兩個可見範圍內的格子，成本與視野大小有關，與棋盤大小無關。
+        """
+        old_x0, old_x1, old_y0, old_y1 = self.sprite_range
+        x0, x1, y0, y1 = self.viewport.visible_range()
+        for x in range(old_x0, old_x1):
+            for y in range(old_y0, old_y1):
+                if rebuild or not (x0 <= x < x1 and y0 <= y < y1):
+                    self.pool.release(self.all_gems[x][y])
+                    self.all_gems[x][y] = None
+        for x in range(x0, x1):
+            column = self.all_gems[x]
+            for y in range(y0, y1):
+                if column[y] is None:
+                    self.new_sprite(x, y)
+        self.sprite_range = (x0, x1, y0, y1)
+
+    def scroll_view(self, frame_time: float) -> None:
+        """依照按住的方向鍵捲動視野"""
+        keys = pygame.key.get_pressed()
+        distance = GameConfig.SCROLL_SPEED * frame_time
+        dx = (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * distance
+        dy = (keys[pygame.K_DOWN] - keys[pygame.K_UP]) * distance
+        if dx or dy:
+            self._after_scroll(*self.viewport.scroll(dx, dy))
+
+    def scroll_view_to(self, x: int, y: int) -> None:
+        """把視野移到以格子 (x, y) 為中心"""
+        old_x, old_y = self.viewport.offset_x, self.viewport.offset_y
+        self.viewport.center_on(x, y)
+        self._after_scroll(self.viewport.offset_x - old_x, self.viewport.offset_y - old_y)
+
+    def _after_scroll(self, dx: int, dy: int) -> None:
+        """視野移動了 (dx, dy) 像素：平移現有精靈（包含移動中的），再補上新露出的格子"""
+        if not (dx or dy):
+            return
+        for gem in self.gems_group:
+            gem.shift(-dx, -dy)
+        self.sync_sprites()
+        self.renderer.invalidate()
+
+    def zoom_view(self, steps: int, anchor: Optional[Position] = None) -> None:
+        """縮放視野並以新的格子大小重建可見的精靈"""
+        if not self.viewport.zoom(steps, anchor):
+            return
+        sprite_atlas.preload(self.gem_imgs + [Bomb.IMG_PATH], (self.viewport.cell_size, self.viewport.cell_size))
+        self.sync_sprites(rebuild=True)
+        self.renderer.invalidate()
+
+    def swap_gems(self, pos1: List[int], pos2: List[int], check_legal: bool = True) -> bool:
+        """交換兩個寶石的位置；check_legal 為 True 時不會形成消除的交換直接拒絕，不播放動畫"""
+        if abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1]) != 1:
+            return False
+        if check_legal and not self.move_generator.is_legal(pos1, pos2):
             return False
 
         gem1 = self.get_gem_by_pos(*pos1)
         gem2 = self.get_gem_by_pos(*pos2)
+        bomb1 = self.board.is_bomb(*pos1)
 
         # 檢查是否有炸彈參與交換
-        if isinstance(gem1, Bomb) or isinstance(gem2, Bomb):
-            # 如果有炸彈，先進行交換
-            self.all_gems[pos2[0]][pos2[1]] = gem1
-            self.all_gems[pos1[0]][pos1[1]] = gem2
+        if bomb1 or self.board.is_bomb(*pos2):
+            # 如果有炸彈，先進行交換；兩格的精靈直接重建在新的格子上，
+            # 不在爆炸範圍內的一方（例如 row / column 形狀）才會顯示在正確的位置
+            self.board.swap(pos1, pos2)
+            self._respawn_sprites([pos1, pos2])
 
             # 處理炸彈爆炸
-            if isinstance(gem1, Bomb):
+            if bomb1:
                 self.process_bomb_explosion(pos2[0], pos2[1])
             else:
                 self.process_bomb_explosion(pos1[0], pos1[1])
 
             return True
 
+        if gem1 is None or gem2 is None:
+            # 大棋盤模式：其中一格已捲出視野，直接交換棋盤並重建可見的精靈（不播放動畫）
+            self.board.swap(pos1, pos2)
+            self._respawn_sprites([pos1, pos2])
+            return True
+
         # 正常的寶石交換邏輯
         if pos1[0] - pos2[0] == 1:
-            gem1.direction = 'left'
-            gem2.direction = 'right'
+            gem1.direction = Direction.LEFT
+            gem2.direction = Direction.RIGHT
         elif pos1[0] - pos2[0] == -1:
-            gem2.direction = 'left'
-            gem1.direction = 'right'
+            gem2.direction = Direction.LEFT
+            gem1.direction = Direction.RIGHT
         elif pos1[1] - pos2[1] == 1:
-            gem1.direction = 'up'
-            gem2.direction = 'down'
+            gem1.direction = Direction.UP
+            gem2.direction = Direction.DOWN
         elif pos1[1] - pos2[1] == -1:
-            gem2.direction = 'up'
-            gem1.direction = 'down'
+            gem2.direction = Direction.UP
+            gem1.direction = Direction.DOWN
 
         # 設置目標位置
         gem1.target_x = gem2.rect.left
@@ -247,364 +527,157 @@ class Game:
         gem2.fixed = False
 
         # 更新網格數據
+        self.board.swap(pos1, pos2)
         self.all_gems[pos2[0]][pos2[1]] = gem1
         self.all_gems[pos1[0]][pos1[1]] = gem2
 
         return True
 
-    def drop_gems(self) -> bool:
-        """處理寶石下落，所有寶石同時下落"""
+    def _respawn_sprites(self, positions: List[List[int]]) -> None:
+        """釋放指定格子的精靈，並依照棋盤內容在格子上重建（視野外的格子不建立精靈）"""
+        for x, y in positions:
+            self.pool.release(self.all_gems[x][y])
+            self.all_gems[x][y] = None
+            if self.viewport.is_visible(x, y):
+                self.new_sprite(x, y)
+
+    def snapshot(self) -> Snapshot:
+        """擷取目前的邏輯狀態（棋盤、寶石計數、分數、步數、剩餘時間），與上一個快照共用沒有改變的行
+
+        補充寶石的亂數每一步都由種子重新設定，因此不需要記錄。
+        """
+        return Snapshot.capture(self.board, self.gem_count, self.score_manager.score, self.moves,
+                                self.remaining_time, base=self.history.latest)
+
+    def restore(self, snapshot: Snapshot, restore_time: bool = True) -> None:
+        """還原快照並依照棋盤重建可見的精靈；restore_time 為 False 時保留目前的剩餘時間"""
+        if snapshot.size != self.board.size:
+            raise ValueError(f'Snapshot is for a {snapshot.size}x{snapshot.size} board, not {self.board.size}x{self.board.size}')
+        self.board = snapshot.board()
+        self.matcher.reset()
+        self.move_generator.update(self.board)
+        self.gem_count = snapshot.gem_counts()
+        self.score_manager.score = snapshot.score
+        self.moves = snapshot.moves
+        if restore_time:
+            self.remaining_time = snapshot.remaining_time
+        self.hint = None
+        self.sync_sprites(rebuild=True)
+        self.renderer.invalidate()
+
+    def undo(self, steps: int = 1) -> bool:
+        """復原 steps 步（棋盤穩定時才可以呼叫），重播記錄也一起退回；沒有足夠的歷史時回傳 False"""
+        entry = self.history.rewind(steps)
+        if entry is None:
+            return False
+        snapshot, replay_mark = entry
+        self.restore(snapshot, restore_time=False)
+        self.recorder.rewind(replay_mark)
+        return True
+
+    def update_moves(self) -> int:
+        """重新計算合法交換；死局時重新洗牌直到有可行的交換，回傳合法交換的數量"""
+        count = self.move_generator.update(self.board)
+        if count == 0:
+            self.reshuffle_board()
+            count = self.move_generator.update(self.board)
+        return count
+
+    def reshuffle_board(self) -> None:
+        """死局時打亂寶石（保證沒有現成的三連），並更新有變化的精靈"""
+        old_types = self.board.types.copy()
+        reshuffle_until_playable(self.board, self.move_generator, self.rng)
+
+        x0, x1, y0, y1 = self.sprite_range
+        for x in range(x0, x1):
+            for y in range(y0, y1):
+                if self.board.is_bomb(x, y) or self.board.types[x, y] == old_types[x, y]:
+                    continue
+                self.pool.release(self.all_gems[x][y])
+                self.new_sprite(x, y)
+        self.renderer.invalidate()
+
+    def drop_gems(self, dt: Optional[float] = None) -> bool:
+        """處理寶石下落，所有寶石同時下落 dt 秒（預設一個模擬刻）"""
         all_fixed = True
-        # 同時移動所有未固定的寶石
-        for x in range(GameConfig.NUMGRID):
-            for y in range(GameConfig.NUMGRID):
-                gem = self.get_gem_by_pos(x, y)
-                if not gem.fixed:
-                    gem.move()
-                    all_fixed = False
+        # 同時移動所有未固定的寶石（只有視野內的格子有精靈，視野外的寶石在棋盤上已經落定）
+        for gem in self.gems_group:
+            if not gem.fixed:
+                gem.move(dt)
+                all_fixed = False
         return all_fixed
 
     def check_matches(self) -> List[Union[int, List[int]]]:
-        """檢查是否有可消除的寶石"""
-        # 先檢查特殊形狀
-        for x in range(GameConfig.NUMGRID):
-            for y in range(GameConfig.NUMGRID):
-                # 跳過無效的檢查位置
-                if not self.is_valid_pos(x, y):
-                    continue
-                    
-                current_type = self.get_gem_by_pos(x, y).type
-
-                # 檢查T_UP (sss
-                #           s
-                #           s)
-                if (self.is_valid_pos(x + 2, y) and self.is_valid_pos(x + 1, y + 2)):
-                    try:
-                        if (all(self.get_gem_by_pos(x + i, y).type == current_type for i in range(3)) and
-                            self.get_gem_by_pos(x + 1, y + 1).type == current_type and
-                            self.get_gem_by_pos(x + 1, y + 2).type == current_type):
-                            return [3, x, y, 'T_UP']
-                    except IndexError:
-                        continue
-
-                # 檢查T_DOWN ( s
-                #             s
-                #           sss)
-                if (self.is_valid_pos(x + 2, y + 2) and self.is_valid_pos(x + 1, y)):
-                    try:
-                        if (self.get_gem_by_pos(x + 1, y).type == current_type and
-                            self.get_gem_by_pos(x + 1, y + 1).type == current_type and
-                            all(self.get_gem_by_pos(x + i, y + 2).type == current_type for i in range(3))):
-                            return [3, x, y, 'T_DOWN']
-                    except IndexError:
-                        continue
-
-                # 檢查T_LEFT (s
-                #           sss
-                #           s)
-                if (self.is_valid_pos(x, y + 2) and self.is_valid_pos(x + 2, y + 1)):
-                    try:
-                        if (self.get_gem_by_pos(x, y).type == current_type and
-                            all(self.get_gem_by_pos(x + i, y + 1).type == current_type for i in range(3)) and
-                            self.get_gem_by_pos(x, y + 2).type == current_type):
-                            return [3, x, y, 'T_LEFT']
-                    except IndexError:
-                        continue
-
-                # 檢查T_RIGHT (  s
-                #             sss
-                #               s)
-                if (self.is_valid_pos(x + 2, y + 2) and self.is_valid_pos(x + 2, y)):
-                    try:
-                        if (self.get_gem_by_pos(x + 2, y).type == current_type and
-                            all(self.get_gem_by_pos(x + i, y + 1).type == current_type for i in range(3)) and
-                            self.get_gem_by_pos(x + 2, y + 2).type == current_type):
-                            return [3, x, y, 'T_RIGHT']
-                    except IndexError:
-                        continue
-
-                # 檢查L_UP (s
-                #          s
-                #         sss)
-                if (self.is_valid_pos(x, y + 2) and self.is_valid_pos(x + 2, y + 2)):
-                    try:
-                        if (self.get_gem_by_pos(x, y).type == current_type and
-                            self.get_gem_by_pos(x, y + 1).type == current_type and
-                            all(self.get_gem_by_pos(x + i, y + 2).type == current_type for i in range(3))):
-                            return [4, x, y, 'L_UP']
-                    except IndexError:
-                        continue
-
-                # 檢查L_DOWN (sss
-                #             s
-                #             s)
-                if (self.is_valid_pos(x + 2, y) and self.is_valid_pos(x, y + 2)):
-                    try:
-                        if (all(self.get_gem_by_pos(x + i, y).type == current_type for i in range(3)) and
-                            self.get_gem_by_pos(x, y + 1).type == current_type and
-                            self.get_gem_by_pos(x, y + 2).type == current_type):
-                            return [4, x, y, 'L_DOWN']
-                        
-                    except IndexError:
-                        continue
-
-                # 檢查L_LEFT (  s
-                #              s
-                #            sss)
-                if (self.is_valid_pos(x + 2, y) and self.is_valid_pos(x, y+2)):
-                    try:
-                        tmp_current_type=self.get_gem_by_pos(x+2 , y).type
-                        if (self.get_gem_by_pos(x+2 , y).type == tmp_current_type and
-                            self.get_gem_by_pos(x+2 , y +1).type == tmp_current_type and
-                            all(self.get_gem_by_pos(x + i, y+2).type == tmp_current_type for i in range(3))):
-                            return [4, x, y, 'L_LEFT']
-                        
-                    except IndexError:
-                        continue
-
-                # 檢查L_RIGHT (sss
-                #               s
-                #               s)
-                if (self.is_valid_pos(x + 2, y + 2) and self.is_valid_pos(x + 2, y)):
-                    try:
-                        if (all(self.get_gem_by_pos(x + i, y).type == current_type for i in range(3)) and
-                            self.get_gem_by_pos(x + 2, y + 1).type == current_type and
-                            self.get_gem_by_pos(x + 2, y + 2).type == current_type):
-                            return [4, x, y, 'L_RIGHT']
-                    except IndexError:
-                        continue
-
-        # 檢查一般的直線消除
-        max_match = [0, 0, 0, 0]  # [方向, 起點x, 起點y, 最大匹配長度]
-        for x in range(GameConfig.NUMGRID):
-            for y in range(GameConfig.NUMGRID):
-                if not self.is_valid_pos(x, y):
-                    continue
-
-                # 檢查橫向
-                match_length = 1
-                for i in range(1, 5):
-                    if not self.is_valid_pos(x + i, y):
-                        break
-                    try:
-                        if self.get_gem_by_pos(x, y).type == self.get_gem_by_pos(x + i, y).type:
-                            match_length += 1
-                        else:
-                            break
-                    except IndexError:
-                        break
-                if match_length >= 3 and match_length > max_match[3]:
-                    max_match = [1, x, y, match_length]
-
-                # 檢查縱向
-                match_length = 1
-                for i in range(1, 5):
-                    if not self.is_valid_pos(x, y + i):
-                        break
-                    try:
-                        if self.get_gem_by_pos(x, y).type == self.get_gem_by_pos(x, y + i).type:
-                            match_length += 1
-                        else:
-                            break
-                    except IndexError:
-                        break
-                if match_length >= 3 and match_length > max_match[3]:
-                    max_match = [2, x, y, match_length]
+        """檢查是否有可消除的寶石（優先回傳特殊形狀，否則回傳最長的直線）"""
+        return select_match(self.find_all_matches())
 
-        return max_match
+    def find_all_matches(self) -> List[List[Union[int, str]]]:
+        """找出棋盤上所有的直線與 T/L 型消除（只重新掃描有變動的行列）"""
+        return self.matcher.find_matches(self.board)
 
     def _get_match_positions(self, res_match: List[Union[int, List[int]]]) -> List[Tuple[int, int]]:
         """獲取匹配位置列表"""
-        positions = []
-        base_x, base_y = res_match[1], res_match[2]
-    
-        if res_match[0] == 1:  # 橫向
-            positions = [(x, base_y) for x in range(base_x, base_x + res_match[3])]
-        elif res_match[0] == 2:  # 縱向
-            positions = [(base_x, y) for y in range(base_y, base_y + res_match[3])]
-        elif res_match[0] == 3:  # T型
-            if res_match[3] == 'T_UP':  # sss
-                #                         s
-                #                         s
-                positions = [
-                    (base_x, base_y), (base_x + 1, base_y), (base_x + 2, base_y),  # 頂部橫排
-                    (base_x + 1, base_y + 1),  # 中間
-                    (base_x + 1, base_y + 2)   # 底部
-                ]
-            elif res_match[3] == 'T_DOWN':  #  s
-                #                           s
-                #                         sss
-                positions = [
-                    (base_x + 1, base_y),     # 頂部
-                    (base_x + 1, base_y + 1),  # 中間
-                    (base_x, base_y + 2), (base_x + 1, base_y + 2), (base_x + 2, base_y + 2)  # 底部橫排
-                ]
-            elif res_match[3] == 'T_LEFT':  # s
-                #                          sss
-                #                          s
-                positions = [
-                    (base_x, base_y),      # 頂部
-                    (base_x, base_y + 1), (base_x + 1, base_y + 1), (base_x + 2, base_y + 1),  # 中間橫排
-                    (base_x, base_y + 2)   # 底部
-                ]
-            elif res_match[3] == 'T_RIGHT':  #   s
-                #                          sss
-                #                            s
-                positions = [
-                    (base_x + 2, base_y),   # 頂部
-                    (base_x, base_y + 1), (base_x + 1, base_y + 1), (base_x + 2, base_y + 1),  # 中間橫排
-                    (base_x + 2, base_y + 2)  # 底部
-                ]
-        elif res_match[0] == 4:  # L型
-            if res_match[3] == 'L_UP':  # s
-                #                       s
-                #                     sss
-                positions = [
-                    (base_x, base_y),     # 頂部
-                    (base_x, base_y + 1),  # 中間
-                    (base_x, base_y + 2), (base_x + 1, base_y + 2), (base_x + 2, base_y + 2)  # 底部橫排
-                ]
-            elif res_match[3] == 'L_DOWN':  # sss
-                #                           s
-                #                           s
-                positions = [
-                    (base_x, base_y), (base_x + 1, base_y), (base_x + 2, base_y),  # 頂部橫排
-                    (base_x, base_y + 1),  # 中間
-                    (base_x, base_y + 2)   # 底部
-                ]
-            elif res_match[3] == 'L_LEFT':  #   s
-                #                            s
-                #                          sss
-                positions = [
-                    (base_x + 2, base_y),     # 頂部
-                    (base_x + 2, base_y + 1),  # 中間
-                    (base_x, base_y + 2), (base_x + 1, base_y + 2), (base_x + 2, base_y + 2)  # 底部橫排
-                ]
-            elif res_match[3] == 'L_RIGHT':  # sss
-                #                             s
-                #                             s
-                positions = [
-                    (base_x, base_y), (base_x + 1, base_y), (base_x + 2, base_y),  # 頂部橫排
-                    (base_x + 2, base_y + 1),  # 中間
-                    (base_x + 2, base_y + 2)   # 底部
-                ]
-
-        return positions
+        return match_positions(res_match)
 
     def remove_matched(self, res_match: List[Union[int, List[int]]]) -> int:
-        """移除匹配的寶石並計算得分"""
+        """移除單一匹配的寶石並計算得分"""
         if res_match[0] == 0:
             return 0
+        return self.remove_matches([res_match])
 
-        # 獲取匹配位置
-        positions = self._get_match_positions(res_match)
-        is_special = res_match[0] in [3, 4]  # 是否是特殊形狀（T型或L型）
-        
-        # 計算得分和播放音效
-        if not is_special:  # 直線消除
-            match_length = res_match[3]
-            score = self.score_manager.add_score(match_length)
-            self.sound_manager.play_match_sound(match_length)
-        else:  # T型或L型消除
-            score = self.score_manager.add_score(5)
-            self.sound_manager.play_match_sound(5)
+    def remove_matches(self, matches: List[List[Union[int, str]]]) -> int:
+        """一次移除所有同時成立的消除（重疊的合併計算），只做一次重力與補充"""
+        groups = group_matches(matches)
+        if not groups:
+            return 0
+
+        # 計算得分，同一步只播放一次最大消除的音效
+        score = sum(self.score_manager.add_score(group.score_length) for group in groups)
+        self.sound_manager.play_match_sound(max(group.score_length for group in groups))
 
         # 移除寶石並更新計數
-        for x, y in positions:
-            gem = self.get_gem_by_pos(x, y)
-            if gem and not isinstance(gem, Bomb):  # 不移除炸彈
-                gem_type = int(''.join(filter(str.isdigit, gem.type)))
-                self.gem_count[gem_type] += 1
-                self.gems_group.remove(gem)
-                self.all_gems[x][y] = None
+        positions = [pos for group in groups for pos in group.positions]
+        self._remove_positions(positions)
 
         # 生成新的寶石
         self._generate_new_gems(positions)
 
-        # 如果是特殊形狀消除，等所有寶石下落後創建炸彈
-        if is_special:
-            # 選擇中間位置放置炸彈
-            bomb_x = sum(x for x, y in positions) // len(positions)
-            bomb_y = sum(y for x, y in positions) // len(positions)
-
-            # 等待所有寶石落下
-            waiting = True
-            while waiting:
-                waiting = False
-                for x in range(GameConfig.NUMGRID):
-                    for y in range(GameConfig.NUMGRID):
-                        gem = self.get_gem_by_pos(x, y)
-                        if gem and not gem.fixed:
-                            waiting = True
-                            gem.move()
-
-            # 創建炸彈
-            self.create_bomb(bomb_x, bomb_y)
+        # 如果有特殊形狀消除，等下落動畫播完（主迴圈中）再創建炸彈
+        for group in groups:
+            if group.bomb is not None:
+                self.defer_until_settled(lambda pos=group.bomb: self.create_bomb(*pos))
 
         return score
+
+    def defer_until_settled(self, action: Callable[[], None]) -> None:
+        """登記一個在所有寶石落定後、下一次消除檢查前執行的動作"""
+        self.settle_actions.append(action)
+
+    def run_settle_actions(self) -> None:
+        """寶石全部落定：依登記順序執行延後的動作（例如放置炸彈）"""
+        actions, self.settle_actions = self.settle_actions, []
+        for action in actions:
+            action()
     
     def create_bomb(self, x: int, y: int) -> None:
         """在指定位置創建炸彈"""
-        position = [
-            GameConfig.XMARGIN + x * GameConfig.GRIDSIZE,
-            GameConfig.YMARGIN + y * GameConfig.GRIDSIZE
-        ]
-        bomb = Bomb(position=position)
+        self.board.place_bomb(x, y)
 
         # 移除原有的寶石
-        original_gem = self.get_gem_by_pos(x, y)
-        if original_gem:
-            self.gems_group.remove(original_gem)
+        self.pool.release(self.get_gem_by_pos(x, y))
+        self.all_gems[x][y] = None
 
-        # 添加炸彈
-        self.gems_group.add(bomb)
-        self.all_gems[x][y] = bomb
+        # 添加炸彈（視野外只記錄在棋盤上）
+        if self.viewport.is_visible(x, y):
+            self.new_sprite(x, y)
     
     def process_bomb_explosion(self, bomb_x: int, bomb_y: int) -> None:
         """處理炸彈爆炸效果，包括連鎖爆炸"""
         print(f"Processing bomb at ({bomb_x}, {bomb_y})")
 
-        # 用於追蹤待處理的炸彈位置和所有受影響的位置
-        bombs_to_process = [(bomb_x, bomb_y)]
-        all_affected_positions = set()
-        affected_gems = []  # 儲存所有受影響的寶石，以便按正確順序處理
-        total_removed_count = 0
-
-        # 第一階段：收集所有受影響的位置和寶石
-        while bombs_to_process:
-            current_bomb_x, current_bomb_y = bombs_to_process.pop(0)
-            
-            # 獲取當前炸彈影響範圍內的所有位置
-            for dx in [1, 0, -1]:
-                for dy in [-1, 0, 1]:
-                    new_x, new_y = current_bomb_x + dx, current_bomb_y + dy
-                    if self.is_valid_pos(new_x, new_y) and (new_x, new_y) not in all_affected_positions:
-                        gem = self.get_gem_by_pos(new_x, new_y)
-                        if gem:
-                            affected_gems.append((new_x, new_y, gem))
-                            all_affected_positions.add((new_x, new_y))
-                            
-                            if isinstance(gem, Bomb):
-                                print(f"Found bomb at ({new_x}, {new_y})")
-                                bombs_to_process.append((new_x, new_y))
-
-        # 第二階段：按照由上到下、由左到右的順序處理寶石
-        affected_gems.sort(key=lambda x: (x[1], x[0]))  # 先按y座標（行），再按x座標（列）排序
-        
-        # 處理每個受影響的寶石
-        for x, y, gem in affected_gems:
-            try:
-                if not isinstance(gem, Bomb):
-                    gem_type = int(''.join(filter(str.isdigit, gem.type)))
-                    self.gem_count[gem_type] += 1
-                    total_removed_count += 1
-                
-                # 移除當前寶石
-                self.gems_group.remove(gem)
-                self.all_gems[x][y] = None
-                
-            except ValueError:
-                continue
+        # 在棋盤陣列上計算爆炸範圍（包含連鎖爆炸），結果已依行分組
+        blast = self.chain_reaction.resolve(self.board, bomb_x, bomb_y)
+        total_removed_count = self._remove_positions(blast.positions, blast.mask)
 
         # 計算總分數
         score = self.score_manager.add_score(total_removed_count)
@@ -618,211 +691,58 @@ class Game:
             self.sound_manager.play_match_sound(3)
 
         # 生成新的寶石
-        self._generate_new_gems(list(all_affected_positions))
-        
-    
+        self._apply_collapse(self.board.collapse_columns(blast.columns, self.rng))
+
+    def _remove_positions(self, positions: List[Tuple[int, int]], mask: Optional[np.ndarray] = None) -> int:
+        """從棋盤與精靈群組移除指定格子，更新計數並回傳移除的寶石數（不含炸彈）；有 mask 時以向量化方式清空棋盤"""
+        removed = self.board.remove(positions) if mask is None else self.board.remove_mask(mask)
+        for gem_type, count in removed.items():
+            self.gem_count[gem_type] += count
+        for x, y in positions:
+            gem = self.all_gems[x][y]
+            if gem:
+                self.pool.release(gem)
+                self.all_gems[x][y] = None
+        return sum(removed.values())
+
     def is_valid_pos(self, x: int, y: int) -> bool:
         """檢查位置是否在網格範圍內"""
         return 0 <= x < GameConfig.NUMGRID and 0 <= y < GameConfig.NUMGRID
     
     
     
-    def generate_new_gems(self, res_match: List[Union[int, List[int]]]) -> None:
-        """生成新的寶石"""
-        def remove_gem(x: int, y: int) -> None:
-            """移除指定位置的寶石"""
-            gem = self.get_gem_by_pos(x, y)
-            self.gems_group.remove(gem)
-            self.all_gems[x][y] = None
-
-        def create_new_gem(x: int, position: Position, downlen: int) -> None:
-            """創建新的寶石"""
-            gem = Puzzle(
-                img_path=random.choice(self.gem_imgs),
-                size=(GameConfig.GRIDSIZE, GameConfig.GRIDSIZE),
-                position=position,
-                downlen=downlen
-            )
-            self.gems_group.add(gem)
-            self.all_gems[x][0] = gem
-
-        if res_match[0] in [1, 2]:  # 直線消除
-            if res_match[0] == 1:  # 橫向消除
-                # 移除匹配的寶石
-                for x in range(res_match[1], res_match[1] + res_match[3]):
-                    remove_gem(x, res_match[2])
-                    
-                # 上方的寶石下落
-                for x in range(res_match[1], res_match[1] + res_match[3]):
-                    for y in range(res_match[2] - 1, -1, -1):
-                        if y >= 0:
-                            gem = self.get_gem_by_pos(x, y)
-                            gem.target_y += GameConfig.GRIDSIZE
-                            gem.fixed = False
-                            gem.direction = 'down'
-                            self.all_gems[x][y + 1] = gem
-                        else:
-                            # 在頂部生成新寶石
-                            create_new_gem(x, 
-                                [GameConfig.XMARGIN + x * GameConfig.GRIDSIZE, 
-                                 GameConfig.YMARGIN - GameConfig.GRIDSIZE], 
-                                GameConfig.GRIDSIZE)
-
-            else:  # 縱向消除
-                # 移除匹配的寶石
-                for y in range(res_match[2], res_match[2] + res_match[3]):
-                    remove_gem(res_match[1], y)
-                
-                # 創建新寶石
-                for i in range(res_match[3]):
-                    create_new_gem(res_match[1], 
-                        [GameConfig.XMARGIN + res_match[1] * GameConfig.GRIDSIZE, 
-                         GameConfig.YMARGIN - (i + 1) * GameConfig.GRIDSIZE], 
-                        (i + 1) * GameConfig.GRIDSIZE)
-
-        elif res_match[0] == 3:  # T型消除
-            positions = []
-            if res_match[3] == 'T_DOWN':  # 正T
-                positions = [
-                    (res_match[1], res_match[2]),      # 左上
-                    (res_match[1] + 1, res_match[2]),  # 中上
-                    (res_match[1] + 2, res_match[2]),  # 右上
-                    (res_match[1] + 1, res_match[2] + 1)  # 中下
-                ]
-            elif res_match[3] == 'T_UP':  # 倒T
-                positions = [
-                    (res_match[1], res_match[2] + 1),      # 左下
-                    (res_match[1] + 1, res_match[2]),      # 中上
-                    (res_match[1] + 1, res_match[2] + 1),  # 中下
-                    (res_match[1] + 2, res_match[2] + 1)   # 右下
-                ]
-            elif res_match[3] == 'T_RIGHT':  # 右T
-                positions = [
-                    (res_match[1], res_match[2]),      # 左上
-                    (res_match[1], res_match[2] + 1),  # 左中
-                    (res_match[1], res_match[2] + 2),  # 左下
-                    (res_match[1] + 1, res_match[2] + 1)  # 右中
-                ]
-            elif res_match[3] == 'T_LEFT':  # 左T
-                positions = [
-                    (res_match[1] + 1, res_match[2]),      # 右上
-                    (res_match[1] + 1, res_match[2] + 1),  # 右中
-                    (res_match[1] + 1, res_match[2] + 2),  # 右下
-                    (res_match[1], res_match[2] + 1)       # 左中
-                ]
-
-            # 移除匹配的寶石
-            for x, y in positions:
-                remove_gem(x, y)
-
-            # 處理每一列的下落
-            affected_columns = set(x for x, y in positions)
-            for x in affected_columns:
-                # 找出這一列中最高的被消除的位置
-                min_y = min(y for px, y in positions if px == x)
-                # 處理這一列上方的所有寶石
-                empty_spaces = sum(1 for px, y in positions if px == x)
-                for y in range(min_y - 1, -1, -1):
-                    gem = self.get_gem_by_pos(x, y)
-                    gem.target_y += GameConfig.GRIDSIZE * empty_spaces
-                    gem.fixed = False
-                    gem.direction = 'down'
-                    self.all_gems[x][y + empty_spaces] = gem
-
-                # 在頂部生成新寶石
-                for i in range(empty_spaces):
-                    create_new_gem(x, 
-                        [GameConfig.XMARGIN + x * GameConfig.GRIDSIZE, 
-                         GameConfig.YMARGIN - (i + 1) * GameConfig.GRIDSIZE], 
-                        (i + 1) * GameConfig.GRIDSIZE)
-
-        elif res_match[0] == 4:  # L型消除
-            positions = [
-                (res_match[1], res_match[2]),      # 左上
-                (res_match[1] + 1, res_match[2]),  # 右上
-                (res_match[1], res_match[2] + 1),  # 左中
-                (res_match[1], res_match[2] + 2)   # 左下
-            ]
-
-            # 處理方式與 T 型相同
-            for x, y in positions:
-                remove_gem(x, y)
-
-            affected_columns = set(x for x, y in positions)
-            for x in affected_columns:
-                min_y = min(y for px, y in positions if px == x)
-                empty_spaces = sum(1 for px, y in positions if px == x)
-                for y in range(min_y - 1, -1, -1):
-                    gem = self.get_gem_by_pos(x, y)
-                    gem.target_y += GameConfig.GRIDSIZE * empty_spaces
-                    gem.fixed = False
-                    gem.direction = 'down'
-                    self.all_gems[x][y + empty_spaces] = gem
-
-                for i in range(empty_spaces):
-                    create_new_gem(x, 
-                        [GameConfig.XMARGIN + x * GameConfig.GRIDSIZE, 
-                         GameConfig.YMARGIN - (i + 1) * GameConfig.GRIDSIZE], 
-                        (i + 1) * GameConfig.GRIDSIZE)
-                                    
-                                    
     def _generate_new_gems(self, removed_positions: List[Tuple[int, int]]) -> None:
-        """生成新的寶石，修復掉落順序問題"""
-        # 按列分組要處理的位置
-        columns = {}
-        for x, y in removed_positions:
-            if x not in columns:
-                columns[x] = []
-            columns[x].append(y)
-
-        # 處理每一列
-        for x in columns:
-            removed_ys = sorted(columns[x])  # 排序以確保從上到下處理
-            
-            # 1. 找出該列中所有需要下移的現有寶石
-            moves = []  # 存儲需要移動的寶石信息：(from_y, to_y, gem)
-            empty_slots = []  # 記錄所有空位
-            
-            # 從底部開始向上遍歷
-            for y in range(GameConfig.NUMGRID - 1, -1, -1):
-                if y in removed_ys:
-                    empty_slots.append(y)
-                elif self.all_gems[x][y] is not None and empty_slots:
-                    # 將寶石移到最下面的空位
-                    target_y = empty_slots.pop(0)
-                    moves.append((y, target_y, self.all_gems[x][y]))
-                    empty_slots.append(y)  # 當前位置變成空位
-
-            # 2. 執行移動
-            for from_y, to_y, gem in moves:
-                # 更新寶石目標位置
-                gem.target_y = GameConfig.YMARGIN + to_y * GameConfig.GRIDSIZE
-                gem.fixed = False
-                gem.direction = 'down'
-                # 更新網格引用
-                self.all_gems[x][to_y] = gem
-                self.all_gems[x][from_y] = None
-
-            # 3. 在頂部生成新寶石
-            for i, empty_y in enumerate(empty_slots):
+        """套用重力並補充新寶石，精靈依照棋盤的變化移動"""
+        self._apply_collapse(self.board.collapse(removed_positions, self.rng))
+
+    def _apply_collapse(self, changes: ColumnChanges) -> None:
+        """依照棋盤每一行的變化移動精靈並建立新寶石（視野外的格子只在棋盤上結算，不處理精靈）"""
+        x0, x1, y0, y1 = self.sprite_range
+        for x, (moves, spawns) in changes.items():
+            if not x0 <= x < x1:
+                continue
+            column = self.all_gems[x]
+
+            # 1. 現有寶石往下移動（先取出再放回，避免互相覆蓋）
+            moving = [(to_y, column[from_y]) for from_y, to_y in moves]
+            for from_y, _ in moves:
+                column[from_y] = None
+            entering = []  # 從視野上方進入的格子
+            for to_y, gem in moving:
+                if not y0 <= to_y < y1:
+                    # 落到視野下方：精靈不再需要
+                    self.pool.release(gem)
+                elif gem is None:
+                    entering.append(to_y)
+                else:
+                    gem.target_y = self.viewport.cell_pos(x, to_y)[1]
+                    gem.fixed = False
+                    gem.direction = Direction.DOWN
+                    column[to_y] = gem
+
+            # 2. 新寶石與從視野上方落下的寶石，由下往上排列在視野頂部上方
+            entering.extend(empty_y for empty_y, _ in spawns if y0 <= empty_y < y1)
+            entering.sort(reverse=True)
+            for i, to_y in enumerate(entering):
                 # 計算起始位置，使其在畫面頂部上方
-                start_y = GameConfig.YMARGIN - (i + 1) * GameConfig.GRIDSIZE
-                target_y = GameConfig.YMARGIN + empty_y * GameConfig.GRIDSIZE
-                
-                # 創建新寶石
-                new_gem = Puzzle(
-                    img_path=random.choice(self.gem_imgs),
-                    size=(GameConfig.GRIDSIZE, GameConfig.GRIDSIZE),
-                    position=[
-                        GameConfig.XMARGIN + x * GameConfig.GRIDSIZE,
-                        start_y
-                    ],
-                    downlen=abs(target_y - start_y)
-                )
-                new_gem.target_y = target_y
-                new_gem.fixed = False
-                new_gem.direction = 'down'
-                
-                # 添加到遊戲中
-                self.gems_group.add(new_gem)
-                self.all_gems[x][empty_y] = new_gem
\ No newline at end of file
+                self.new_sprite(x, to_y, self.viewport.cell_pos(x, y0 - (i + 1)))
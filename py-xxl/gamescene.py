@@ -6,6 +6,9 @@ import random
 from typing import Tuple, List, Dict, Union, Optional
 from setting import GameConfig
 from game import Game
+from atlas import sprite_atlas
+from assets import assets, load_font
+from profiler import startup_profiler
 
 # 定義常用的類型
 Position = Tuple[int, int]
@@ -14,13 +17,22 @@ Size = Tuple[int, int]
 # 遊戲場景類
 class GameScene:
     def __init__(self):
-        pygame.init()
-        pygame.mixer.init()
-        self.screen = pygame.display.set_mode((GameConfig.WIDTH, GameConfig.HEIGHT))
-        pygame.display.set_caption('2024_PyGame_Final_Project')
+        # 只初始化畫面與字型；混音器在第一次播放音效時才初始化（見 SoundManager）
+        with startup_profiler.phase('pygame init'):
+            pygame.display.init()
+            pygame.font.init()
+        with startup_profiler.phase('set_mode'):
+            self.screen = pygame.display.set_mode((GameConfig.WIDTH, GameConfig.HEIGHT))
+            pygame.display.set_caption('2024_PyGame_Final_Project')
         
-        self.font = pygame.font.SysFont('Arial', 35, bold=True)
-        self.font_end = pygame.font.SysFont('Arial', 50, bold=True)
+        # 字型（指定 FONT_PATH 時直接載入字型檔，不必掃描系統字型）
+        with startup_profiler.phase('fonts'):
+            self.font = load_font(35)
+            self.font_end = load_font(50)
+
+        # 背景執行緒解碼所有場景圖片；只等開始畫面需要的，其餘在背景繼續
+        with startup_profiler.phase('first scene assets'):
+            self.show_loading_screen(['start_background'])
         
         # 載入寶石圖片
         self.gem_imgs = [
@@ -28,13 +40,54 @@ class GameScene:
             for i in range(1, 8)
         ]
         
-        self.game = Game(self.screen, self.font, self.gem_imgs)
+        self._game: Optional[Game] = None  # 第一次用到時才建立（棋盤與精靈不在啟動的關鍵路徑上）
         self.max_level = 3
 
+    @property
+    def game(self) -> Game:
+        """遊戲物件，第一次用到時才建立"""
+        if self._game is None:
+            with startup_profiler.phase('game'):
+                self._game = Game(self.screen, self.font, self.gem_imgs, GameConfig.SEED)
+            print(f"Game seed: {self._game.seed}")  # 調試輸出
+        return self._game
+
+    @property
+    def rng(self) -> random.Random:
+        """分數調整與卡片使用的亂數（與遊戲共用同一個種子）"""
+        return self.game.session_rng
+
+    def show_loading_screen(self, names: List[str]) -> None:
+        """開始在背景解碼所有場景圖片，並顯示載入畫面（進度條與跳動的點）直到 names 都已載入"""
+        clock = pygame.time.Clock()  # 同時初始化計時器，之後 get_ticks 才有效
+        assets.start()
+        bar = pygame.Rect(0, 0, GameConfig.WIDTH // 2, 16)
+        bar.center = (GameConfig.WIDTH // 2, GameConfig.HEIGHT // 2 + 40)
+        text = self.font.render('Loading', True, (255, 255, 255))
+        text_rect = text.get_rect(center=(GameConfig.WIDTH // 2, GameConfig.HEIGHT // 2 - 20))
+
+        while assets.progress(names) < 1:
+            assets.poll()
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    sys.exit()
+
+            self.screen.fill((20, 20, 30))
+            self.screen.blit(text, text_rect)
+            # 文字後面三個依序跳動的點
+            ticks = pygame.time.get_ticks()
+            for i in range(3):
+                offset = int(6 * math.sin(ticks / 150 - i))
+                pygame.draw.circle(self.screen, (255, 255, 255), (text_rect.right + 12 + i * 14, text_rect.bottom - 8 + offset), 4)
+            pygame.draw.rect(self.screen, (80, 80, 90), bar, 2)
+            pygame.draw.rect(self.screen, (45, 255, 245), (bar.left, bar.top, int(bar.width * assets.progress(names)), bar.height))
+            pygame.display.update()
+            clock.tick(60)
+
     def show_start_screen(self) -> None:
         """顯示開始畫面"""
-        bg_image = pygame.image.load(os.path.join(GameConfig.ROOTDIR, 'resources/images/background.JPG'))
-        bg_image = pygame.transform.scale(bg_image, (GameConfig.WIDTH, GameConfig.HEIGHT))
+        bg_image = assets.get('start_background')
         
         waiting = True
         while waiting:
@@ -45,6 +98,9 @@ class GameScene:
             self.screen.blit(start_text, start_rect)
             
             pygame.display.update()
+            startup_profiler.first_interactive_frame()
+            # 其餘場景圖片在背景解碼完成後轉成顯示格式
+            assets.poll()
             
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -59,8 +115,7 @@ class GameScene:
         clock = pygame.time.Clock()
         
         # 載入背景
-        bg_image = pygame.image.load(os.path.join(GameConfig.ROOTDIR, 'resources/images/level_background.jpg'))
-        bg_image = pygame.transform.scale(bg_image, (GameConfig.WIDTH, GameConfig.HEIGHT))
+        bg_image = assets.get('level_background')
         
         # 卡片參數
         card_width = 320
@@ -86,7 +141,7 @@ class GameScene:
         animation_completed = False
         
         running = True
-        othercard = (random.randint(-2, 5))*10
+        othercard = (self.rng.randint(-2, 5))*10
 
         while running:
             current_time = pygame.time.get_ticks()
@@ -172,14 +227,13 @@ class GameScene:
         
         self.screen.blit(overlay, (0, 0))
         self.screen.blit(message_text, message_rect)
-        othercard = (random.randint(-2, 5))*10
+        othercard = (self.rng.randint(-2, 5))*10
         pygame.display.update()
         pygame.time.wait(2500)  # 顯示3秒
 
     def show_end_screen(self, score: int) -> bool:
         """顯示遊戲結束畫面"""
-        bg_image = pygame.image.load(os.path.join(GameConfig.ROOTDIR, 'resources/images/endgame.JPG'))
-        bg_image = pygame.transform.scale(bg_image, (GameConfig.WIDTH, GameConfig.HEIGHT))
+        bg_image = assets.get('end_background')
         
         while True:
             for event in pygame.event.get():
@@ -196,8 +250,7 @@ class GameScene:
 
     def show_victory_screen(self, score: int) -> None:
         """顯示遊戲勝利畫面"""
-        bg_image = pygame.image.load(os.path.join(GameConfig.ROOTDIR, 'resources/images/victory.JPG'))
-        bg_image = pygame.transform.scale(bg_image, (GameConfig.WIDTH, GameConfig.HEIGHT))
+        bg_image = assets.get('victory_background')
         
         while True:
             for event in pygame.event.get():
@@ -220,6 +273,12 @@ class GameScene:
             score = self.game.start(level)
             print(f"Level {level} completed with score: {score}")  # 調試輸出
             print(f"Target score was: {self.game.score_manager.get_level_target(level)}")  # 調試輸出
+            if GameConfig.PROFILE:
+                # 效能分析模式才輸出快取統計
+                print(f"Sprite atlas: {sprite_atlas.stats()}")  # 調試輸出
+                print(f"Sprite pool: {self.game.pool.stats()}")  # 調試輸出
+                print(f"Assets: {assets.stats()}")  # 調試輸出
+                print(f"Sound: {self.game.sound_manager.stats()}")  # 調試輸出
             
             # 檢查是否達到目標分數
             if score >= self.game.score_manager.get_level_target(level):
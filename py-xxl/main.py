@@ -1,13 +1,35 @@
-from typing import Tuple, List, Dict, Union, Optional
-from gamescene import GameScene
-# 定義常用的類型
-Position = Tuple[int, int]
-Size = Tuple[int, int]
-
-def main():
-    """主程序"""
-    game_scene = GameScene()
-    game_scene.run()
-
-if __name__ == '__main__':
+import time
+START_TIME = time.perf_counter()  # 啟動計時的起點（載入 pygame 與 numpy 之前）
+
+import argparse
+from typing import Tuple, List, Dict, Union, Optional
+from setting import GameConfig
+from profiler import startup_profiler
+from gamescene import GameScene
+# 定義常用的類型
+Position = Tuple[int, int]
+Size = Tuple[int, int]
+
+def main():
+    """主程序"""
+    parser = argparse.ArgumentParser(description='2024_PyGame_Final_Project')
+    parser.add_argument('--seed', type=int, default=None, help='reproduce a session with this seed')
+    parser.add_argument('--replay-dir', default=None, help='save a replay of every level to this folder')
+    parser.add_argument('--mega-board', type=int, default=None, metavar='N',
+                        help='play on an NxN board (e.g. 50-200) with a scrollable, zoomable view')
+    parser.add_argument('--startup-profile', action='store_true',
+                        help='print how long each startup phase took once the first screen is shown')
+    args = parser.parse_args()
+    startup_profiler.begin(START_TIME, 'imports')
+    if args.startup_profile:
+        GameConfig.STARTUP_PROFILE = True
+    GameConfig.SEED = args.seed
+    GameConfig.REPLAY_DIR = args.replay_dir
+    if args.mega_board:
+        GameConfig.set_mega_board(args.mega_board)
+
+    game_scene = GameScene()
+    game_scene.run()
+
+if __name__ == '__main__':
     main()
\ No newline at end of file
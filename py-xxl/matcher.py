@@ -0,0 +1,258 @@
+import numpy as np
+from typing import Tuple, List, Dict, Union, Optional
+from board import EMPTY
+
+# 定義常用的類型
+Position = Tuple[int, int]
+Match = List[Union[int, str]]  # [種類, 起點x, 起點y, 長度或形狀名稱]
+
+# 消除種類
+MATCH_NONE = 0
+MATCH_HORIZONTAL = 1
+MATCH_VERTICAL = 2
+MATCH_T = 3
+MATCH_L = 4
+
+# 特殊形狀：名稱 -> (種類, 在 3x3 範圍內的格子偏移)
+SHAPES: Dict[str, Tuple[int, Tuple[Position, ...]]] = {
+    'T_UP': (MATCH_T, ((0, 0), (1, 0), (2, 0), (1, 1), (1, 2))),      # sss / .s. / .s.
+    'T_DOWN': (MATCH_T, ((1, 0), (1, 1), (0, 2), (1, 2), (2, 2))),    # .s. / .s. / sss
+    'T_LEFT': (MATCH_T, ((0, 0), (0, 1), (1, 1), (2, 1), (0, 2))),    # s.. / sss / s..
+    'T_RIGHT': (MATCH_T, ((2, 0), (0, 1), (1, 1), (2, 1), (2, 2))),   # ..s / sss / ..s
+    'L_UP': (MATCH_L, ((0, 0), (0, 1), (0, 2), (1, 2), (2, 2))),      # s.. / s.. / sss
+    'L_DOWN': (MATCH_L, ((0, 0), (1, 0), (2, 0), (0, 1), (0, 2))),    # sss / s.. / s..
+    'L_LEFT': (MATCH_L, ((2, 0), (2, 1), (0, 2), (1, 2), (2, 2))),    # ..s / ..s / sss
+    'L_RIGHT': (MATCH_L, ((0, 0), (1, 0), (2, 0), (2, 1), (2, 2))),   # sss / ..s / ..s
+}
+SHAPE_NAMES = list(SHAPES)
+SHAPE_KINDS = [kind for kind, _ in SHAPES.values()]
+# 每個形狀在攤平 3x3 範圍 (dx * 3 + dy) 中的索引，形狀 (8, 5)
+SHAPE_CELLS = np.array([[dx * 3 + dy for dx, dy in cells] for _, cells in SHAPES.values()])
+OFFSETS_X = np.repeat(np.arange(3), 3)  # 攤平 3x3 範圍對應的 dx
+OFFSETS_Y = np.tile(np.arange(3), 3)    # 攤平 3x3 範圍對應的 dy
+
+NO_MATCH: Match = [MATCH_NONE, 0, 0, 0]
+
+# 每個特殊形狀都是一條橫向三連加一條縱向三連（共用一格）：形狀 -> (橫向三連起點, 縱向三連起點) 在 3x3 範圍內的偏移
+SHAPE_PARTS: List[Tuple[Position, Position]] = [
+    ((0, 0), (1, 0)),  # T_UP
+    ((0, 2), (1, 0)),  # T_DOWN
+    ((0, 1), (0, 0)),  # T_LEFT
+    ((0, 1), (2, 0)),  # T_RIGHT
+    ((0, 2), (0, 0)),  # L_UP
+    ((0, 0), (0, 0)),  # L_DOWN
+    ((0, 2), (2, 0)),  # L_LEFT
+    ((0, 0), (2, 0)),  # L_RIGHT
+]
+
+
+def _runs(lines: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """找出每一行中長度 >= 3 的連續相同寶石，回傳 (行索引, 起點, 長度)"""
+    num_lines, length = lines.shape
+    # 每行結尾補上哨兵值，攤平後一次找出所有連續區段
+    padded = np.full((num_lines, length + 1), -1, dtype=np.int16)
+    padded[:, :length] = lines
+    flat = padded.ravel()
+    starts = np.flatnonzero(np.concatenate(([True], flat[1:] != flat[:-1])))
+    lengths = np.diff(np.append(starts, flat.size))
+    keep = (lengths >= 3) & (flat[starts] != EMPTY) & (flat[starts] != -1)
+    starts, lengths = starts[keep], lengths[keep]
+    return starts // (length + 1), starts % (length + 1), lengths
+
+
+def find_lines(types: np.ndarray) -> List[Match]:
+    """找出所有橫向與縱向的直線消除，依掃描順序 (x, y, 橫向優先) 排列"""
+    hy, hx, hlen = _runs(types.T)  # 橫向：每一行固定 y
+    vx, vy, vlen = _runs(types)    # 縱向：每一列固定 x
+    xs = np.concatenate((hx, vx))
+    ys = np.concatenate((hy, vy))
+    kinds = np.concatenate((np.full(len(hx), MATCH_HORIZONTAL), np.full(len(vx), MATCH_VERTICAL)))
+    lengths = np.concatenate((hlen, vlen))
+    order = np.lexsort((kinds, ys, xs))
+    return [[int(kinds[i]), int(xs[i]), int(ys[i]), int(lengths[i])] for i in order]
+
+
+def _shape_hits(patches: np.ndarray) -> np.ndarray:
+    """patches 的最後一維為攤平的 3x3 範圍，回傳每個形狀是否成立 (..., 8)"""
+    cells = patches[..., SHAPE_CELLS]  # (..., 8, 5)
+    first = cells[..., :1]
+    return (first[..., 0] != EMPTY) & (cells == first).all(axis=-1)
+
+
+def find_shapes(types: np.ndarray) -> List[Match]:
+    """找出所有 T 型與 L 型消除，依掃描順序 (x, y, 形狀順序) 排列"""
+    width, height = types.shape[0] - 2, types.shape[1] - 2
+    if width <= 0 or height <= 0:
+        return []
+
+    hits = np.empty((len(SHAPES), width, height), dtype=bool)
+    for index, (_, cells) in enumerate(SHAPES.values()):
+        ax, ay = cells[0]
+        base = types[ax:ax + width, ay:ay + height]
+        mask = hits[index]
+        np.not_equal(base, EMPTY, out=mask)
+        for cx, cy in cells[1:]:
+            mask &= types[cx:cx + width, cy:cy + height] == base
+    # 轉置後 np.nonzero 依 (x, y, 形狀) 的字典順序回傳，正好是掃描順序
+    xs, ys, shapes = np.nonzero(hits.transpose(1, 2, 0))
+    return [[SHAPE_KINDS[i], int(x), int(y), SHAPE_NAMES[i]] for x, y, i in zip(xs, ys, shapes.tolist())]
+
+
+def find_matches(types: np.ndarray) -> List[Match]:
+    """一次找出棋盤上所有的消除：先列出所有特殊形狀，再列出所有直線"""
+    return find_shapes(types) + find_lines(types)
+
+
+def find_matches_small(types: np.ndarray) -> List[Match]:
+    """find_matches() 的純 Python 版本，結果與順序完全相同"""
+    shapes, lines = _scan_small(types)
+    return shapes + lines
+
+
+def _scan_small(types: np.ndarray) -> Tuple[List[Match], List[Match]]:
+    """純 Python 掃描，回傳 (特殊形狀, 直線)，各自依掃描順序排列
+
+    小棋盤上每個 NumPy 呼叫的固定成本比實際計算大得多；轉成串列後逐格掃描，
+    直線掃描時順便記錄所有三連的起點，特殊形狀只需要在這些起點附近查表。
+    """
+    grid = types.tolist()
+    width, height = len(grid), len(grid[0]) if grid else 0
+    lines: List[Match] = []
+    h3, v3 = set(), set()  # 橫向與縱向三連的起點
+    for y in range(height):
+        x = 0
+        while x < width:
+            gem_type, end = grid[x][y], x + 1
+            while end < width and grid[end][y] == gem_type:
+                end += 1
+            if end - x >= 3 and gem_type != EMPTY:
+                lines.append([MATCH_HORIZONTAL, x, y, end - x])
+                h3.update((i, y) for i in range(x, end - 2))
+            x = end
+    for x in range(width):
+        column, y = grid[x], 0
+        while y < height:
+            gem_type, end = column[y], y + 1
+            while end < height and column[end] == gem_type:
+                end += 1
+            if end - y >= 3 and gem_type != EMPTY:
+                lines.append([MATCH_VERTICAL, x, y, end - y])
+                v3.update((x, i) for i in range(y, end - 2))
+            y = end
+    lines.sort(key=lambda m: (m[1], m[2], m[0]))
+
+    shapes: List[Match] = []
+    if h3 and v3:
+        for start_x, start_y in h3:
+            for index, ((hx, hy), (vx, vy)) in enumerate(SHAPE_PARTS):
+                x, y = start_x - hx, start_y - hy
+                if 0 <= x < width - 2 and 0 <= y < height - 2 and (x + vx, y + vy) in v3:
+                    shapes.append([SHAPE_KINDS[index], x, y, SHAPE_NAMES[index]])
+        shapes.sort(key=lambda m: (m[1], m[2], SHAPE_NAMES.index(m[3])))
+    return shapes, lines
+
+
+def select_match(matches: List[Match]) -> Match:
+    """依照原本的優先順序選出一個消除：第一個特殊形狀，否則最長的直線"""
+    best = NO_MATCH
+    for match in matches:
+        if match[0] in (MATCH_T, MATCH_L):
+            return match
+        if match[3] > best[3]:
+            best = match
+    return best
+
+
+def match_positions(match: Match) -> List[Position]:
+    """取得消除所包含的格子"""
+    kind, base_x, base_y = match[0], match[1], match[2]
+    if kind == MATCH_HORIZONTAL:
+        return [(x, base_y) for x in range(base_x, base_x + match[3])]
+    if kind == MATCH_VERTICAL:
+        return [(base_x, y) for y in range(base_y, base_y + match[3])]
+    if kind in (MATCH_T, MATCH_L):
+        return [(base_x + dx, base_y + dy) for dx, dy in SHAPES[match[3]][1]]
+    return []
+
+
+# 增量消除檢查類
+class IncrementalMatcher:
+    """只重新檢查棋盤上有變動的行、列，以及 T/L 型所需的 3x3 鄰近範圍
+
+    結果與完整掃描 find_matches() 完全相同；validate 為 True 時每次都會以完整掃描核對。
+    不超過 SMALL_BOARD 的棋盤每次直接以 find_matches_small() 完整掃描，比增量更新的 NumPy 成本低。
+    """
+    SMALL_BOARD = 20  # 約 24x24 以上增量更新才比純 Python 完整掃描快
+    def __init__(self, validate: bool = False):
+        self.validate = validate
+        self.board = None
+        self.lines: List[Match] = []
+        self.shapes: List[Match] = []
+
+    def reset(self) -> None:
+        """丟棄快取，下一次呼叫時重新完整掃描"""
+        self.board = None
+
+    def clone(self, board) -> 'IncrementalMatcher':
+        """複製快取給 board（必須是 self.board 的副本，包含 dirty 遮罩），省去第一次完整掃描"""
+        matcher = IncrementalMatcher(self.validate)
+        if self.board is not None:
+            matcher.board = board
+            matcher.lines = list(self.lines)
+            matcher.shapes = list(self.shapes)
+        return matcher
+
+    def find_matches(self, board) -> List[Match]:
+        """回傳棋盤上所有的消除，順序與 find_matches() 相同"""
+        if board.types.shape[0] <= self.SMALL_BOARD and board.types.shape[1] <= self.SMALL_BOARD:
+            if board is not self.board or board.dirty.any():
+                self.board = board
+                self.shapes, self.lines = _scan_small(board.types)
+        elif board is not self.board:
+            # 新的棋盤：完整掃描一次
+            self.board = board
+            self.shapes = find_shapes(board.types)
+            self.lines = find_lines(board.types)
+        elif board.dirty.any():
+            self._update(board.types, board.dirty)
+        board.clear_dirty()
+
+        matches = self.shapes + self.lines
+        if self.validate:
+            full = find_matches(board.types)
+            if full != matches:
+                raise AssertionError(f'Incremental matches differ from full scan: {matches} != {full}')
+        return matches
+
+    def _update(self, types: np.ndarray, dirty: np.ndarray) -> None:
+        """重新掃描受影響的行列與 3x3 範圍"""
+        dirty_xs = np.flatnonzero(dirty.any(axis=1))  # 有變動的列（縱向直線）
+        dirty_ys = np.flatnonzero(dirty.any(axis=0))  # 有變動的行（橫向直線）
+        xs_set, ys_set = set(dirty_xs.tolist()), set(dirty_ys.tolist())
+
+        # 直線：丟棄位於變動行列上的舊結果，只重新掃描這些行列
+        lines = [m for m in self.lines
+                 if not ((m[0] == MATCH_HORIZONTAL and m[2] in ys_set) or
+                         (m[0] == MATCH_VERTICAL and m[1] in xs_set))]
+        hy, hx, hlen = _runs(types.T[dirty_ys])
+        lines.extend([MATCH_HORIZONTAL, int(x), int(dirty_ys[i]), int(n)] for i, x, n in zip(hy, hx, hlen))
+        vx, vy, vlen = _runs(types[dirty_xs])
+        lines.extend([MATCH_VERTICAL, int(dirty_xs[i]), int(y), int(n)] for i, y, n in zip(vx, vy, vlen))
+        lines.sort(key=lambda m: (m[1], m[2], m[0]))
+        self.lines = lines
+
+        # 特殊形狀：3x3 範圍內有變動格子的起點都要重新檢查
+        width, height = types.shape[0] - 2, types.shape[1] - 2
+        if width <= 0 or height <= 0:
+            return
+        windows = np.zeros((width, height), dtype=bool)
+        for dx in range(3):
+            for dy in range(3):
+                windows |= dirty[dx:dx + width, dy:dy + height]
+        shapes = [m for m in self.shapes if not windows[m[1], m[2]]]
+        ox, oy = np.nonzero(windows)
+        patches = types[(ox[:, None] + OFFSETS_X), (oy[:, None] + OFFSETS_Y)]
+        cand, index = np.nonzero(_shape_hits(patches))
+        shapes.extend([SHAPE_KINDS[i], int(ox[c]), int(oy[c]), SHAPE_NAMES[i]] for c, i in zip(cand, index.tolist()))
+        shapes.sort(key=lambda m: (m[1], m[2], SHAPE_NAMES.index(m[3])))
+        self.shapes = shapes
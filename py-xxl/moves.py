@@ -0,0 +1,120 @@
+import numpy as np
+from typing import Tuple, List, Dict, Union, Optional
+from board import Board, EMPTY, SPECIAL_NONE, SPECIAL_BOMB
+
+# 定義常用的類型
+Position = Tuple[int, int]
+Action = Tuple[Position, Position]
+Offset = Tuple[int, int]
+
+PAD = 2  # 棋盤外圍補上的格數，樣式偏移最多兩格
+
+
+def _move_patterns(direction: Offset) -> List[Tuple[Offset, Offset]]:
+    """寶石往 direction 移動一格後，目標格周圍需要與它相同的兩格（不含原本的位置）"""
+    dx, dy = direction
+    px, py = dy, dx  # 垂直方向
+    return [
+        ((dx, dy), (2 * dx, 2 * dy)),        # 繼續往前兩格
+        ((-px, -py), (-2 * px, -2 * py)),    # 垂直方向一側兩格
+        ((px, py), (2 * px, 2 * py)),        # 垂直方向另一側兩格
+        ((-px, -py), (px, py)),              # 夾在中間
+    ]
+
+
+# 預先計算的樣式偏移表：移動方向 -> 需要檢查的兩格偏移
+MOVE_PATTERNS: Dict[Offset, List[Tuple[Offset, Offset]]] = {
+    direction: _move_patterns(direction) for direction in ((1, 0), (-1, 0), (0, 1), (0, -1))
+}
+
+
+# 合法移動產生器
+class MoveGenerator:
+    """以預先計算的樣式偏移表，向量化地列出所有會形成消除（或引爆炸彈）的交換
+
+    horizontal[x, y] 代表 (x, y) 與 (x + 1, y) 的交換，vertical[x, y] 代表 (x, y) 與 (x, y + 1)。
+    """
+    def __init__(self):
+        self.horizontal = np.zeros((0, 0), dtype=bool)
+        self.vertical = np.zeros((0, 0), dtype=bool)
+        self._moves: Optional[List[Action]] = None
+
+    def update(self, board: Board) -> int:
+        """重新計算棋盤上所有的合法交換，回傳數量"""
+        types = board.types
+        size_x, size_y = types.shape
+        padded = np.full((size_x + 2 * PAD, size_y + 2 * PAD), -1, dtype=np.int16)
+        padded[PAD:PAD + size_x, PAD:PAD + size_y] = types
+        bombs = board.special == SPECIAL_BOMB
+
+        def forms_line(moving: np.ndarray, target: Offset, direction: Offset, shape: Tuple[int, int]) -> np.ndarray:
+            """moving 中的寶石移到 target 偏移後，是否與周圍兩格連成一線"""
+            result = np.zeros(shape, dtype=bool)
+            for (ax, ay), (bx, by) in MOVE_PATTERNS[direction]:
+                first = padded[PAD + target[0] + ax:PAD + target[0] + ax + shape[0],
+                               PAD + target[1] + ay:PAD + target[1] + ay + shape[1]]
+                second = padded[PAD + target[0] + bx:PAD + target[0] + bx + shape[0],
+                                PAD + target[1] + by:PAD + target[1] + by + shape[1]]
+                result |= (first == moving) & (second == moving)
+            return result & (moving != EMPTY)
+
+        # 橫向交換：左邊的寶石往右、右邊的寶石往左
+        shape = (size_x - 1, size_y)
+        left, right = types[:-1, :], types[1:, :]
+        self.horizontal = ((forms_line(left, (1, 0), (1, 0), shape) |
+                            forms_line(right, (0, 0), (-1, 0), shape)) & (left != right)) | \
+            bombs[:-1, :] | bombs[1:, :]
+
+        # 縱向交換：上面的寶石往下、下面的寶石往上
+        shape = (size_x, size_y - 1)
+        upper, lower = types[:, :-1], types[:, 1:]
+        self.vertical = ((forms_line(upper, (0, 1), (0, 1), shape) |
+                          forms_line(lower, (0, 0), (0, -1), shape)) & (upper != lower)) | \
+            bombs[:, :-1] | bombs[:, 1:]
+
+        self._moves = None
+        return int(self.horizontal.sum() + self.vertical.sum())
+
+    def moves(self) -> List[Action]:
+        """所有合法交換，依 (x, y) 掃描順序排列"""
+        if self._moves is None:
+            hx, hy = np.nonzero(self.horizontal)
+            vx, vy = np.nonzero(self.vertical)
+            moves = [((x, y), (x + 1, y)) for x, y in zip(hx.tolist(), hy.tolist())]
+            moves += [((x, y), (x, y + 1)) for x, y in zip(vx.tolist(), vy.tolist())]
+            moves.sort()
+            self._moves = moves
+        return self._moves
+
+    def has_moves(self) -> bool:
+        """棋盤上是否還有任何合法交換"""
+        return bool(self.horizontal.any() or self.vertical.any())
+
+    def is_legal(self, pos1: Position, pos2: Position) -> bool:
+        """O(1) 查詢交換是否合法（兩格必須相鄰）"""
+        (x1, y1), (x2, y2) = sorted((tuple(pos1), tuple(pos2)))
+        if y1 == y2 and x2 - x1 == 1:
+            return 0 <= x1 < self.horizontal.shape[0] and 0 <= y1 < self.horizontal.shape[1] and \
+                bool(self.horizontal[x1, y1])
+        if x1 == x2 and y2 - y1 == 1:
+            return 0 <= x1 < self.vertical.shape[0] and 0 <= y1 < self.vertical.shape[1] and \
+                bool(self.vertical[x1, y1])
+        return False
+
+    def hint(self) -> Optional[Action]:
+        """提示一個合法交換（沒有的話回傳 None）"""
+        moves = self.moves()
+        return moves[0] if moves else None
+
+
+def reshuffle_until_playable(board: Board, generator: MoveGenerator, rng, max_tries: int = 10) -> int:
+    """死局時重新洗牌直到有合法交換（多次失敗就重新產生整個棋盤），回傳合法交換的數量"""
+    for _ in range(max_tries):
+        board.reshuffle(rng)
+        count = generator.update(board)
+        if count:
+            return count
+    board.types[:] = Board.random(board.size, board.num_types, rng, allow_matches=False).types
+    board.special[:] = SPECIAL_NONE
+    board.dirty[:] = True
+    return generator.update(board)
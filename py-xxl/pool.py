@@ -0,0 +1,65 @@
+from typing import Tuple, List, Dict, Union, Optional
+from puzzle import Puzzle
+from bomb import Bomb
+
+# 定義常用的類型
+Position = Tuple[int, int]
+Size = Tuple[int, int]
+
+# 精靈物件池類
+class SpritePool:
+    """重複使用被移除的寶石與炸彈精靈，避免連鎖消除時大量建立與回收物件"""
+    def __init__(self):
+        self.free: Dict[type, List[Puzzle]] = {Puzzle: [], Bomb: []}
+        self.created = 0   # 新建立的精靈數
+        self.reused = 0    # 從池中取出重複使用的次數
+        self.live = 0      # 目前借出（在場上）的精靈數
+        self.peak_live = 0
+
+    def _acquire(self, kind: type) -> Optional[Puzzle]:
+        """從池中取出一個精靈（沒有的話回傳 None）並更新統計"""
+        free = self.free[kind]
+        sprite = free.pop() if free else None
+        if sprite is None:
+            self.created += 1
+        else:
+            self.reused += 1
+        self.live += 1
+        self.peak_live = max(self.peak_live, self.live)
+        return sprite
+
+    def gem(self, img_path: str, size: Size, position: Position, downlen: int, gem_type: Optional[int] = None) -> Puzzle:
+        """取得一個寶石精靈"""
+        gem = self._acquire(Puzzle)
+        if gem is None:
+            return Puzzle(img_path, size, position, downlen, gem_type)
+        gem.reset(img_path, size, position, downlen, gem_type)
+        return gem
+
+    def bomb(self, position: Position, size: Optional[Size] = None) -> Bomb:
+        """取得一個炸彈精靈"""
+        bomb = self._acquire(Bomb)
+        if bomb is None:
+            return Bomb(position, size)
+        bomb.reset_bomb(position, size)
+        return bomb
+
+    def release(self, sprite: Optional[Puzzle]) -> None:
+        """歸還精靈（同時從所有群組移除）"""
+        if sprite is None:
+            return
+        sprite.kill()
+        self.free[Bomb if sprite.is_special else Puzzle].append(sprite)
+        self.live -= 1
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """物件池統計：池中閒置數量、建立與重複使用次數、重複使用率與最多同時在場的數量"""
+        acquired = self.created + self.reused
+        return {
+            'size': sum(len(free) for free in self.free.values()),
+            'created': self.created,
+            'reused': self.reused,
+            'reuse_rate': self.reused / acquired if acquired else 0.0,
+            'live': self.live,
+            'peak_live': self.peak_live,
+        }
@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import cProfile
+import contextlib
+import pygame
+from collections import deque
+from typing import Tuple, List, Dict, Union, Optional, Deque, Iterator
+from setting import GameConfig
+from assets import load_font
+
+# 定義常用的類型
+Color = Tuple[int, int, int]
+
+PHASES = ('events', 'cascade', 'drop_gems', 'tracking', 'sprites', 'hud', 'display_update')
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """最近的名次百分位數（values 不需排序）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+# 每幀分段計時類
+class FrameProfiler:
+    """量測每一幀中各階段花費的時間，提供即時統計、畫面疊加資訊與 Chrome trace 匯出
+
+    關閉時 phase() 回傳共用的空 context manager，幾乎沒有額外負擔。
+    """
+    HISTORY = 240            # 統計使用的最近幀數
+    MAX_TRACE_EVENTS = 200000  # trace 事件上限，避免長時間遊玩耗盡記憶體
+    OVERLAY_INTERVAL = 0.25  # 疊加資訊更新間隔（秒），避免每幀重繪
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.frame_times: Deque[float] = deque(maxlen=self.HISTORY)  # 每幀的工作時間（不含等待）
+        self.intervals: Deque[float] = deque(maxlen=self.HISTORY)    # 相鄰兩幀開始的間隔（計算 FPS）
+        self.phase_times: Dict[str, Deque[float]] = {}
+        self.current: Dict[str, float] = {}
+        self.trace_events: List[Dict[str, Union[str, int, float]]] = []
+        self.frame_start = 0.0
+        self.origin = time.perf_counter()
+        self.cprofile: Optional[cProfile.Profile] = None
+        self.font: Optional[pygame.font.Font] = None
+        self.overlay_text: List[str] = []
+        self.overlay_updated = 0.0
+        self._null = contextlib.nullcontext()
+
+    def toggle(self) -> None:
+        """切換開關，重新開始統計"""
+        self.enabled = not self.enabled
+        self.frame_times.clear()
+        self.intervals.clear()
+        self.phase_times.clear()
+        self.frame_start = 0.0
+        self.overlay_text = []
+
+    def begin_frame(self) -> None:
+        """一幀開始"""
+        if self.enabled:
+            now = time.perf_counter()
+            if self.frame_start:
+                self.intervals.append((now - self.frame_start) * 1000)
+            self.frame_start = now
+            self.current = {}
+
+    def end_frame(self) -> None:
+        """一幀結束：記錄總時間與各階段時間"""
+        if not self.enabled:
+            return
+        end = time.perf_counter()
+        self.frame_times.append((end - self.frame_start) * 1000)
+        for name in PHASES:
+            self.phase_times.setdefault(name, deque(maxlen=self.HISTORY)).append(self.current.get(name, 0.0))
+        self._trace('frame', self.frame_start, end)
+
+    def phase(self, name: str):
+        """計時一個階段：with profiler.phase('hud'): ..."""
+        if not self.enabled:
+            return self._null
+        return self._timed(name)
+
+    @contextlib.contextmanager
+    def _timed(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            # 同一幀中重複出現的階段（例如多個髒矩形各畫一次）累加
+            self.current[name] = self.current.get(name, 0.0) + (end - start) * 1000
+            self._trace(name, start, end)
+
+    def _trace(self, name: str, start: float, end: float) -> None:
+        """記錄 Chrome trace 的完整事件（微秒）"""
+        if len(self.trace_events) < self.MAX_TRACE_EVENTS:
+            self.trace_events.append({
+                'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': 0,
+                'ts': (start - self.origin) * 1e6, 'dur': (end - start) * 1e6,
+            })
+
+    def stats(self) -> Dict[str, Union[float, str]]:
+        """最近幀的 FPS、p50/p99 幀工作時間與平均最慢的階段"""
+        frames = list(self.frame_times)
+        if not frames:
+            return {'fps': 0.0, 'p50': 0.0, 'p99': 0.0, 'worst_phase': '', 'worst_ms': 0.0}
+        means = {name: sum(times) / len(times) for name, times in self.phase_times.items() if times}
+        worst = max(means, key=means.get) if means else ''
+        mean_interval = sum(self.intervals) / len(self.intervals) if self.intervals else 0.0
+        return {
+            'fps': 1000.0 / mean_interval if mean_interval > 0 else 0.0,
+            'p50': percentile(frames, 0.5),
+            'p99': percentile(frames, 0.99),
+            'worst_phase': worst,
+            'worst_ms': means.get(worst, 0.0),
+        }
+
+    def overlay_rect(self) -> pygame.Rect:
+        """疊加資訊的位置（畫面上方中間）"""
+        width, _ = pygame.display.get_surface().get_size()
+        return pygame.Rect(width // 2 - 150, 10, 300, 48)
+
+    def overlay_state(self) -> Tuple[str, ...]:
+        """疊加資訊的內容，每 OVERLAY_INTERVAL 秒更新一次（給髒矩形渲染判斷是否需要重繪）"""
+        if not self.enabled:
+            return ()
+        now = time.perf_counter()
+        if now - self.overlay_updated >= self.OVERLAY_INTERVAL or not self.overlay_text:
+            self.overlay_updated = now
+            stats = self.stats()
+            self.overlay_text = [
+                f"FPS {stats['fps']:.1f}  p50 {stats['p50']:.2f}ms  p99 {stats['p99']:.2f}ms",
+                f"worst: {stats['worst_phase']} {stats['worst_ms']:.2f}ms",
+            ]
+        return tuple(self.overlay_text)
+
+    def draw_overlay(self, screen: pygame.Surface, color: Color = (255, 255, 0)) -> None:
+        """在畫面上繪製疊加資訊"""
+        if not self.enabled or not self.overlay_text:
+            return
+        if self.font is None:
+            self.font = load_font(18)
+        rect = self.overlay_rect()
+        panel = pygame.Surface(rect.size, pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 160))
+        screen.blit(panel, rect)
+        for i, line in enumerate(self.overlay_text):
+            screen.blit(self.font.render(line, True, color), (rect.x + 6, rect.y + 3 + i * 22))
+
+    def export_trace(self, path: str) -> None:
+        """匯出 Chrome trace 格式（chrome://tracing、Perfetto、speedscope 皆可開啟）"""
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.trace_events, 'displayTimeUnit': 'ms'}, f)
+        self.trace_events = []
+
+    def start_cprofile(self) -> None:
+        """開始 cProfile 擷取"""
+        self.cprofile = cProfile.Profile()
+        self.cprofile.enable()
+
+    def stop_cprofile(self, path: str) -> None:
+        """停止 cProfile 擷取並存檔（可用 pstats、snakeviz 或 flameprof 分析）"""
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(path)
+            self.cprofile = None
+
+
+# 啟動計時類
+class StartupProfiler:
+    """記錄啟動過程各階段的時間，直到第一個可互動的畫面出現"""
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []  # (階段名稱, 秒數)
+        self.first_frame: Optional[float] = None   # 從起點到第一個可互動畫面的秒數
+
+    def begin(self, origin: float, name: str = 'imports') -> None:
+        """以 origin（perf_counter 的值）為起點，並把起點到現在的時間記為一個階段"""
+        self.origin = origin
+        self.phases.append((name, time.perf_counter() - origin))
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """量測一個啟動階段"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def first_interactive_frame(self) -> None:
+        """第一個可互動的畫面已經顯示（只記錄第一次），開啟 STARTUP_PROFILE 時印出報告"""
+        if self.first_frame is not None:
+            return
+        self.first_frame = time.perf_counter() - self.origin
+        if GameConfig.STARTUP_PROFILE:
+            print(self.report())
+
+    def report(self) -> str:
+        """各階段的時間（毫秒），未列出的部分記為 other"""
+        lines = ['Startup profile:']
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<24}{seconds * 1000:>9.1f} ms")
+        if self.first_frame is not None:
+            other = self.first_frame - sum(seconds for _, seconds in self.phases)
+            lines.append(f"  {'other':<24}{other * 1000:>9.1f} ms")
+            lines.append(f"  {'first interactive frame':<24}{self.first_frame * 1000:>9.1f} ms")
+        return '\n'.join(lines)
+
+
+# 全域共用的啟動計時
+startup_profiler = StartupProfiler()
@@ -1,37 +1,102 @@
+import os
 import pygame
+from enum import IntEnum
 from typing import Tuple, List, Dict, Union, Optional
+from atlas import sprite_atlas
+from setting import GameConfig
+from board import EMPTY, SPECIAL_NONE
 
 # 定義常用的類型
 Position = Tuple[int, int]
 Size = Tuple[int, int]
 
+# 移動方向
+class Direction(IntEnum):
+    DOWN = 0
+    UP = 1
+    LEFT = 2
+    RIGHT = 3
+
+
+def gem_type_from_path(img_path: str) -> int:
+    """由圖片檔名（gem3.png）取得寶石種類編號，無法辨識時回傳 EMPTY"""
+    name = os.path.splitext(os.path.basename(img_path))[0]
+    return int(name[3:]) if name.startswith('gem') and name[3:].isdigit() else EMPTY
+
+
 # 寶石類
 class Puzzle(pygame.sprite.Sprite):
-    def __init__(self, img_path: str, size: Size, position: Position, downlen: int):
+    """使用 __slots__ 的精簡寶石精靈：種類為整數、方向為 Direction，special 標記特殊方塊
+
+    pygame.sprite.Sprite 本身沒有 __slots__，實例的 __dict__ 只剩下基底類別記錄群組的集合，
+    寶石自己的屬性都放在 slot 中。
+    """
+    __slots__ = ('image', 'rect', 'x', 'y', 'prev_x', 'prev_y', 'downlen', 'target_x', 'target_y',
+                 'type', 'special', 'fixed', 'speed', 'direction')
+
+    def __init__(self, img_path: str, size: Size, position: Position, downlen: int, gem_type: Optional[int] = None):
         super().__init__()
-        self.image = pygame.image.load(img_path)
-        self.image = pygame.transform.smoothscale(self.image, size)
-        self.rect = self.image.get_rect()
+        self.rect = None
+        self.reset(img_path, size, position, downlen, gem_type)
+
+    def reset(self, img_path: str, size: Size, position: Position, downlen: int, gem_type: Optional[int] = None) -> None:
+        """（重新）設定寶石的種類、圖片、位置與目標，物件池重複使用時呼叫"""
+        self.image = sprite_atlas.get(img_path, size)  # 共用圖集中的 Surface
+        if self.rect is None or self.rect.size != self.image.get_size():
+            self.rect = self.image.get_rect()
         self.rect.left, self.rect.top = position
+        self.x, self.y = float(position[0]), float(position[1])  # 模擬位置
+        self.prev_x, self.prev_y = self.x, self.y  # 上一個模擬刻的位置（插值用）
         self.downlen = downlen
         self.target_x = position[0]
         self.target_y = position[1] + downlen
-        self.type = img_path.split('/')[-1].split('.')[0]
+        self.type = gem_type if gem_type is not None else gem_type_from_path(img_path)  # 與 Board.types 相同的整數
+        self.special = SPECIAL_NONE
         self.fixed = False
-        self.speed_x = 16
-        self.speed_y = 16
-        self.direction = 'down'
-
-    def move(self) -> None:
-        """移動寶石"""
-        if self.direction == 'down':
-            self.rect.top = min(self.target_y, self.rect.top + self.speed_y)
-        elif self.direction == 'up':
-            self.rect.top = max(self.target_y, self.rect.top - self.speed_y)
-        elif self.direction == 'left':
-            self.rect.left = max(self.target_x, self.rect.left - self.speed_x)
-        elif self.direction == 'right':
-            self.rect.left = min(self.target_x, self.rect.left + self.speed_x)
-        
-        if (self.direction in ['down', 'up'] and self.rect.top == self.target_y) or (self.direction in ['left', 'right'] and self.rect.left == self.target_x):
-            self.fixed = True
\ No newline at end of file
+        self.speed = GameConfig.MOVE_SPEED  # 像素/秒
+        self.direction = Direction.DOWN
+
+    @property
+    def is_special(self) -> bool:
+        """是否為特殊方塊（例如炸彈）"""
+        return self.special != SPECIAL_NONE
+
+    def move(self, dt: Optional[float] = None) -> None:
+        """移動寶石 dt 秒（預設一個模擬刻），速度與幀率無關"""
+        if dt is None:
+            dt = 1.0 / GameConfig.TICK_RATE
+        self.prev_x, self.prev_y = self.x, self.y
+        step = self.speed * dt
+        direction = self.direction
+        if direction == Direction.DOWN:
+            self.y = min(self.target_y, self.y + step)
+            self.fixed = self.y == self.target_y
+        elif direction == Direction.UP:
+            self.y = max(self.target_y, self.y - step)
+            self.fixed = self.y == self.target_y
+        elif direction == Direction.LEFT:
+            self.x = max(self.target_x, self.x - step)
+            self.fixed = self.x == self.target_x
+        else:
+            self.x = min(self.target_x, self.x + step)
+            self.fixed = self.x == self.target_x
+        self.rect.left, self.rect.top = round(self.x), round(self.y)
+
+    def interpolate(self, alpha: float) -> None:
+        """顯示位置設為上一個與目前模擬刻之間的插值；已固定的寶石直接顯示在模擬位置"""
+        if self.fixed:
+            # 同步上一刻的位置，之後重新開始移動時不會從舊位置插值
+            self.prev_x, self.prev_y = self.x, self.y
+        self.rect.left = round(self.prev_x + (self.x - self.prev_x) * alpha)
+        self.rect.top = round(self.prev_y + (self.y - self.prev_y) * alpha)
+
+    def shift(self, dx: int, dy: int) -> None:
+        """整體平移（視野捲動時），移動中的寶石繼續朝平移後的目標前進"""
+        self.x += dx
+        self.y += dy
+        self.prev_x += dx
+        self.prev_y += dy
+        self.target_x += dx
+        self.target_y += dy
+        self.rect.move_ip(dx, dy)
+
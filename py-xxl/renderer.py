@@ -0,0 +1,98 @@
+import pygame
+import contextlib
+from typing import Tuple, List, Dict, Union, Optional, Callable, Iterable, Hashable
+from setting import GameConfig
+
+# 髒矩形渲染類
+class DirtyRenderer:
+    """追蹤每幀有變化的區域，只重繪並更新這些矩形"""
+    MAX_RECTS = 12  # 合併後超過此數量就改用外框矩形
+    FULL_REDRAW_RATIO = 0.6  # 髒區域超過畫面比例時直接整面更新
+
+    def __init__(self, screen: pygame.Surface):
+        self.screen = screen
+        self.full_redraw = True
+        self.dirty_rects: List[pygame.Rect] = []
+        self.sprite_rects: Dict[pygame.sprite.Sprite, Tuple[pygame.Rect, pygame.Surface]] = {}
+        self.regions: Dict[str, Tuple[Hashable, pygame.Rect]] = {}
+        self.profiler = None  # 設定 FrameProfiler 時量測 display.update 的時間
+
+    def invalidate(self) -> None:
+        """下一幀整面重繪（例如切換畫面之後）"""
+        self.full_redraw = True
+
+    def mark(self, rect: pygame.Rect) -> None:
+        """標記一個需要重繪的區域"""
+        if rect.width > 0 and rect.height > 0:
+            self.dirty_rects.append(pygame.Rect(rect))
+
+    def track_sprites(self, sprites: Iterable[pygame.sprite.Sprite]) -> None:
+        """比較精靈位置與圖片，移動、換圖、新增或移除的精靈新舊位置都標記為髒
+
+        物件池回收的精靈可能在兩幀之間換成別的圖片並回到同一個位置，因此也要比較圖片。
+        """
+        current = {}
+        for sprite in sprites:
+            rect = sprite.rect
+            last = self.sprite_rects.pop(sprite, None)
+            if last is None:
+                self.mark(rect)
+            elif last[0] != rect or last[1] is not sprite.image:
+                self.mark(last[0])
+                self.mark(rect)
+            current[sprite] = (pygame.Rect(rect), sprite.image)
+        # 剩下的是已經被移除的精靈
+        for last_rect, _ in self.sprite_rects.values():
+            self.mark(last_rect)
+        self.sprite_rects = current
+
+    def track_region(self, name: str, state: Hashable, rect: pygame.Rect) -> None:
+        """追蹤固定區域（HUD、選取框等），狀態改變時重繪新舊範圍"""
+        last = self.regions.get(name)
+        if last is None or last[0] != state:
+            if last is not None:
+                self.mark(last[1])
+            self.mark(rect)
+        self.regions[name] = (state, pygame.Rect(rect))
+
+    def _merge_rects(self) -> List[pygame.Rect]:
+        """合併互相重疊的矩形"""
+        merged: List[pygame.Rect] = []
+        for rect in self.dirty_rects:
+            rect = rect.clip(self.screen.get_rect())
+            if rect.width == 0 or rect.height == 0:
+                continue
+            i = rect.collidelist(merged)
+            while i != -1:
+                rect.union_ip(merged.pop(i))
+                i = rect.collidelist(merged)
+            merged.append(rect)
+        if len(merged) > self.MAX_RECTS:
+            merged = [merged[0].unionall(merged[1:])]
+        return merged
+
+    def _phase(self, name: str):
+        """量測階段時間（沒有設定 profiler 時不做任何事）"""
+        return self.profiler.phase(name) if self.profiler is not None else contextlib.nullcontext()
+
+    def render(self, draw_scene: Callable[[Optional[List[pygame.Rect]]], None]) -> List[pygame.Rect]:
+        """重繪髒區域並只更新這些區域，回傳本幀更新的矩形
+
+        draw_scene(areas) 每幀只呼叫一次：areas 為合併後的髒矩形（None 表示整個畫面），
+        由它只重畫與各矩形相交的內容並把繪圖限制在矩形內。
+        """
+        rects = [] if self.full_redraw else self._merge_rects()
+        area = sum(rect.width * rect.height for rect in rects)
+        if self.full_redraw or area > GameConfig.WIDTH * GameConfig.HEIGHT * self.FULL_REDRAW_RATIO:
+            draw_scene(None)
+            with self._phase('display_update'):
+                pygame.display.update()
+            rects = [self.screen.get_rect()]
+        elif rects:
+            draw_scene(rects)
+            with self._phase('display_update'):
+                pygame.display.update(rects)
+
+        self.full_redraw = False
+        self.dirty_rects = []
+        return rects
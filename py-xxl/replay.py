@@ -0,0 +1,242 @@
+import sys
+import time
+import zlib
+import struct
+import random
+import argparse
+import numpy as np
+from typing import Tuple, List, Dict, Union, Optional, NamedTuple, Iterator
+from board import Board
+from engine import Engine, StepResult
+
+# 定義常用的類型
+Position = Tuple[int, int]
+
+# 二進位格式（小端序）：檔頭之後為 zlib 壓縮的紀錄串流
+MAGIC = b'PXRP'
+VERSION = 2  # 2：記錄爆炸範圍，爆炸後依行的順序補充寶石
+HEADER = struct.Struct('<4sBHBBQH12s')  # magic, version, size, num_types, level, seed, keyframe_interval, blast_shape
+SWAP = struct.Struct('<IHHHH')       # 'S'：frame, x1, y1, x2, y2
+KEYFRAME = struct.Struct('<Ii')      # 'K'：move, score，之後接 gem_count 與棋盤
+END = struct.Struct('<Ii')           # 'E'：frame, final score
+
+
+def move_seed(seed: int, level: int, move: int) -> int:
+    """第 move 步（0 為開局結算）補充寶石使用的種子
+
+    每一步都重新設定亂數種子，播放時只要從關鍵幀開始模擬，不需要保存亂數產生器的狀態。
+    """
+    return (seed * 0x9E3779B1 + level * 0x85EBCA6B + move * 0xC2B2AE35) & 0xFFFFFFFFFFFF
+
+
+# 關鍵幀
+class Keyframe(NamedTuple):
+    """第 move 步結算完成後的完整狀態"""
+    move: int
+    score: int
+    gem_count: Dict[int, int]
+    types: np.ndarray
+    special: np.ndarray
+
+
+# 重播資料類
+class Replay:
+    """一個關卡的重播：種子、每一步交換（含幀數）與定期的棋盤關鍵幀"""
+    def __init__(self, seed: int, level: int, size: int, num_types: int, keyframe_interval: int,
+                 blast_shape: str = 'square'):
+        self.seed = seed
+        self.level = level
+        self.size = size
+        self.num_types = num_types
+        self.keyframe_interval = keyframe_interval
+        self.blast_shape = blast_shape
+        self.swaps: List[Tuple[int, Position, Position]] = []  # (frame, pos1, pos2)，第 i 步為 swaps[i - 1]
+        self.keyframes: Dict[int, Keyframe] = {}
+        self.end: Optional[Tuple[int, int]] = None  # (frame, final score)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Replay':
+        """解析二進位重播"""
+        magic, version = data[:4], data[4]
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'Not a replay file (magic {magic!r}, version {version})')
+        _, _, size, num_types, level, seed, interval, blast_shape = HEADER.unpack_from(data)
+        replay = cls(seed, level, size, num_types, interval, blast_shape.rstrip(b'\0').decode('ascii'))
+        body = zlib.decompress(data[HEADER.size:])
+        cells = size * size
+        gem_counts = struct.Struct(f'<{num_types}I')
+        offset = 0
+        while offset < len(body):
+            tag = body[offset:offset + 1]
+            offset += 1
+            if tag == b'S':
+                frame, x1, y1, x2, y2 = SWAP.unpack_from(body, offset)
+                offset += SWAP.size
+                replay.swaps.append((frame, (x1, y1), (x2, y2)))
+            elif tag == b'K':
+                move, score = KEYFRAME.unpack_from(body, offset)
+                offset += KEYFRAME.size
+                counts = gem_counts.unpack_from(body, offset)
+                offset += gem_counts.size
+                types = np.frombuffer(body, np.int8, cells, offset).reshape(size, size).copy()
+                special = np.frombuffer(body, np.int8, cells, offset + cells).reshape(size, size).copy()
+                offset += 2 * cells
+                replay.keyframes[move] = Keyframe(move, score, dict(enumerate(counts, 1)), types, special)
+            elif tag == b'E':
+                replay.end = END.unpack_from(body, offset)
+                offset += END.size
+            else:
+                raise ValueError(f'Unknown replay record {tag!r} at {offset - 1}')
+        return replay
+
+    @classmethod
+    def load(cls, path: str) -> 'Replay':
+        """讀取重播檔"""
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+    @property
+    def num_moves(self) -> int:
+        """重播中的步數"""
+        return len(self.swaps)
+
+
+# 重播記錄類
+class ReplayRecorder:
+    """在遊戲進行中記錄交換與關鍵幀，直接寫成二進位紀錄"""
+    def __init__(self, seed: int, level: int, size: int, num_types: int, keyframe_interval: int = 10,
+                 blast_shape: str = 'square'):
+        self.header = HEADER.pack(MAGIC, VERSION, size, num_types, level, seed, keyframe_interval,
+                                  blast_shape.encode('ascii'))
+        self.keyframe_interval = keyframe_interval
+        self.body = bytearray()
+        self.last_keyframe = -1
+
+    def swap(self, frame: int, pos1: Position, pos2: Position) -> None:
+        """記錄一次被接受的交換"""
+        self.body += b'S' + SWAP.pack(frame, pos1[0], pos1[1], pos2[0], pos2[1])
+
+    def settled(self, move: int, board: Board, score: int, gem_count: Dict[int, int]) -> None:
+        """棋盤穩定後呼叫：每 keyframe_interval 步記錄一個關鍵幀（第 0 步一定記錄）"""
+        if move % self.keyframe_interval or move == self.last_keyframe:
+            return
+        self.last_keyframe = move
+        counts = [gem_count.get(i, 0) for i in range(1, board.num_types + 1)]
+        self.body += b'K' + KEYFRAME.pack(move, score) + struct.pack(f'<{len(counts)}I', *counts)
+        self.body += board.types.astype(np.int8).tobytes() + board.special.astype(np.int8).tobytes()
+
+    def mark(self) -> Tuple[int, int]:
+        """目前的記錄位置，之後可以用 rewind() 回到這裡"""
+        return len(self.body), self.last_keyframe
+
+    def rewind(self, mark: Tuple[int, int]) -> None:
+        """丟棄 mark 之後的紀錄（玩家復原時），重播只保留實際採用的步驟"""
+        length, self.last_keyframe = mark
+        del self.body[length:]
+
+    def end(self, frame: int, score: int) -> None:
+        """記錄關卡結束"""
+        self.body += b'E' + END.pack(frame, score)
+
+    def to_bytes(self) -> bytes:
+        """輸出完整的重播檔內容"""
+        return self.header + zlib.compress(bytes(self.body), 9)
+
+    def save(self, path: str) -> None:
+        """寫入重播檔"""
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+
+# 重播播放類
+class ReplayPlayer:
+    """以無畫面引擎播放重播：seek() 從最近的關鍵幀開始模擬，不需要從頭重跑"""
+    def __init__(self, replay: Replay):
+        self.replay = replay
+        self.key_moves = sorted(replay.keyframes)
+        if not self.key_moves:
+            raise ValueError('Replay has no keyframes')
+
+    def engine_at_keyframe(self, keyframe: Keyframe) -> Engine:
+        """由關鍵幀建立引擎"""
+        board = Board(self.replay.size, self.replay.num_types)
+        board.types[:] = keyframe.types
+        board.special[:] = keyframe.special
+        engine = Engine(board=board, rng=random.Random(), blast_shape=self.replay.blast_shape)
+        engine.score_manager.score = keyframe.score
+        engine.gem_count = dict(keyframe.gem_count)
+        engine.moves = keyframe.move
+        return engine
+
+    def step(self, engine: Engine) -> StepResult:
+        """模擬引擎的下一步"""
+        move = engine.moves + 1
+        _, pos1, pos2 = self.replay.swaps[move - 1]
+        engine.rng.seed(move_seed(self.replay.seed, self.replay.level, move))
+        result = engine.step((pos1, pos2))
+        if not result.valid:
+            raise ValueError(f'Replay swap {move} {pos1}->{pos2} was rejected')
+        return result
+
+    def seek(self, move: int) -> Engine:
+        """回傳第 move 步結算後的引擎"""
+        if not 0 <= move <= self.replay.num_moves:
+            raise IndexError(f'Move {move} out of range 0..{self.replay.num_moves}')
+        index = np.searchsorted(self.key_moves, move, side='right') - 1
+        if index < 0:
+            raise IndexError(f'No keyframe at or before move {move}')
+        engine = self.engine_at_keyframe(self.replay.keyframes[self.key_moves[index]])
+        while engine.moves < move:
+            self.step(engine)
+        return engine
+
+    def play(self, start: int = 0) -> Iterator[Tuple[int, Engine, StepResult]]:
+        """從第 start 步開始依序播放，產生 (步數, 引擎, 結果)"""
+        engine = self.seek(start)
+        while engine.moves < self.replay.num_moves:
+            result = self.step(engine)
+            yield engine.moves, engine, result
+
+    def verify(self) -> List[int]:
+        """從第一個關鍵幀一路模擬，與之後的每個關鍵幀比對，回傳不一致的步數"""
+        mismatches = []
+        engine = self.seek(self.key_moves[0])
+        while engine.moves < self.replay.num_moves:
+            self.step(engine)
+            keyframe = self.replay.keyframes.get(engine.moves)
+            if keyframe is not None and not (
+                    engine.score == keyframe.score and engine.gem_count == keyframe.gem_count and
+                    np.array_equal(engine.board.types, keyframe.types) and
+                    np.array_equal(engine.board.special, keyframe.special)):
+                mismatches.append(engine.moves)
+        return mismatches
+
+
+def main() -> int:
+    """命令列入口：python replay.py replays/123_level1.pxr --seek 25 --verify"""
+    parser = argparse.ArgumentParser(description='Inspect, seek and verify replay files')
+    parser.add_argument('path')
+    parser.add_argument('--seek', type=int, default=None, help='print the board after this move')
+    parser.add_argument('--verify', action='store_true', help='re-simulate and compare every keyframe')
+    args = parser.parse_args()
+
+    replay = Replay.load(args.path)
+    player = ReplayPlayer(replay)
+    print(f"seed {replay.seed} level {replay.level} size {replay.size} moves {replay.num_moves} "
+          f"keyframes {len(replay.keyframes)} blast {replay.blast_shape} end {replay.end}")
+
+    if args.seek is not None:
+        start = time.perf_counter()
+        engine = player.seek(args.seek)
+        print(f"Move {args.seek}: score {engine.score} ({(time.perf_counter() - start) * 1000:.2f} ms)")
+        print(engine.board.types.T)
+
+    if args.verify:
+        mismatches = player.verify()
+        print('Replay verified' if not mismatches else f'Keyframe mismatches at moves {mismatches}')
+        return 1 if mismatches else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,7 +2,8 @@ import random
 from typing import Tuple, List, Dict, Union, Optional
 # 分數管理類
 class ScoreManager:
-    def __init__(self):
+    def __init__(self, rng=random):
+        self.rng = rng  # 隨機調整分數使用的亂數產生器
         self.score = 0
         self.reward = 10
         self.target_scores = {1: 50, 2: 100, 3: 150}  # 各關卡目標分數
@@ -10,17 +11,25 @@ class ScoreManager:
     def get_level_target(self, level: int) -> int:
         """獲取指定關卡的目標分數"""
         return self.target_scores.get(level, 300)
+
+    def get_level_time(self, level: int) -> int:
+        """獲取指定關卡的遊戲時間（秒）：每關減少60秒，但最少保持60秒"""
+        return max(200 - (level - 1) * 60, 60)
     
+    def match_score(self, match_length: int) -> int:
+        """消除長度對應的分數（不改變總分）"""
+        score_multiplier = 1 if match_length == 3 else 2 if match_length == 4 else 4
+        return self.reward * score_multiplier
+
     def add_score(self, match_length: int) -> int:
         """根據消除長度增加分數"""
-        score_multiplier = 1 if match_length == 3 else 2 if match_length == 4 else 4
-        match_score = self.reward * score_multiplier
+        match_score = self.match_score(match_length)
         self.score += match_score
         return match_score
     
     def adjust_score(self) -> str:
         """隨機調整分數並返回提示訊息"""
-        score_change = 10 * random.randint(-2, 5)
+        score_change = 10 * self.rng.randint(-2, 5)
         self.score += score_change
         self.score = max(0, self.score)
         
@@ -13,5 +13,49 @@ class GameConfig:
     GRIDSIZE = 64  # 網格大小
     XMARGIN = (WIDTH - GRIDSIZE * NUMGRID) // 2  # X軸邊距
     YMARGIN = (HEIGHT - GRIDSIZE * NUMGRID) // 2  # Y軸邊距
+    VIEW_SIZE = min(WIDTH, HEIGHT) - 260  # 大棋盤模式的視野大小（與預設棋盤相同的區域）
+    MEGA_BOARD = False  # 大棋盤模式：棋盤比視野大，只繪製與動畫可見的格子（見 viewport.Viewport）
+    ZOOM_LEVELS = (8, 12, 16, 24, 32, 48, 64)  # 大棋盤模式可用的格子大小
+    SCROLL_SPEED = 900  # 大棋盤模式按住方向鍵時的捲動速度（像素/秒）
     ROOTDIR = os.path.dirname(os.path.abspath(__file__))  # 根目錄
-    FPS = 60  # 幀率
\ No newline at end of file
+    FPS = 60  # 幀率（畫面更新頻率）
+    TICK_RATE = 60  # 每秒的模擬刻數，遊戲邏輯以固定時間步長更新
+    MAX_FRAME_TIME = 0.25  # 單幀最多補跑的模擬時間（秒）
+    MOVE_SPEED = 960  # 寶石移動速度（像素/秒）
+    BLAST_SHAPE = 'square'  # 炸彈爆炸範圍，見 blast.BLAST_SHAPES
+    VALIDATE_MATCHES = False  # 每次增量消除檢查後以完整掃描核對結果（除錯用）
+    SEED: Optional[int] = None  # 遊戲種子，None 表示每次隨機
+    REPLAY_DIR: Optional[str] = None  # 每關結束後把重播存到這個資料夾，None 表示不存檔
+    KEYFRAME_INTERVAL = 10  # 重播每隔幾步記錄一次棋盤關鍵幀
+    UNDO_DEPTH = 32  # 最多可以復原幾步（快照環形緩衝區的容量）
+    PROFILE = os.environ.get('PYXXL_PROFILE', '0') not in ('', '0')  # 開啟每幀分段計時與疊加資訊（遊戲中按 F3 切換）
+    PROFILE_DIR: Optional[str] = os.environ.get('PYXXL_PROFILE_DIR')  # 每關結束後把 trace 與 cProfile 存到這個資料夾
+    STARTUP_PROFILE = os.environ.get('PYXXL_STARTUP_PROFILE', '0') not in ('', '0')  # 第一個可互動畫面出現時印出啟動各階段的時間
+    SOUND_CACHE_DIR: Optional[str] = os.environ.get('PYXXL_SOUND_CACHE_DIR')  # 解碼後的音效存成 WAV 的資料夾，None 表示不快取
+    FONT_NAME = 'Arial'  # 沒有指定字型檔時使用的系統字型（粗體），維持原本的外觀
+    FONT_PATH: Optional[str] = os.environ.get('PYXXL_FONT_PATH')  # 字型檔；指定時直接載入，省下 SysFont 第一次掃描系統字型的時間
+
+    @classmethod
+    def set_grid(cls, numgrid: int, gridsize: Optional[int] = None) -> None:
+        """改變網格數量（與大小）並重新計算邊距；未指定大小時縮小到能放進視窗"""
+        if gridsize is None:
+            gridsize = min(64, (min(cls.WIDTH, cls.HEIGHT) - 260) // numgrid)
+        cls.MEGA_BOARD = False
+        cls.NUMGRID = numgrid
+        cls.GRIDSIZE = max(gridsize, 1)
+        cls.XMARGIN = (cls.WIDTH - cls.GRIDSIZE * cls.NUMGRID) // 2
+        cls.YMARGIN = (cls.HEIGHT - cls.GRIDSIZE * cls.NUMGRID) // 2
+
+    @classmethod
+    def set_mega_board(cls, numgrid: int, gridsize: int = 32) -> None:
+        """大棋盤模式：網格數量不受視窗限制，邊距固定為視野的位置，gridsize 為初始的格子大小"""
+        cls.MEGA_BOARD = True
+        cls.NUMGRID = numgrid
+        cls.GRIDSIZE = gridsize
+        cls.XMARGIN = (cls.WIDTH - cls.VIEW_SIZE) // 2
+        cls.YMARGIN = (cls.HEIGHT - cls.VIEW_SIZE) // 2
+
+    @classmethod
+    def layout_key(cls) -> Tuple[int, ...]:
+        """影響靜態畫面佈局的尺寸設定，任何一項改變都需要重建快取"""
+        return (cls.WIDTH, cls.HEIGHT, cls.NUMGRID, cls.GRIDSIZE, cls.XMARGIN, cls.YMARGIN, cls.MEGA_BOARD)
\ No newline at end of file
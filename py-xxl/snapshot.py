@@ -0,0 +1,120 @@
+import numpy as np
+from collections import deque
+from typing import Tuple, List, Dict, Union, Optional, NamedTuple, Deque, Any
+from board import Board
+
+# 定義常用的類型
+Columns = Tuple[bytes, ...]
+
+
+def encode_columns(array: np.ndarray, base: Optional[Columns] = None) -> Columns:
+    """把棋盤陣列的每一行（x）存成 bytes；與 base 相同的行直接共用 base 的物件（寫入時複製）"""
+    if base is None or len(base) != array.shape[0]:
+        return tuple(column.tobytes() for column in array)
+    previous = decode_columns(base, array.dtype)
+    changed = np.flatnonzero((previous != array).any(axis=1))
+    if not len(changed):
+        return base
+    columns = list(base)
+    for x in changed.tolist():
+        columns[x] = array[x].tobytes()
+    return tuple(columns)
+
+
+def decode_columns(columns: Columns, dtype=np.int8) -> np.ndarray:
+    """encode_columns 的反向操作，回傳唯讀的陣列（需要修改時請複製）"""
+    return np.frombuffer(b''.join(columns), dtype=dtype).reshape(len(columns), -1)
+
+
+# 快照類
+class Snapshot(NamedTuple):
+    """遊戲邏輯狀態的不可變快照
+
+    棋盤的每一行存成唯讀的 bytes，與前一個快照相同的行共用同一個物件，
+    因此只差幾步的快照只多佔改變的那幾行。亂數只記錄補充寶石用的狀態（可以是 None）。
+    """
+    types: Columns
+    special: Columns
+    num_types: int
+    gem_count: Tuple[int, ...]  # 種類 1..num_types 的累計消除數
+    score: int
+    moves: int
+    remaining_time: float = 0.0
+    rng_state: Optional[tuple] = None
+
+    @classmethod
+    def capture(cls, board: Board, gem_count: Dict[int, int], score: int, moves: int,
+                remaining_time: float = 0.0, rng_state: Optional[tuple] = None,
+                base: Optional['Snapshot'] = None) -> 'Snapshot':
+        """擷取狀態；提供 base（通常是上一個快照）時沒有改變的行與它共用"""
+        return cls(
+            encode_columns(board.types, base.types if base is not None else None),
+            encode_columns(board.special, base.special if base is not None else None),
+            board.num_types,
+            tuple(gem_count.get(i, 0) for i in range(1, board.num_types + 1)),
+            score,
+            moves,
+            remaining_time,
+            rng_state,
+        )
+
+    @property
+    def size(self) -> int:
+        """棋盤大小"""
+        return len(self.types)
+
+    def board(self) -> Board:
+        """還原成新的棋盤（整個棋盤標記為變動）"""
+        board = Board(self.size, self.num_types)
+        board.types[:] = decode_columns(self.types)
+        board.special[:] = decode_columns(self.special)
+        return board
+
+    def gem_counts(self) -> Dict[int, int]:
+        """還原成 {種類: 數量}"""
+        return dict(enumerate(self.gem_count, 1))
+
+
+# 快照歷史類
+class SnapshotHistory:
+    """固定容量的快照環形緩衝區，用於多步復原
+
+    每個快照可以附帶一個 tag（例如重播記錄的位置），復原時一起取回。
+    新的快照以最近一個快照為 base 擷取，相鄰快照共用沒有改變的行。
+    """
+    def __init__(self, capacity: int = 32):
+        self.entries: Deque[Tuple[Snapshot, Any]] = deque(maxlen=capacity)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def latest(self) -> Optional[Snapshot]:
+        """最近的快照"""
+        return self.entries[-1][0] if self.entries else None
+
+    def push(self, snapshot: Snapshot, tag: Any = None) -> None:
+        """加入快照，超過容量時丟棄最舊的"""
+        self.entries.append((snapshot, tag))
+
+    def rewind(self, steps: int = 1) -> Optional[Tuple[Snapshot, Any]]:
+        """丟棄最近的 steps 個快照，回傳之後最新的 (快照, tag)；歷史不夠時不做任何事並回傳 None"""
+        if steps <= 0 or steps >= len(self.entries):
+            return None
+        for _ in range(steps):
+            self.entries.pop()
+        return self.entries[-1]
+
+    def clear(self) -> None:
+        """清空歷史（例如換關時）"""
+        self.entries.clear()
+
+    def memory(self) -> Dict[str, int]:
+        """棋盤資料的實際大小（共用的行只算一次）與不共用時的大小（位元組）"""
+        unique: Dict[int, int] = {}
+        total = 0
+        for snapshot, _ in self.entries:
+            for column in snapshot.types + snapshot.special:
+                unique[id(column)] = len(column)
+                total += len(column)
+        return {'snapshots': len(self.entries), 'board_bytes': sum(unique.values()), 'unshared_bytes': total}
@@ -1,22 +1,166 @@
 import os
+import time
+import wave
 import pygame
-from typing import Tuple, List, Dict, Union, Optional
+from typing import Tuple, List, Dict, Union, Optional, NamedTuple
+from setting import GameConfig
 
+
+# 音效描述
+class SoundSpec(NamedTuple):
+    """一個音效檔與它所屬的聲部群組"""
+    path: str            # 相對於 rootdir 的路徑
+    group: str           # 聲部群組，共用 CHANNEL_GROUPS 中保留的聲道
+    priority: int        # 同一幀同一群組只播放優先度最高的音效
+    volume: float = 0.5  # 載入時設定一次，播放時不再呼叫 set_volume
+
+
+# 所有音效
+SOUNDS: Dict[str, SoundSpec] = {
+    'match3': SoundSpec('resources/sounds/match3.mp3', 'match', 3),
+    'match4': SoundSpec('resources/sounds/match4.mp3', 'combo', 4),
+    'match5': SoundSpec('resources/sounds/match5.mp3', 'combo', 5),
+}
+
+# 每個聲部群組保留的聲道數，也就是同時最多幾個聲部
+CHANNEL_GROUPS: Dict[str, int] = {
+    'match': 2,
+    'combo': 2,
+}
+
+
+# 音效管理類
 class SoundManager:
-    def __init__(self, rootdir: str):
-        # 載入音效
-        self.match3_sound = pygame.mixer.Sound(os.path.join(rootdir, 'resources/sounds/match3.mp3'))
-        self.match4_sound = pygame.mixer.Sound(os.path.join(rootdir, 'resources/sounds/match4.mp3'))
-        self.match5_sound = pygame.mixer.Sound(os.path.join(rootdir, 'resources/sounds/match5.mp3'))
-    
+    """預先解碼的音效快取與聲部管理
+
+    - 音效解碼成 PCM 後保留在記憶體中；設定 cache_dir 時另外存成 WAV，之後啟動不必再解碼 MP3
+    - 每個聲部群組使用保留的聲道（mixer.set_reserved），自動分配的播放不會搶走它們
+    - request() 只記錄要求，flush() 每幀呼叫一次：同一群組只播放優先度最高的音效，
+      DEDUPE_WINDOW 內重複的音效略過，聲道都在使用中時取代最早開始的聲部
+    """
+    DEDUPE_WINDOW = 0.08  # 同一個音效至少間隔幾秒才再播放
+
+    def __init__(self, rootdir: str, cache_dir: Optional[str] = None):
+        self.rootdir = rootdir
+        self.cache_dir = cache_dir if cache_dir is not None else GameConfig.SOUND_CACHE_DIR
+        # 混音器與音效在第一次需要時才初始化與載入，不拖慢啟動
+        self.sounds: Optional[Dict[str, pygame.mixer.Sound]] = None
+        self.channels: Dict[str, List[pygame.mixer.Channel]] = {}
+        self.voice_started: Dict[str, List[float]] = {}  # 每個聲道最近一次開始播放的時間
+        self.last_played: Dict[str, float] = {}
+        self.pending: Dict[str, str] = {}  # 本幀每個群組要播放的音效
+        self.counts = {'requested': 0, 'played': 0, 'batched': 0, 'deduped': 0, 'stolen': 0}
+
+    def load(self) -> bool:
+        """初始化混音器、保留聲道並載入音效（只做一次），沒有音效裝置時停用音效"""
+        if self.sounds is None:
+            self.sounds = {}
+            try:
+                if not pygame.mixer.get_init():
+                    pygame.mixer.init()
+                self._reserve_channels()
+                for name, spec in SOUNDS.items():
+                    sound = self._load_sound(name, spec)
+                    sound.set_volume(spec.volume)
+                    self.sounds[name] = sound
+            except pygame.error as error:
+                print(f"Sound disabled: {error}")  # 調試輸出
+                self.sounds = {}
+        return bool(self.sounds)
+
+    def _reserve_channels(self) -> None:
+        """把最前面的聲道依序分給各個群組並保留起來"""
+        total = sum(CHANNEL_GROUPS.values())
+        if pygame.mixer.get_num_channels() < total:
+            pygame.mixer.set_num_channels(total)
+        pygame.mixer.set_reserved(total)
+        index = 0
+        for group, count in CHANNEL_GROUPS.items():
+            self.channels[group] = [pygame.mixer.Channel(index + i) for i in range(count)]
+            self.voice_started[group] = [0.0] * count
+            index += count
+
+    def _cache_path(self, name: str) -> Optional[str]:
+        """WAV 快取的路徑，檔名包含混音器格式（格式不同時不會讀到舊的快取）"""
+        if not self.cache_dir:
+            return None
+        frequency, size, channels = pygame.mixer.get_init()
+        return os.path.join(self.cache_dir, f'{name}_{frequency}_{size}_{channels}.wav')
+
+    def _load_sound(self, name: str, spec: SoundSpec) -> pygame.mixer.Sound:
+        """載入一個音效：有較新的 WAV 快取時直接讀取，否則解碼原始檔並寫入快取"""
+        source = os.path.join(self.rootdir, spec.path)
+        cache = self._cache_path(name)
+        if cache and os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(source):
+            return pygame.mixer.Sound(cache)
+        sound = pygame.mixer.Sound(source)
+        if cache:
+            self._write_wav(cache, sound)
+        return sound
+
+    @staticmethod
+    def _write_wav(path: str, sound: pygame.mixer.Sound) -> None:
+        """把解碼後的 PCM 寫成 WAV；WAV 只支援無號 8 位元與有號 16 位元，其他格式不快取"""
+        frequency, size, channels = pygame.mixer.get_init()
+        if size not in (8, -16):
+            return
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temp_path = path + '.tmp'
+        with wave.open(temp_path, 'wb') as f:
+            f.setnchannels(channels)
+            f.setsampwidth(abs(size) // 8)
+            f.setframerate(frequency)
+            f.writeframes(sound.get_raw())
+        os.replace(temp_path, path)
+
+    def request(self, name: str) -> None:
+        """要求播放音效；同一幀的要求累積到 flush() 才處理"""
+        spec = SOUNDS[name]
+        self.counts['requested'] += 1
+        current = self.pending.get(spec.group)
+        if current is not None:
+            self.counts['batched'] += 1
+            if SOUNDS[current].priority >= spec.priority:
+                return
+        self.pending[spec.group] = name
+
     def play_match_sound(self, match_length: int) -> None:
-        """根據消除長度播放對應音效"""
-        if match_length == 3:
-            self.match3_sound.set_volume(0.5)
-            self.match3_sound.play()
-        elif match_length == 4:
-            self.match4_sound.set_volume(0.5)
-            self.match4_sound.play()
-        elif match_length >= 5:
-            self.match5_sound.set_volume(0.5)
-            self.match5_sound.play()
\ No newline at end of file
+        """根據消除長度要求對應音效"""
+        if match_length >= 3:
+            self.request(f'match{min(match_length, 5)}')
+
+    def flush(self, now: Optional[float] = None) -> int:
+        """播放本幀累積的音效（每個群組最多一個），回傳實際播放的數量"""
+        if not self.pending:
+            return 0
+        pending, self.pending = self.pending, {}
+        if not self.load():
+            return 0
+        now = time.perf_counter() if now is None else now
+        played = 0
+        for group, name in pending.items():
+            last = self.last_played.get(name)
+            if last is not None and now - last < self.DEDUPE_WINDOW:
+                self.counts['deduped'] += 1
+                continue
+            index = self._voice(group)
+            self.channels[group][index].play(self.sounds[name])
+            self.voice_started[group][index] = now
+            self.last_played[name] = now
+            played += 1
+        self.counts['played'] += played
+        return played
+
+    def _voice(self, group: str) -> int:
+        """群組中空閒的聲道；都在使用中時取代最早開始的聲部"""
+        channels = self.channels[group]
+        for index, channel in enumerate(channels):
+            if not channel.get_busy():
+                return index
+        self.counts['stolen'] += 1
+        started = self.voice_started[group]
+        return started.index(min(started))
+
+    def stats(self) -> Dict[str, int]:
+        """回傳要求、播放、合併、略過與取代的次數"""
+        return dict(self.counts)
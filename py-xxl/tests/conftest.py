@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 測試直接匯入 py-xxl 底下的模組（遊戲以扁平模組的方式組織，沒有套件）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
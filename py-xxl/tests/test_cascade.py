@@ -0,0 +1,68 @@
+from typing import List, Tuple
+from board import Board
+from matcher import find_matches, MATCH_HORIZONTAL, MATCH_VERTICAL, MATCH_T, MATCH_L
+from cascade import group_matches
+
+# 定義常用的類型
+Position = Tuple[int, int]
+
+SHAPE_TYPE = 7  # 背景只使用 1..5，形狀使用的種類不會與背景連成一線
+
+
+def make_board(cells: List[Position], size: int = 7) -> Board:
+    """背景沒有任何三連的棋盤，並把 cells 填成同一種寶石"""
+    board = Board(size, SHAPE_TYPE)
+    for x in range(size):
+        for y in range(size):
+            board.types[x, y] = (x + 2 * y) % 5 + 1  # 橫向與縱向相鄰的格子種類都不同
+    for x, y in cells:
+        board.types[x, y] = SHAPE_TYPE
+    return board
+
+
+def test_t_shape_is_one_group_with_bomb():
+    """T 型（橫向三連加中間往下的兩格）合併成一組，以 5 連計分並在中間放置炸彈"""
+    cells = [(1, 1), (2, 1), (3, 1), (2, 2), (2, 3)]
+    matches = find_matches(make_board(cells).types)
+    assert any(match[0] == MATCH_T for match in matches)
+
+    groups = group_matches(matches)
+    assert len(groups) == 1
+    group = groups[0]
+    assert sorted(group.positions) == sorted(cells)
+    assert group.score_length == 5
+    assert group.bomb == (2, 1)
+
+
+def test_l_shape_is_one_group_with_bomb():
+    """L 型（橫向三連加左端往下的兩格）合併成一組並放置炸彈"""
+    cells = [(1, 1), (2, 1), (3, 1), (1, 2), (1, 3)]
+    matches = find_matches(make_board(cells).types)
+    assert any(match[0] == MATCH_L for match in matches)
+
+    groups = group_matches(matches)
+    assert len(groups) == 1
+    assert sorted(groups[0].positions) == sorted(cells)
+    assert groups[0].score_length == 5
+    assert groups[0].bomb == (1, 1)
+
+
+def test_cross_merges_without_bomb():
+    """十字不是 T/L 型：兩條直線合併成一組，但不放炸彈"""
+    cells = [(1, 2), (2, 2), (3, 2), (2, 1), (2, 3)]
+    matches = find_matches(make_board(cells).types)
+    assert sorted(match[0] for match in matches) == [MATCH_HORIZONTAL, MATCH_VERTICAL]
+
+    groups = group_matches(matches)
+    assert len(groups) == 1
+    assert sorted(groups[0].positions) == sorted(cells)
+    assert groups[0].score_length == 5
+    assert groups[0].bomb is None
+
+
+def test_separate_lines_stay_separate():
+    """不重疊的兩條直線各自一組"""
+    cells = [(0, 0), (1, 0), (2, 0), (4, 4), (4, 5), (4, 6)]
+    groups = group_matches(find_matches(make_board(cells).types))
+    assert len(groups) == 2
+    assert all(group.score_length == 3 and group.bomb is None for group in groups)
@@ -0,0 +1,45 @@
+import random
+import pytest
+from engine import Engine
+from matcher import find_matches
+from cascade import group_matches
+
+
+def settled_engine(seed: int) -> Engine:
+    """穩定（沒有現成消除）且放了幾個炸彈的引擎"""
+    rng = random.Random(seed)
+    engine = Engine(size=rng.choice([6, 8, 10]), num_types=rng.choice([4, 5, 6]), rng=rng)
+    for _ in range(rng.randrange(3)):
+        engine.board.place_bomb(rng.randrange(engine.board.size), rng.randrange(engine.board.size))
+    engine.settle()
+    return engine
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_swap_gain_matches_first_wave(seed: int):
+    """swap_gain() 等於實際交換後第一波消除（完整掃描並分組）或爆炸的得分，且不修改引擎"""
+    engine = settled_engine(seed)
+    before = engine.board.copy()
+    score = engine.score_manager
+    for action in engine.legal_moves():
+        pos1, pos2 = action
+        trial = engine.clone(random.Random(0))
+        trial.board.swap(pos1, pos2)
+        if engine.board.is_bomb(*pos1) or engine.board.is_bomb(*pos2):
+            expected = trial._explode(pos2 if engine.board.is_bomb(*pos1) else pos1).value
+        else:
+            groups = group_matches(find_matches(trial.board.types))
+            expected = sum(score.match_score(group.score_length) for group in groups)
+        assert engine.swap_gain(action) == expected
+    assert (engine.board.types == before.types).all() and (engine.board.special == before.special).all()
+
+
+def test_swap_gain_of_dead_swap_is_zero():
+    """不相鄰、超出棋盤或不會消除的交換得分為 0"""
+    engine = settled_engine(0)
+    assert engine.swap_gain(((0, 0), (2, 0))) == 0
+    assert engine.swap_gain(((0, 0), (-1, 0))) == 0
+    legal = set(engine.legal_moves())
+    dead = [((x, y), (x + 1, y)) for x in range(engine.board.size - 1) for y in range(engine.board.size)
+            if ((x, y), (x + 1, y)) not in legal]
+    assert all(engine.swap_gain(action) == 0 for action in dead)
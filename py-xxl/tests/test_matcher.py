@@ -0,0 +1,39 @@
+import random
+import pytest
+from board import Board
+from matcher import IncrementalMatcher, find_matches
+
+
+@pytest.mark.parametrize('size', [8, IncrementalMatcher.SMALL_BOARD + 4])
+def test_incremental_matches_full_scan(size: int):
+    """隨機交換、消除與補充後，增量結果（小棋盤與 NumPy 增量兩條路徑）都與完整掃描相同"""
+    rng = random.Random(size)
+    board = Board.random(size, 5, rng)
+    matcher = IncrementalMatcher()
+    for _ in range(200):
+        assert matcher.find_matches(board) == find_matches(board.types)
+        x, y = rng.randrange(size - 1), rng.randrange(size - 1)
+        if rng.random() < 0.5:
+            board.swap((x, y), (x + 1, y))
+        else:
+            board.swap((x, y), (x, y + 1))
+        matches = find_matches(board.types)
+        if matches and rng.random() < 0.5:
+            # 清除一整列的一段再補充，模擬連鎖造成的大範圍變動
+            removed = [(x, row) for row in range(rng.randrange(1, size))]
+            board.remove(removed)
+            board.collapse(removed, rng)
+
+
+def test_clone_keeps_cache():
+    """clone() 複製快取給棋盤副本後，結果仍與完整掃描相同"""
+    rng = random.Random(1)
+    size = IncrementalMatcher.SMALL_BOARD + 4
+    board = Board.random(size, 5, rng)
+    matcher = IncrementalMatcher()
+    matcher.find_matches(board)
+    copy = board.copy()
+    clone = matcher.clone(copy)
+    copy.swap((0, 0), (1, 0))
+    assert clone.find_matches(copy) == find_matches(copy.types)
+    assert matcher.find_matches(board) == find_matches(board.types)
@@ -0,0 +1,50 @@
+import random
+import pytest
+from board import Board
+from matcher import find_matches
+from moves import MoveGenerator
+
+
+def brute_force_legal(board: Board, pos1, pos2) -> bool:
+    """實際交換後檢查：有炸彈參與或形成消除才合法"""
+    if board.is_bomb(*pos1) or board.is_bomb(*pos2):
+        return True
+    trial = board.copy()
+    trial.swap(pos1, pos2)
+    return bool(find_matches(trial.types))
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_is_legal_matches_brute_force(seed: int):
+    """每一對相鄰格子的查詢結果都與實際交換相同，moves() 也正好列出這些交換"""
+    rng = random.Random(seed)
+    size = rng.choice([6, 8, 10])
+    board = Board.random(size, rng.choice([4, 5, 6]), rng, allow_matches=False)
+    for _ in range(rng.randrange(3)):
+        board.place_bomb(rng.randrange(size), rng.randrange(size))
+    generator = MoveGenerator()
+    generator.update(board)
+
+    expected = []
+    for x in range(size):
+        for y in range(size):
+            for pos2 in ((x + 1, y), (x, y + 1)):
+                if not board.is_valid_pos(*pos2):
+                    continue
+                legal = brute_force_legal(board, (x, y), pos2)
+                assert generator.is_legal((x, y), pos2) == legal
+                assert generator.is_legal(pos2, (x, y)) == legal
+                if legal:
+                    expected.append(((x, y), pos2))
+    assert generator.moves() == sorted(expected)
+    assert generator.has_moves() == bool(expected)
+
+
+def test_is_legal_rejects_non_adjacent():
+    """不相鄰或超出棋盤的交換一律不合法"""
+    board = Board.random(6, 5, random.Random(0), allow_matches=False)
+    generator = MoveGenerator()
+    generator.update(board)
+    assert not generator.is_legal((0, 0), (2, 0))
+    assert not generator.is_legal((0, 0), (1, 1))
+    assert not generator.is_legal((5, 0), (6, 0))
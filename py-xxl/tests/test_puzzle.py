@@ -0,0 +1,64 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+from setting import GameConfig
+from puzzle import Puzzle
+from bomb import Bomb
+from pool import SpritePool
+from board import SPECIAL_BOMB
+
+GEM = os.path.join(GameConfig.ROOTDIR, 'resources/images/gem1.png')
+SIZE = (GameConfig.GRIDSIZE, GameConfig.GRIDSIZE)
+
+
+def test_gem_joins_and_leaves_groups():
+    """寶石是一般的 pygame 精靈：可以加入、移出群組，kill() 從所有群組移除"""
+    gems, selected = pygame.sprite.Group(), pygame.sprite.Group()
+    gem = Puzzle(GEM, SIZE, (0, 0), 0)
+    assert isinstance(gem, pygame.sprite.Sprite)
+    assert not gem.alive()
+
+    gems.add(gem)
+    selected.add(gem)
+    assert gem.alive() and gem in gems and gem in selected
+    assert set(gem.groups()) == {gems, selected}
+
+    selected.remove(gem)
+    assert gem not in selected and gem in gems
+    gem.kill()
+    assert not gem.alive() and len(gems) == 0
+
+
+def test_bomb_is_a_sprite():
+    """炸彈經由基底類別初始化，同樣可以放進群組並繪製"""
+    group = pygame.sprite.Group()
+    bomb = Bomb((10, 20))
+    assert bomb.special == SPECIAL_BOMB and bomb.is_special
+    assert bomb.rect.topleft == (10, 20)
+    group.add(bomb)
+    assert bomb.alive()
+    group.draw(pygame.Surface((100, 100)))
+    bomb.kill()
+    assert not bomb.alive()
+
+
+def test_pool_release_removes_from_groups():
+    """歸還物件池的精靈離開所有群組，重新取出後可以再加入"""
+    pool = SpritePool()
+    group = pygame.sprite.Group()
+    gem = pool.gem(GEM, SIZE, (0, 0), 0)
+    group.add(gem)
+    pool.release(gem)
+    assert not gem.alive() and len(group) == 0
+
+    again = pool.gem(GEM, SIZE, (5, 5), 0)
+    assert again is gem
+    group.add(again)
+    assert again in group and again.rect.topleft == (5, 5)
+
+
+def test_gem_attributes_use_slots():
+    """寶石自己的屬性都在 slot 中，__dict__ 只有基底類別的群組集合"""
+    gem = Puzzle(GEM, SIZE, (0, 0), 0)
+    assert not set(Puzzle.__slots__) & set(vars(gem))
+    assert len(vars(gem)) == 1
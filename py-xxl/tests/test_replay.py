@@ -0,0 +1,39 @@
+import random
+from board import Board
+from engine import Engine
+from replay import Replay, ReplayRecorder, ReplayPlayer, move_seed
+
+SEED, LEVEL, SIZE, NUM_TYPES = 1234, 2, 8, 6
+
+
+def record_game(moves: int = 30) -> ReplayRecorder:
+    """以引擎玩一局並記錄：每一步都以 move_seed 重設亂數，與重播時相同"""
+    recorder = ReplayRecorder(SEED, LEVEL, SIZE, NUM_TYPES, keyframe_interval=5)
+    engine = Engine(board=Board.random(SIZE, NUM_TYPES, random.Random(SEED)))
+    engine.rng.seed(move_seed(SEED, LEVEL, 0))
+    engine.settle()
+    recorder.settled(0, engine.board, engine.score, engine.gem_count)
+    for frame in range(1, moves + 1):
+        engine.rng.seed(move_seed(SEED, LEVEL, engine.moves + 1))
+        action = engine.legal_moves()[frame % len(engine.legal_moves())]
+        assert engine.step(action).valid
+        recorder.swap(frame, *action)
+        recorder.settled(engine.moves, engine.board, engine.score, engine.gem_count)
+    recorder.end(moves + 1, engine.score)
+    return recorder
+
+
+def test_round_trip_verifies():
+    """序列化再讀回的重播逐步重現後，所有關鍵影格都與記錄相同"""
+    replay = Replay.from_bytes(record_game().to_bytes())
+    assert replay.seed == SEED and replay.level == LEVEL
+    assert ReplayPlayer(replay).verify() == []
+
+
+def test_verify_reports_tampered_keyframe():
+    """關鍵影格被竄改時 verify() 回報不一致的步數"""
+    replay = Replay.from_bytes(record_game().to_bytes())
+    move = sorted(replay.keyframes)[-1]
+    keyframe = replay.keyframes[move]
+    replay.keyframes[move] = keyframe._replace(score=keyframe.score + 1)
+    assert move in ReplayPlayer(replay).verify()
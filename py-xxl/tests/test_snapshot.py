@@ -0,0 +1,52 @@
+import random
+from board import Board
+from snapshot import Snapshot, SnapshotHistory
+
+
+def capture(board: Board, moves: int, base=None) -> Snapshot:
+    return Snapshot.capture(board, {}, moves * 10, moves, base=base)
+
+
+def test_rewind_returns_earlier_state():
+    """復原 n 步後回到第 n 個之前的快照與 tag，棋盤內容一致"""
+    rng = random.Random(0)
+    board = Board.random(6, 5, rng)
+    history = SnapshotHistory(capacity=8)
+    boards = []
+    for moves in range(5):
+        boards.append(board.copy())
+        history.push(capture(board, moves, history.latest), tag=moves)
+        board.swap((moves, 0), (moves, 1))
+
+    snapshot, tag = history.rewind(2)
+    assert tag == 2
+    assert len(history) == 3
+    assert snapshot.moves == 2 and snapshot.score == 20
+    assert (snapshot.board().types == boards[2].types).all()
+
+    snapshot, tag = history.rewind()
+    assert tag == 1
+    assert (snapshot.board().types == boards[1].types).all()
+
+
+def test_rewind_without_history_does_nothing():
+    """歷史不夠時不丟棄任何快照並回傳 None"""
+    history = SnapshotHistory()
+    assert history.rewind() is None
+    history.push(capture(Board.random(4, 5, random.Random(1)), 0))
+    assert history.rewind() is None
+    assert history.rewind(0) is None
+    assert len(history) == 1
+
+
+def test_capacity_drops_oldest_and_shares_columns():
+    """超過容量時丟棄最舊的快照；沒有改變的行在快照間共用"""
+    board = Board.random(6, 5, random.Random(2))
+    history = SnapshotHistory(capacity=3)
+    for moves in range(5):
+        history.push(capture(board, moves, history.latest), tag=moves)
+        board.swap((0, 0), (0, 1))
+    assert [tag for _, tag in history.entries] == [2, 3, 4]
+    assert history.rewind(3) is None
+    memory = history.memory()
+    assert memory['board_bytes'] < memory['unshared_bytes']
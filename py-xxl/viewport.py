@@ -0,0 +1,120 @@
+import math
+import pygame
+from typing import Tuple, List, Dict, Union, Optional
+from setting import GameConfig
+
+# 定義常用的類型
+Position = Tuple[int, int]
+CellRange = Tuple[int, int, int, int]  # x0, x1, y0, y1（不含結尾）
+
+
+# 視野類
+class Viewport:
+    """棋盤格子與螢幕坐標之間的轉換
+
+    一般模式下整個棋盤都在畫面內（與原本的 XMARGIN/YMARGIN/GRIDSIZE 相同）；
+    大棋盤模式下只顯示 area 範圍內的一部分棋盤，可以捲動（offset）與縮放（cell_size）。
+    """
+    def __init__(self, board_size: int, area: pygame.Rect, cell_size: int, scrollable: bool = False):
+        self.board_size = board_size
+        self.area = pygame.Rect(area)
+        self.cell_size = cell_size
+        self.scrollable = scrollable
+        self.offset_x = 0  # 視野左上角在整個棋盤上的像素位置
+        self.offset_y = 0
+
+    @classmethod
+    def from_config(cls, board_size: int) -> 'Viewport':
+        """依照 GameConfig 建立視野：MEGA_BOARD 時為可捲動的固定大小視窗，否則顯示整個棋盤"""
+        if GameConfig.MEGA_BOARD:
+            area = pygame.Rect(GameConfig.XMARGIN, GameConfig.YMARGIN, GameConfig.VIEW_SIZE, GameConfig.VIEW_SIZE)
+            viewport = cls(board_size, area, GameConfig.GRIDSIZE, scrollable=True)
+            viewport.center_on(board_size // 2, board_size // 2)
+            return viewport
+        board_pixels = board_size * GameConfig.GRIDSIZE
+        area = pygame.Rect(GameConfig.XMARGIN, GameConfig.YMARGIN, board_pixels, board_pixels)
+        return cls(board_size, area, GameConfig.GRIDSIZE)
+
+    def key(self) -> Tuple[int, ...]:
+        """影響靜態圖層的視野狀態（快取鍵）；捲動位置不在其中，捲動時不必重建圖層"""
+        return (self.board_size, self.cell_size, self.scrollable) + tuple(self.area)
+
+    def cell_pos(self, x: int, y: int) -> List[int]:
+        """格子左上角的螢幕坐標（y 可以是負數，代表棋盤上方補充寶石的位置）"""
+        return [self.area.left + x * self.cell_size - self.offset_x,
+                self.area.top + y * self.cell_size - self.offset_y]
+
+    def cell_rect(self, x: int, y: int) -> pygame.Rect:
+        """格子的螢幕範圍"""
+        return pygame.Rect(self.cell_pos(x, y), (self.cell_size, self.cell_size))
+
+    def cell_at(self, position: Position) -> Optional[List[int]]:
+        """螢幕坐標所在的格子 [x, y]，不在視野或棋盤內時回傳 None"""
+        if not self.area.collidepoint(position):
+            return None
+        x = (position[0] - self.area.left + self.offset_x) // self.cell_size
+        y = (position[1] - self.area.top + self.offset_y) // self.cell_size
+        if 0 <= x < self.board_size and 0 <= y < self.board_size:
+            return [x, y]
+        return None
+
+    def visible_range(self) -> CellRange:
+        """與視野重疊的格子範圍（包含只露出一部分的格子）"""
+        x0 = max(self.offset_x // self.cell_size, 0)
+        y0 = max(self.offset_y // self.cell_size, 0)
+        x1 = min(math.ceil((self.offset_x + self.area.width) / self.cell_size), self.board_size)
+        y1 = min(math.ceil((self.offset_y + self.area.height) / self.cell_size), self.board_size)
+        return x0, x1, y0, y1
+
+    def is_visible(self, x: int, y: int) -> bool:
+        """格子是否在視野內"""
+        x0, x1, y0, y1 = self.visible_range()
+        return x0 <= x < x1 and y0 <= y < y1
+
+    def _clamp(self) -> None:
+        """把視野限制在棋盤範圍內（棋盤比視野小時置中）"""
+        for axis, extent in (('offset_x', self.area.width), ('offset_y', self.area.height)):
+            board_pixels = self.board_size * self.cell_size
+            if board_pixels <= extent:
+                setattr(self, axis, -((extent - board_pixels) // 2))
+            else:
+                setattr(self, axis, min(max(getattr(self, axis), 0), board_pixels - extent))
+
+    def scroll(self, dx: float, dy: float) -> Tuple[int, int]:
+        """捲動視野（像素），回傳實際移動的量"""
+        if not self.scrollable:
+            return 0, 0
+        old_x, old_y = self.offset_x, self.offset_y
+        self.offset_x += int(round(dx))
+        self.offset_y += int(round(dy))
+        self._clamp()
+        return self.offset_x - old_x, self.offset_y - old_y
+
+    def center_on(self, x: int, y: int) -> None:
+        """把指定格子移到視野中央"""
+        if not self.scrollable:
+            return
+        self.offset_x = x * self.cell_size + self.cell_size // 2 - self.area.width // 2
+        self.offset_y = y * self.cell_size + self.cell_size // 2 - self.area.height // 2
+        self._clamp()
+
+    def zoom(self, steps: int, anchor: Optional[Position] = None) -> bool:
+        """依 GameConfig.ZOOM_LEVELS 放大（正數）或縮小（負數），anchor 所在的棋盤位置保持不動"""
+        if not self.scrollable:
+            return False
+        levels = GameConfig.ZOOM_LEVELS
+        index = min(range(len(levels)), key=lambda i: abs(levels[i] - self.cell_size))
+        new_size = levels[min(max(index + steps, 0), len(levels) - 1)]
+        if new_size == self.cell_size:
+            return False
+        if anchor is None or not self.area.collidepoint(anchor):
+            anchor = self.area.center
+        # 錨點在整個棋盤上的位置（以格子為單位）縮放前後相同
+        local_x, local_y = anchor[0] - self.area.left, anchor[1] - self.area.top
+        board_x = (local_x + self.offset_x) / self.cell_size
+        board_y = (local_y + self.offset_y) / self.cell_size
+        self.cell_size = new_size
+        self.offset_x = int(round(board_x * new_size - local_x))
+        self.offset_y = int(round(board_y * new_size - local_y))
+        self._clamp()
+        return True